@@ -0,0 +1,131 @@
+import functools
+import math
+import os
+from typing import Any, Callable, Dict
+import anyio
+from anyio.lowlevel import RunVar
+from prometheus_client import Counter, Gauge
+from app.errors import CustomError
+
+BUSY_WORKERS = Gauge("bulkhead_busy_workers", "Threads running a route of the bulkhead", ["bulkhead"])
+QUEUED_TASKS = Gauge("bulkhead_queued_tasks", "Requests waiting for a thread of the bulkhead", ["bulkhead"])
+CAPACITY = Gauge("bulkhead_capacity", "Threads of the bulkhead", ["bulkhead"])
+REJECTED = Counter("bulkhead_rejected_total", "Requests rejected because the bulkhead queue was full", ["bulkhead"])
+
+# worker threads are admitted by the bulkheads, not by anyio's default limiter
+_unbounded = RunVar("bulkhead_unbounded_limiter")
+
+
+def _thread_limiter() -> anyio.CapacityLimiter:
+    try:
+        return _unbounded.get()
+    except LookupError:
+        limiter = anyio.CapacityLimiter(math.inf)
+        _unbounded.set(limiter)
+        return limiter
+
+
+class Bulkhead:
+    """
+    Bounded set of worker threads for one class of routes.
+
+    Sync routes normally share the single thread limiter of anyio (40
+    threads), so slow catalog reads can hold every thread while health
+    checks and admin calls queue behind them. Each bulkhead admits at most
+    ``workers`` concurrent calls of its routes and lets at most ``queue``
+    more wait; past that the request is rejected at once with 503 ERR0007,
+    like a saturated admission controller.
+
+    Limiters are per event loop (an anyio ``RunVar``), as anyio's own.
+    """
+
+    def __init__(self, name: str, workers: int, queue: int):
+        """
+        Args:
+            name: Route class, used as the metrics label
+            workers: Maximum concurrent calls
+            queue: Maximum calls waiting for a worker
+        """
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self._limiter = RunVar(f"bulkhead_{name}")
+        self._busy = BUSY_WORKERS.labels(bulkhead=name)
+        self._queued = QUEUED_TASKS.labels(bulkhead=name)
+        CAPACITY.labels(bulkhead=name).set(workers)
+
+    def limiter(self) -> anyio.CapacityLimiter:
+        try:
+            return self._limiter.get()
+        except LookupError:
+            limiter = anyio.CapacityLimiter(self.workers)
+            self._limiter.set(limiter)
+            return limiter
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run ``func`` in a worker thread of this bulkhead.
+
+        Raises:
+            CustomError: ERR0007 (503) if every worker is busy and the queue is full
+        """
+        limiter = self.limiter()
+        if limiter.available_tokens < 1 and limiter.statistics().tasks_waiting >= self.queue:
+            REJECTED.labels(bulkhead=self.name).inc()
+            raise CustomError("ERR0007", "Server overloaded, retry later", 503, headers={"Retry-After": "1"})
+        self._queued.inc()
+        try:
+            await limiter.acquire()
+        finally:
+            self._queued.dec()
+        self._busy.inc()
+        try:
+            return await anyio.to_thread.run_sync(
+                functools.partial(func, *args, **kwargs), limiter=_thread_limiter()
+            )
+        finally:
+            self._busy.dec()
+            limiter.release()
+
+
+def _sized(name: str, workers: int, queue: int) -> Bulkhead:
+    # BULKHEAD_<NAME>_WORKERS / BULKHEAD_<NAME>_QUEUE override the defaults
+    prefix = f"BULKHEAD_{name.upper()}"
+    return Bulkhead(
+        name,
+        int(os.getenv(f"{prefix}_WORKERS", str(workers))),
+        int(os.getenv(f"{prefix}_QUEUE", str(queue))),
+    )
+
+
+BULKHEADS: Dict[str, Bulkhead] = {
+    # product reads: the bulk of the traffic
+    "catalog": _sized("catalog", 32, 256),
+    # bulk feeds (the change feed): few clients, large responses
+    "exports": _sized("exports", 4, 16),
+    # catalog writes and variant changes: each waits for the write-ahead log fsync
+    "writes": _sized("writes", 4, 32),
+    # metrics scrapes: must stay responsive under read and write load
+    "ops": _sized("ops", 2, 8),
+}
+
+
+def isolated(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Run a sync route in the ``name`` bulkhead instead of the shared threadpool.
+
+    The decorated function becomes a coroutine with the same signature, so
+    FastAPI awaits it on the event loop and the bulkhead dispatches the
+    original function to a thread. With dependency_injector, apply it below
+    ``@inject``.
+    """
+    bulkhead = BULKHEADS[name]
+
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        async def endpoint(*args, **kwargs):
+            return await bulkhead.run(func, *args, **kwargs)
+
+        return endpoint
+
+    return decorate
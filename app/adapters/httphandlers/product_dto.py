@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List
-from app.core.domain.product import Product
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
+from app.core.domain.product import Product, ProductChange, ProductSpecification, Suggestion
 
 class PaginatedResponse(BaseModel):
     """
@@ -35,4 +35,123 @@ class PaginatedResponse(BaseModel):
         example=10,
         ge=1,
         le=100
-    )
\ No newline at end of file
+    )
+
+
+class SimilarProductsResponse(BaseModel):
+    """
+    Products most similar to a reference product, closest first.
+    """
+    product_id: int = Field(
+        description="Identifier of the reference product",
+        example=1
+    )
+    items: List[Product] = Field(
+        description="Similar products from the same category, closest first"
+    )
+
+
+class TopProductsResponse(BaseModel):
+    """
+    Best-scoring products for a weighted ranking, best first.
+    """
+    items: List[Product] = Field(
+        description="Top products, best first"
+    )
+    weights: Dict[str, float] = Field(
+        description="Weights applied to the normalized attributes",
+        example={"rating": 0.7, "price": -0.3}
+    )
+
+
+class ProductChangesResponse(BaseModel):
+    """
+    Products changed since a catalog generation (delta sync).
+    """
+    since: int = Field(description="Generation the client asked from", example=120)
+    generation: int = Field(description="Current catalog generation; pass it as `since` next time", example=125)
+    resync_required: bool = Field(
+        description="True when `since` is older than the change log; reload the full catalog and "
+                    "continue from `generation`"
+    )
+    changes: List[ProductChange] = Field(description="Net change per product, oldest first")
+
+
+class SuggestionsResponse(BaseModel):
+    """
+    Autocomplete completions for a typed prefix, best rated first.
+    """
+    prefix: str = Field(description="Prefix as sent", example="mac")
+    items: List[Suggestion] = Field(description="Matching product names and brands")
+
+
+class ProductCreate(BaseModel):
+    """
+    Product fields accepted by create and full update.
+    
+    Normalized numeric specifications are derived from ``specifications`` and
+    cannot be set directly.
+    """
+    id: Optional[int] = Field(
+        default=None,
+        description="Product identifier; assigned automatically on create when omitted (ignored on update)",
+        ge=1
+    )
+    name: str = Field(description="Product name and model", example="MacBook Air 13\" M3")
+    category: str = Field(description="Product category", example="Laptops")
+    image_url: Optional[str] = Field(default=None, description="URL to product image for display")
+    description: str = Field(description="Detailed product description and key features")
+    price: float = Field(description="Product price in USD", ge=0, example=1099.0)
+    rating: float = Field(description="Customer rating out of 5.0", ge=0, le=5, example=4.6)
+    specifications: ProductSpecification = Field(default_factory=ProductSpecification, description="Technical specifications")
+    availability: str = Field(description="Current stock status", example="In Stock")
+    brand: str = Field(description="Product manufacturer or brand name", example="Apple")
+
+
+class ProductPatch(BaseModel):
+    """
+    Partial product update; only the fields sent are changed and
+    ``specifications`` is merged key by key.
+    """
+    name: Optional[str] = None
+    category: Optional[str] = None
+    image_url: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = Field(default=None, ge=0, example=999.0)
+    rating: Optional[float] = Field(default=None, ge=0, le=5)
+    specifications: Optional[ProductSpecification] = None
+    availability: Optional[str] = Field(default=None, example="Out of Stock")
+    brand: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _no_null_required_fields(self):
+        for name in self.model_fields_set:
+            if getattr(self, name) is None and name != "image_url":
+                raise ValueError(f"{name} cannot be null")
+        return self
+
+
+class CatalogVariantRequest(BaseModel):
+    """
+    Overrides defining a catalog variant, applied on top of the base catalog.
+    """
+    overrides: Dict[int, Optional[ProductPatch]] = Field(
+        description="Product id -> fields to change (merged like a PATCH), or null to hide the product",
+        example={"1": {"price": 1199.0}, "2": None},
+    )
+
+
+class CatalogVariantResponse(BaseModel):
+    """
+    A catalog variant as stored.
+    """
+    name: str = Field(description="Variant name, sent in the X-Catalog-Variant header")
+    overrides: int = Field(description="Number of overridden products")
+    products: int = Field(description="Number of products in the variant")
+
+
+class CatalogVariantsResponse(BaseModel):
+    """
+    Catalog variants being served.
+    """
+    variants: Dict[str, int] = Field(description="Variant name -> number of overridden products")
@@ -1,9 +1,27 @@
 from app.core.ports.services import ProductService
-from .product_dto import PaginatedResponse
+from app.core.domain.product import CatalogSummary, PriceHistory, Product
+from .product_dto import (
+    CatalogVariantRequest,
+    CatalogVariantResponse,
+    CatalogVariantsResponse,
+    PaginatedResponse,
+    ProductChangesResponse,
+    ProductCreate,
+    ProductPatch,
+    SimilarProductsResponse,
+    SuggestionsResponse,
+    TopProductsResponse,
+)
+from .bulkhead import isolated
+from .single_flight import SingleFlight
 from dependency_injector.wiring import Provide, inject
 from app.config import Container
-from fastapi import APIRouter, Query, Header, Depends, HTTPException
-from typing import Optional, List
+from app.admin import require_admin
+from app.faults import inject_delay
+from datetime import datetime
+from fastapi import APIRouter, Query, Header, Depends, HTTPException, Path, Response
+from typing import Dict, Optional, List
+import math
 import time
 
 router = APIRouter(
@@ -16,6 +34,22 @@ router = APIRouter(
     }
 )
 
+VARIANT_HEADER_DESCRIPTION = "Catalog variant to read (see /v1/products/variants); the base catalog when omitted"
+
+# identical concurrent list/top-k queries share one repository call and one encoded body
+_paginated_flight = SingleFlight("find_paginated")
+_top_flight = SingleFlight("find_top")
+
+
+def _values_key(values: Optional[List[str]]):
+    """Repeated filter values in a canonical order (their order does not change results)."""
+    return tuple(sorted(set(values))) if values else None
+
+
+def _json_response(model) -> Response:
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
 @router.get(
     "",
     response_model=PaginatedResponse,
@@ -32,8 +66,24 @@ router = APIRouter(
     - Headphones (Audio equipment)
     - TVs (Smart televisions)
     
+    **Filters:**
+    `category`, `brand` and `availability` accept repeated values; `min_price`,
+    `max_price`, `min_rating` and `max_rating` bound numeric ranges. Filters are
+    combined with AND and answered from bitmap indexes.
+    
+    `filter` accepts an expression such as
+    `price < 1500 and brand in ("Apple","Dell") and specifications.display_type == "OLED"`
+    (operators `== != < <= > >=`, `in`, `not in`, `and`, `or`, `not`, parentheses).
+    Normalized numeric specification columns (`memory_gb`, `storage_gb`, `weight_kg`,
+    `battery_hours`, `screen_inches`, `refresh_hz`) can be used in `filter` and `sort`.
+    
+    `q` searches product names and brands: every term must match, and terms that are
+    not in the catalog vocabulary are matched to close spellings (`samsnug`, `macbok`).
+    
     **Performance Testing:**
-    Use the `X-Delay` header to simulate slow responses for load testing.
+    Use the `X-Delay` header to simulate slow responses for load testing. The delay (plus
+    any latency injected through `/admin/fault`) is awaited without holding a worker
+    thread, so it does not slow down other requests.
     """,
     response_description="Paginated list of products with metadata",
     responses={
@@ -62,11 +112,13 @@ router = APIRouter(
                 }
             }
         },
-        400: {"description": "Invalid pagination parameters"},
+        400: {"description": "Invalid pagination parameters, filter expression or sort field"},
         504: {"description": "Request timeout (when using X-Delay header)"}
-    }
+    },
+    dependencies=[Depends(inject_delay)]
 )
 @inject
+@isolated("catalog")
 def find_paginated(
     page: int = Query(
         1, 
@@ -81,18 +133,45 @@ def find_paginated(
         description="Number of products per page (maximum 100)",
         example=10
     ),
-    x_delay: Optional[int] = Header(
-        None, 
-        description="Optional delay in seconds for performance testing",
-        example=2,
-        ge=0,
-        le=10
-    ),
     category: Optional[List[str]] = Query(
         None,
         description="Optional category filter. Provide one or more categories to filter results.",
         example=["Laptops"]
     ),
+    brand: Optional[List[str]] = Query(
+        None,
+        description="Optional brand filter. Provide one or more brands to filter results.",
+        example=["Apple"]
+    ),
+    availability: Optional[List[str]] = Query(
+        None,
+        description="Optional availability filter (e.g. In Stock).",
+        example=["In Stock"]
+    ),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price (inclusive)", example=500),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price (inclusive)", example=1500),
+    min_rating: Optional[float] = Query(None, ge=0, le=5, description="Minimum rating (inclusive)", example=4.5),
+    max_rating: Optional[float] = Query(None, ge=0, le=5, description="Maximum rating (inclusive)", example=5),
+    filter_expression: Optional[str] = Query(
+        None,
+        alias="filter",
+        max_length=1024,
+        description="Filter expression combining comparisons with and/or/not.",
+        example='price < 1500 and brand in ("Apple","Dell") and specifications.display_type == "OLED"'
+    ),
+    q: Optional[str] = Query(
+        None,
+        max_length=200,
+        description="Text search over names and brands; every term must match, misspellings are tolerated.",
+        example="samsnug galaxy"
+    ),
+    sort: Optional[str] = Query(
+        None,
+        description="Numeric field to sort by (id, price, rating, memory_gb, storage_gb, weight_kg, "
+                    "battery_hours, screen_inches, refresh_hz). Prefix with '-' for descending order.",
+        example="-rating"
+    ),
+    x_catalog_variant: Optional[str] = Header(None, max_length=64, description=VARIANT_HEADER_DESCRIPTION),
     service = Provide[Container.product_service]
 ):
     """
@@ -101,5 +180,439 @@ def find_paginated(
     Returns a list of products with comprehensive details including specifications,
     pricing, ratings, and availability status.
     """
-    products, total = service.find_paginated(page=page, size=page_size, delay=x_delay or 0, category=category)
-    return PaginatedResponse(items=products, total=total, page=page, page_size=page_size)
\ No newline at end of file
+    def compute():
+        products, total = service.find_paginated(
+            page=page,
+            size=page_size,
+            category=category,
+            brand=brand,
+            availability=availability,
+            min_price=min_price,
+            max_price=max_price,
+            min_rating=min_rating,
+            max_rating=max_rating,
+            filter=filter_expression,
+            q=q,
+            sort=sort,
+            variant=x_catalog_variant,
+        )
+        return _json_response(PaginatedResponse(items=products, total=total, page=page, page_size=page_size))
+
+    key = (
+        page, page_size, _values_key(category), _values_key(brand), _values_key(availability),
+        min_price, max_price, min_rating, max_rating, filter_expression, q, sort, x_catalog_variant,
+    )
+    return _paginated_flight.do(key, compute)
+
+
+DEFAULT_TOP_WEIGHTS = {"rating": 1.0}
+
+
+def _parse_weights(weights: Optional[str]) -> Dict[str, float]:
+    """Parse ``field:weight,field:weight`` into a dict."""
+    if not weights:
+        return dict(DEFAULT_TOP_WEIGHTS)
+    parsed = {}
+    for item in weights.split(","):
+        name, sep, value = item.partition(":")
+        try:
+            if not sep or not name.strip():
+                raise ValueError(item)
+            weight = float(value)
+            if not math.isfinite(weight):
+                raise ValueError(item)
+            parsed[name.strip()] = weight
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"invalid weight {item!r}, expected field:number")
+    return parsed
+
+
+@router.get(
+    "/top",
+    response_model=TopProductsResponse,
+    summary="Get top-ranked products",
+    description="""
+    Retrieve the k best products for a weighted score.
+    
+    `weights` is a comma-separated list of `field:weight` pairs over numeric fields
+    (price, rating and the normalized specification columns). Each field is scaled to
+    [0, 1] before weighting; negative weights favour lower values, e.g.
+    `weights=rating:0.7,price:-0.3` for "best value". Accepts the same filters as
+    `GET /v1/products`.
+    """,
+    responses={400: {"description": "Invalid weights or filters"}}
+)
+@inject
+@isolated("catalog")
+def find_top(
+    k: int = Query(10, ge=1, le=100, description="Number of products to return", example=10),
+    weights: Optional[str] = Query(
+        None,
+        description="Comma-separated field:weight pairs (default rating:1)",
+        example="rating:0.7,price:-0.3"
+    ),
+    category: Optional[List[str]] = Query(None, description="Optional category filter", example=["Laptops"]),
+    brand: Optional[List[str]] = Query(None, description="Optional brand filter", example=["Apple"]),
+    availability: Optional[List[str]] = Query(None, description="Optional availability filter"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price (inclusive)"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price (inclusive)"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5, description="Minimum rating (inclusive)"),
+    max_rating: Optional[float] = Query(None, ge=0, le=5, description="Maximum rating (inclusive)"),
+    filter_expression: Optional[str] = Query(None, alias="filter", max_length=1024, description="Filter expression"),
+    q: Optional[str] = Query(None, max_length=200, description="Text search over names and brands", example="macbok"),
+    x_catalog_variant: Optional[str] = Header(None, max_length=64, description=VARIANT_HEADER_DESCRIPTION),
+    service = Provide[Container.product_service]
+):
+    """
+    Retrieve the top-k products for the requested weights.
+    """
+    parsed = _parse_weights(weights)
+
+    def compute():
+        items = service.find_top(
+            k=k,
+            weights=parsed,
+            category=category,
+            brand=brand,
+            availability=availability,
+            min_price=min_price,
+            max_price=max_price,
+            min_rating=min_rating,
+            max_rating=max_rating,
+            filter=filter_expression,
+            q=q,
+            variant=x_catalog_variant,
+        )
+        return _json_response(TopProductsResponse(items=items, weights=parsed))
+
+    key = (
+        k, tuple(parsed.items()), _values_key(category), _values_key(brand), _values_key(availability),
+        min_price, max_price, min_rating, max_rating, filter_expression, q, x_catalog_variant,
+    )
+    return _top_flight.do(key, compute)
+
+
+@router.get(
+    "/{product_id}/similar",
+    response_model=SimilarProductsResponse,
+    summary="Get similar products",
+    description="""
+    Retrieve the products most similar to the given product, within its category.
+    
+    Similarity is the distance over price, rating, normalized numeric specifications
+    and brand. Useful for "compare with similar" views without downloading whole categories.
+    """,
+    responses={404: {"description": "Product not found"}}
+)
+@inject
+@isolated("catalog")
+def find_similar(
+    product_id: int,
+    k: int = Query(5, ge=1, le=50, description="Number of similar products to return", example=5),
+    x_catalog_variant: Optional[str] = Header(None, max_length=64, description=VARIANT_HEADER_DESCRIPTION),
+    service = Provide[Container.product_service]
+):
+    """
+    Retrieve the k nearest products to the given product.
+    """
+    items = service.find_similar(product_id=product_id, k=k, variant=x_catalog_variant)
+    if items is None:
+        raise HTTPException(status_code=404, detail="product not found")
+    return SimilarProductsResponse(product_id=product_id, items=items)
+
+
+@router.get(
+    "/{product_id}/price-history",
+    response_model=PriceHistory,
+    summary="Get price history",
+    description="""
+    Retrieve the prices a product had within a time range, for "price over time" charts.
+    
+    Every price change is kept at three resolutions: `raw` (the last 128 changes), `hour`
+    (last price of each hour, 14 days) and `day` (last price of each day, 2 years). By
+    default the finest resolution that still covers `since` is used. The history lives in
+    memory and starts empty when the service starts; `current_price` is always present.
+    """,
+    responses={404: {"description": "Product not found"}}
+)
+@inject
+@isolated("catalog")
+def find_price_history(
+    product_id: int,
+    since: Optional[datetime] = Query(None, description="Start of the range (ISO 8601 or epoch seconds)"),
+    until: Optional[datetime] = Query(None, description="End of the range (ISO 8601 or epoch seconds)"),
+    resolution: Optional[str] = Query(None, pattern="^(raw|hour|day)$", description="raw, hour or day"),
+    service = Provide[Container.product_service]
+):
+    """
+    Retrieve the price history of a product.
+    """
+    history = service.find_price_history(product_id=product_id, since=since, until=until, resolution=resolution)
+    if history is None:
+        raise HTTPException(status_code=404, detail="product not found")
+    return history
+
+
+@router.get(
+    "/changes",
+    response_model=ProductChangesResponse,
+    summary="Get catalog changes",
+    description="""
+    Retrieve only the products created, updated or deleted since a catalog generation.
+    
+    Each write advances the catalog generation. Clients keep the `generation` of their
+    last sync and send it as `since`; several changes to one product are collapsed into
+    its current state. The change log is bounded: when `since` is too old (or from a
+    previous process), `resync_required` is true and the client reloads the full
+    catalog and continues from the returned `generation`.
+
+    `X-Result-Count` reports how many changes were returned; rate-limited clients are
+    charged for them after the response.
+    """
+)
+@inject
+@isolated("exports")
+def find_changes(
+    response: Response,
+    since: int = Query(..., ge=0, description="Catalog generation of the client's last sync", example=0),
+    service = Provide[Container.product_service]
+):
+    """
+    Retrieve the delta between a catalog generation and the current one.
+    """
+    generation, changes = service.find_changes(since=since)
+    response.headers["X-Result-Count"] = str(len(changes or ()))
+    return ProductChangesResponse(
+        since=since,
+        generation=generation,
+        resync_required=changes is None,
+        changes=changes or [],
+    )
+
+
+@router.get(
+    "/suggest",
+    response_model=SuggestionsResponse,
+    summary="Autocomplete product names and brands",
+    description="""
+    Complete what the user has typed so far to product names and brands.
+    
+    Matching is case-insensitive against the start of the name or brand; results are
+    ranked by the best rating among the matching products, then by how many products
+    share the name. Answered from a sorted key index built at catalog load, so it can
+    be called on every keystroke.
+    """
+)
+@inject
+@isolated("catalog")
+def find_suggestions(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Typed text", example="mac"),
+    limit: int = Query(8, ge=1, le=20, description="Number of completions", example=8),
+    x_catalog_variant: Optional[str] = Header(None, max_length=64, description=VARIANT_HEADER_DESCRIPTION),
+    service = Provide[Container.product_service]
+):
+    """
+    Retrieve completions for a prefix.
+    """
+    items = service.find_suggestions(prefix=prefix, limit=limit, variant=x_catalog_variant)
+    return SuggestionsResponse(prefix=prefix, items=items)
+
+
+@router.get(
+    "/stats",
+    response_model=CatalogSummary,
+    summary="Get catalog statistics",
+    description="""
+    Count, min, max, mean and percentiles (p25, p50, p75, p90, p99) of price and rating,
+    plus the share of each availability value, for the whole catalog, per category and
+    per brand.
+    
+    The aggregates are computed when the catalog is loaded and updated by every write,
+    so polling this endpoint does not scan the catalog.
+    """
+)
+@inject
+@isolated("catalog")
+def get_stats(
+    x_catalog_variant: Optional[str] = Header(None, max_length=64, description=VARIANT_HEADER_DESCRIPTION),
+    service = Provide[Container.product_service]
+):
+    """
+    Retrieve the catalog aggregates.
+    """
+    return service.get_stats(variant=x_catalog_variant)
+
+
+VARIANT_NAME = "^[A-Za-z0-9_-]{1,64}$"
+
+
+@router.get(
+    "/variants",
+    response_model=CatalogVariantsResponse,
+    summary="List catalog variants",
+    description="""
+    Catalog variants (regional price lists, A/B test catalogs) served next to the base
+    catalog. Reads select one with the `X-Catalog-Variant` header.
+    """
+)
+@inject
+@isolated("catalog")
+def list_variants(service = Provide[Container.product_service]):
+    """
+    List the catalog variants.
+    """
+    return CatalogVariantsResponse(variants=service.list_variants())
+
+
+@router.put(
+    "/variants/{name}",
+    response_model=CatalogVariantResponse,
+    summary="Create or replace a catalog variant",
+    description="""
+    Define a variant as overrides of the base catalog. Requires the `X-Admin-Token` header.
+    
+    Each override changes some fields of a product (merged like a PATCH) or hides it
+    (`null`). The variant shares every other product and index with the base catalog,
+    and writes to the base catalog show up in every variant. Variants are kept in
+    memory only.
+    """,
+    responses={401: {"description": "Missing or invalid admin token"}},
+    dependencies=[Depends(require_admin)]
+)
+@inject
+@isolated("writes")
+def put_variant(
+    body: CatalogVariantRequest,
+    name: str = Path(..., pattern=VARIANT_NAME, description="Variant name"),
+    service = Provide[Container.product_service]
+):
+    """
+    Create or replace a catalog variant.
+    """
+    overrides = {
+        product_id: None if override is None else override.model_dump(exclude_unset=True)
+        for product_id, override in body.overrides.items()
+    }
+    products = service.put_variant(name=name, overrides=overrides)
+    return CatalogVariantResponse(name=name, overrides=len(overrides), products=products)
+
+
+@router.delete(
+    "/variants/{name}",
+    status_code=204,
+    summary="Delete a catalog variant",
+    responses={401: {"description": "Missing or invalid admin token"}, 404: {"description": "Variant not found"}},
+    dependencies=[Depends(require_admin)]
+)
+@inject
+@isolated("writes")
+def delete_variant(name: str, service = Provide[Container.product_service]):
+    """
+    Stop serving a catalog variant.
+    """
+    if not service.delete_variant(name=name):
+        raise HTTPException(status_code=404, detail="variant not found")
+    return Response(status_code=204)
+
+
+# `/{product_id}` routes are declared last so they never shadow the fixed
+# paths above (`/top`, ...)
+@router.get(
+    "/{product_id}",
+    response_model=Product,
+    summary="Get a product",
+    responses={404: {"description": "Product not found"}}
+)
+@inject
+@isolated("catalog")
+def find_by_id(
+    product_id: int,
+    x_catalog_variant: Optional[str] = Header(None, max_length=64, description=VARIANT_HEADER_DESCRIPTION),
+    service = Provide[Container.product_service]
+):
+    """
+    Retrieve a single product by id.
+    """
+    product = service.find_by_id(product_id=product_id, variant=x_catalog_variant)
+    if product is None:
+        raise HTTPException(status_code=404, detail="product not found")
+    return product
+
+
+@router.post(
+    "",
+    response_model=Product,
+    status_code=201,
+    summary="Create a product",
+    description="""
+    Add a product to the catalog. Requires the `X-Admin-Token` header.
+    
+    Writes publish a new catalog version and update the indexes incrementally;
+    concurrent reads keep serving the previous version until the write completes.
+    """,
+    responses={401: {"description": "Missing or invalid admin token"}, 409: {"description": "Product id already exists"}},
+    dependencies=[Depends(require_admin)]
+)
+@inject
+@isolated("writes")
+def create_product(body: ProductCreate, service = Provide[Container.product_service]):
+    """
+    Create a product; the id is assigned when omitted.
+    """
+    return service.create(product_data=body.model_dump())
+
+
+@router.put(
+    "/{product_id}",
+    response_model=Product,
+    summary="Replace a product",
+    responses={401: {"description": "Missing or invalid admin token"}, 404: {"description": "Product not found"}},
+    dependencies=[Depends(require_admin)]
+)
+@inject
+@isolated("writes")
+def update_product(product_id: int, body: ProductCreate, service = Provide[Container.product_service]):
+    """
+    Replace every field of an existing product.
+    """
+    product = service.update(product_id=product_id, product_data=body.model_dump(exclude={"id"}))
+    if product is None:
+        raise HTTPException(status_code=404, detail="product not found")
+    return product
+
+
+@router.patch(
+    "/{product_id}",
+    response_model=Product,
+    summary="Update product fields",
+    responses={401: {"description": "Missing or invalid admin token"}, 404: {"description": "Product not found"}},
+    dependencies=[Depends(require_admin)]
+)
+@inject
+@isolated("writes")
+def patch_product(product_id: int, body: ProductPatch, service = Provide[Container.product_service]):
+    """
+    Change only the fields sent; specifications are merged key by key.
+    """
+    product = service.patch(product_id=product_id, changes=body.model_dump(exclude_unset=True))
+    if product is None:
+        raise HTTPException(status_code=404, detail="product not found")
+    return product
+
+
+@router.delete(
+    "/{product_id}",
+    status_code=204,
+    summary="Delete a product",
+    responses={401: {"description": "Missing or invalid admin token"}, 404: {"description": "Product not found"}},
+    dependencies=[Depends(require_admin)]
+)
+@inject
+@isolated("writes")
+def delete_product(product_id: int, service = Provide[Container.product_service]):
+    """
+    Remove a product from the catalog.
+    """
+    if not service.delete(product_id=product_id):
+        raise HTTPException(status_code=404, detail="product not found")
+    return Response(status_code=204)
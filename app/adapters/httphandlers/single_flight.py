@@ -0,0 +1,86 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+from prometheus_client import Counter
+from app import deadline
+
+COALESCED_REQUESTS = Counter(
+    "single_flight_coalesced_total",
+    "Requests answered by another request's in-flight computation",
+    ["route"],
+)
+LEADER_REQUESTS = Counter(
+    "single_flight_executions_total",
+    "Computations actually run by single-flight groups",
+    ["route"],
+)
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent computations.
+
+    The first caller for a key runs the computation; callers arriving with
+    the same key while it is in flight wait for it and get the same result
+    (or the same exception). Nothing is kept once the computation finishes,
+    so this is not a cache: a later call runs again.
+
+    Waiting callers stop at their own request deadline. If the computation
+    fails because the first caller's deadline passed, callers with time
+    left run it again instead of sharing that timeout.
+    """
+
+    def __init__(self, route: str):
+        """
+        Args:
+            route: Label for the coalescing metrics
+        """
+        self._route = route
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Run ``compute`` once for all concurrent callers with ``key``.
+
+        Args:
+            key: Normalized identity of the computation
+            compute: Produces the shared result
+
+        Returns:
+            Any: The result of the in-flight (or new) computation
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            COALESCED_REQUESTS.labels(route=self._route).inc()
+            while not call.done.wait(deadline.remaining()):
+                deadline.check("single_flight")
+            if isinstance(call.error, deadline.DeadlineExceeded) and not deadline.expired():
+                return self.do(key, compute)
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        LEADER_REQUESTS.labels(route=self._route).inc()
+        try:
+            call.value = compute()
+            return call.value
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
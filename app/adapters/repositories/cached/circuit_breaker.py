@@ -0,0 +1,133 @@
+"""
+Circuit breaker guarding calls to a slow or failing repository backend.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Tuple
+from prometheus_client import Counter, Gauge
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = Gauge(
+    "repository_circuit_breaker_state",
+    "Circuit breaker state of a repository backend (0=closed, 1=half_open, 2=open)",
+    ["backend"],
+)
+BREAKER_TRANSITIONS = Counter(
+    "repository_circuit_breaker_transitions_total",
+    "Circuit breaker state changes",
+    ["backend", "state"],
+)
+BREAKER_REJECTIONS = Counter(
+    "repository_circuit_breaker_rejections_total",
+    "Backend calls refused because the circuit was open",
+    ["backend"],
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker over a sliding window of recent calls.
+
+    The circuit opens when, over the last ``window`` calls (and at least
+    ``min_calls``), the share of failed calls reaches ``failure_rate`` or
+    the share of calls slower than ``slow_call_seconds`` reaches
+    ``slow_call_rate``. While open, calls fail fast for ``open_seconds``;
+    then one trial call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 50,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 1.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (failed, slow) per recent call
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.state = CLOSED
+        BREAKER_STATE.labels(backend=name).set(_STATE_VALUES[CLOSED])
+
+    def _transition(self, state: str):
+        if state != self.state:
+            self.state = state
+            BREAKER_STATE.labels(backend=self.name).set(_STATE_VALUES[state])
+            BREAKER_TRANSITIONS.labels(backend=self.name, state=state).inc()
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go to the backend now.
+
+        Returns:
+            bool: False while open (and while a half-open trial is running)
+        """
+        with self._lock:
+            if self.state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+        BREAKER_REJECTIONS.labels(backend=self.name).inc()
+        return False
+
+    def record(self, seconds: float, failed: bool):
+        """Record the outcome of a call that ``allow`` let through."""
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_running = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self._calls.clear()
+                    self._transition(CLOSED)
+                return
+            self._calls.append((failed, slow))
+            calls = len(self._calls)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._calls if f)
+            slow_calls = sum(1 for _, s in self._calls if s)
+            if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                self._open()
+
+    def release(self):
+        """
+        End a call that ``allow`` let through without recording an outcome,
+        e.g. one cut short by its caller's deadline, which says nothing about
+        the backend. A half-open trial is handed to the next call.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_running = False
+
+    def _open(self):
+        self._opened_at = self._clock()
+        self._calls.clear()
+        self._transition(OPEN)
@@ -0,0 +1,247 @@
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from app import deadline
+from app.core.domain.product import CatalogSummary, PriceHistory, Product, ProductChange, Suggestion
+from app.core.ports.repositories import ProductRepository
+from app.errors import CustomError
+from .circuit_breaker import CircuitBreaker
+
+CACHE_REQUESTS = Counter(
+    "catalog_cache_requests_total",
+    "Cached repository reads by outcome",
+    ["result"],  # hit, early_refresh, stale, miss, fallback
+)
+CACHE_ENTRIES = Gauge("catalog_cache_entries", "Query results held by the repository cache")
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "stale_until", "delta")
+
+    def __init__(self, value: Any, fresh_until: float, stale_until: float, delta: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        # how long the backend took to compute the value (XFetch)
+        self.delta = delta
+
+
+class CachingProductRepository(ProductRepository):
+    """
+    Read-through cache in front of another ProductRepository.
+
+    Query results are cached for ``ttl`` seconds. Past that they are served
+    for up to ``stale_ttl`` more seconds while one background refresh per key
+    recomputes them (stale-while-revalidate). To avoid a stampede of
+    refreshes when a popular entry expires, every hit may refresh early with
+    a probability that grows as expiry nears, scaled by how long the value
+    took to compute (probabilistic early expiration, "XFetch").
+
+    Backend calls go through a CircuitBreaker. While the circuit is open the
+    cache serves whatever result it still holds for the query, however old,
+    and otherwise fails fast with ERR0005 (503).
+
+    Writes pass through and drop every cached result, so readers see their
+    own writes; ``find_changes`` and ``find_price_history`` are never cached.
+    """
+
+    def __init__(
+        self,
+        backend: ProductRepository,
+        ttl: float = 5.0,
+        stale_ttl: float = 30.0,
+        max_entries: int = 10_000,
+        beta: float = 1.0,
+        breaker: Optional[CircuitBreaker] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            backend: Repository that answers cache misses and takes writes
+            ttl: Seconds a result is served without recomputing it
+            stale_ttl: Further seconds a result is served while it is refreshed
+            max_entries: Cached results kept, least recently used evicted first
+            beta: Early expiration aggressiveness (0 disables it)
+            breaker: Circuit breaker for backend calls (default: one named after the backend)
+            clock: Monotonic time source
+        """
+        super().__init__()
+        self._backend = backend
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._max_entries = max_entries
+        self._beta = beta
+        self._breaker = breaker or CircuitBreaker(type(backend).__name__)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing = set()
+        # bumped on every write so a refresh racing with it cannot store an old result
+        self._generation = 0
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+    def _load(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        """Call the backend through the breaker and cache the result."""
+        if not self._breaker.allow():
+            raise CustomError("ERR0005", "Catalog backend unavailable", 503)
+        generation = self._generation
+        start = self._clock()
+        try:
+            value = call()
+        except deadline.DeadlineExceeded:
+            # the caller's own budget ran out: neither a failure nor a slow call
+            self._breaker.release()
+            raise
+        except CustomError as err:
+            # request errors (bad filter, unknown field) say nothing about backend health
+            self._breaker.record(self._clock() - start, failed=err.status_code >= 500)
+            raise
+        except Exception:
+            self._breaker.record(self._clock() - start, failed=True)
+            raise
+        now = self._clock()
+        self._breaker.record(now - start, failed=False)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = _Entry(value, now + self._ttl, now + self._ttl + self._stale_ttl, now - start)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+                CACHE_ENTRIES.set(len(self._entries))
+        return value
+
+    def _refresh(self, key: Hashable, call: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._load(key, call)
+            except Exception:
+                pass  # the entry stays stale and the next read retries
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(run)
+
+    def _cached(self, method: str, *args, **kwargs) -> Any:
+        key = (method, _freeze(args), _freeze(kwargs))
+
+        def call():
+            return getattr(self._backend, method)(*args, **kwargs)
+
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None and now < entry.fresh_until:
+            if self._beta > 0 and now - entry.delta * self._beta * math.log(1.0 - random.random()) >= entry.fresh_until:
+                CACHE_REQUESTS.labels(result="early_refresh").inc()
+                self._refresh(key, call)
+            else:
+                CACHE_REQUESTS.labels(result="hit").inc()
+            return entry.value
+        if entry is not None and now < entry.stale_until:
+            CACHE_REQUESTS.labels(result="stale").inc()
+            self._refresh(key, call)
+            return entry.value
+
+        CACHE_REQUESTS.labels(result="miss").inc()
+        try:
+            return self._load(key, call)
+        except CustomError as err:
+            if entry is None or err.status_code < 500:
+                raise
+        except Exception:
+            if entry is None:
+                raise
+        # backend down or circuit open: an old answer beats no answer
+        CACHE_REQUESTS.labels(result="fallback").inc()
+        return entry.value
+
+    def invalidate(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            CACHE_ENTRIES.set(0)
+
+    def find_paginated(self, page: int, size: int, **kwargs) -> Tuple[List[Product], int]:
+        return self._cached("find_paginated", page, size, **kwargs)
+
+    def find_similar(self, product_id: int, k: int, variant: Optional[str] = None) -> Optional[List[Product]]:
+        return self._cached("find_similar", product_id, k, variant=variant)
+
+    def find_top(self, k: int, weights: Dict[str, float], **kwargs) -> List[Product]:
+        return self._cached("find_top", k, weights, **kwargs)
+
+    def find_by_id(self, product_id: int, variant: Optional[str] = None) -> Optional[Product]:
+        return self._cached("find_by_id", product_id, variant=variant)
+
+    def find_suggestions(self, prefix: str, limit: int, variant: Optional[str] = None) -> List[Suggestion]:
+        return self._cached("find_suggestions", prefix.strip().lower(), limit, variant=variant)
+
+    def get_stats(self, variant: Optional[str] = None) -> CatalogSummary:
+        return self._cached("get_stats", variant=variant)
+
+    def find_changes(self, since: int) -> Tuple[int, Optional[List[ProductChange]]]:
+        return self._backend.find_changes(since)
+
+    def find_price_history(self, product_id: int, **kwargs) -> Optional[PriceHistory]:
+        return self._backend.find_price_history(product_id, **kwargs)
+
+    def create(self, product_data: Dict[str, Any]) -> Product:
+        try:
+            return self._backend.create(product_data)
+        finally:
+            self.invalidate()
+
+    def update(self, product_id: int, product_data: Dict[str, Any]) -> Optional[Product]:
+        try:
+            return self._backend.update(product_id, product_data)
+        finally:
+            self.invalidate()
+
+    def patch(self, product_id: int, changes: Dict[str, Any]) -> Optional[Product]:
+        try:
+            return self._backend.patch(product_id, changes)
+        finally:
+            self.invalidate()
+
+    def delete(self, product_id: int) -> bool:
+        try:
+            return self._backend.delete(product_id)
+        finally:
+            self.invalidate()
+
+    def put_variant(self, name: str, overrides: Dict[int, Optional[Dict[str, Any]]]) -> int:
+        try:
+            return self._backend.put_variant(name, overrides)
+        finally:
+            self.invalidate()
+
+    def delete_variant(self, name: str) -> bool:
+        try:
+            return self._backend.delete_variant(name)
+        finally:
+            self.invalidate()
+
+    def list_variants(self) -> Dict[str, int]:
+        return self._backend.list_variants()
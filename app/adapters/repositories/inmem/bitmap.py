@@ -0,0 +1,107 @@
+"""
+Integer bitset helpers used by the in-memory catalog indexes.
+
+A bitmap is a plain Python ``int`` where bit ``i`` is set when the product
+stored at position ``i`` belongs to the set. Python integers are arbitrary
+precision and only allocate the words they need, so sparse high bits stay
+cheap, and ``&``/``|``/``~`` plus ``int.bit_count`` run in C over whole
+machine words instead of Python loops.
+"""
+from typing import Iterable, List
+
+
+EMPTY = 0
+
+
+def from_positions(positions: Iterable[int]) -> int:
+    """
+    Build a bitmap from an iterable of positions.
+
+    Bits are set in a bytearray and converted once, which keeps the cost
+    linear in the number of positions instead of re-allocating a growing
+    integer for every bit.
+
+    Args:
+        positions: Non-negative product positions
+
+    Returns:
+        int: Bitmap with the given positions set
+    """
+    buffer = bytearray()
+    for position in positions:
+        byte = position >> 3
+        if byte >= len(buffer):
+            buffer.extend(b"\x00" * (byte + 1 - len(buffer)))
+        buffer[byte] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def full(size: int) -> int:
+    """Return a bitmap with positions ``0..size-1`` set."""
+    return (1 << size) - 1
+
+
+def popcount(bitmap: int) -> int:
+    """Return the number of positions set in the bitmap."""
+    return bitmap.bit_count()
+
+
+def contains(bitmap: int, position: int) -> bool:
+    """Return True if ``position`` is set in the bitmap."""
+    return (bitmap >> position) & 1 == 1
+
+
+def select(bitmap: int, skip: int, limit: int) -> List[int]:
+    """
+    Return up to ``limit`` set positions, in ascending order, after skipping
+    the first ``skip`` set positions.
+
+    The start position is located by binary search over prefix popcounts, so
+    deep pages do not walk every preceding bit.
+
+    Args:
+        bitmap: Bitmap to read from
+        skip: Number of set positions to skip
+        limit: Maximum number of positions to return
+
+    Returns:
+        List[int]: Selected positions in ascending order
+    """
+    if limit <= 0 or bitmap.bit_count() <= skip:
+        return []
+
+    start = 0
+    if skip:
+        # smallest prefix length whose popcount exceeds `skip`
+        lo, hi = 0, bitmap.bit_length()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (bitmap & ((1 << mid) - 1)).bit_count() > skip:
+                hi = mid
+            else:
+                lo = mid + 1
+        start = lo - 1
+
+    positions: List[int] = []
+    rest = bitmap >> start
+    position = start
+    while rest and len(positions) < limit:
+        offset = (rest & -rest).bit_length() - 1
+        position += offset
+        positions.append(position)
+        rest >>= offset + 1
+        position += 1
+    return positions
+
+
+def iter_positions(bitmap: int) -> Iterable[int]:
+    """Yield every set position in ascending order."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index << 3
+            for bit in _BYTE_BITS[byte]:
+                yield base + bit
+
+
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
@@ -0,0 +1,536 @@
+import copy
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+import numpy as np
+from app.core.domain.product import NumericSpecification, Product, ProductSpecification
+from . import bitmap
+from .stats import CatalogAggregates
+
+
+class NumericColumn:
+    """Dense float64 column; missing values are NaN."""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def with_value(self, position: int, value: float) -> "NumericColumn":
+        """Copy of the column with one position set (appended when at the end)."""
+        if position == len(self.values):
+            return NumericColumn(np.append(self.values, value))
+        values = self.values.copy()
+        values[position] = value
+        return NumericColumn(values)
+
+
+class TextColumn:
+    """
+    Dictionary-encoded text column.
+
+    Values are lowercased and replaced by int32 codes so equality and
+    membership tests become integer comparisons over one array. Missing
+    values are encoded as ``-1``.
+
+    The vocabulary only ever grows and is shared by the copies made with
+    ``with_value``: codes are never reassigned, so an older column simply
+    does not contain the codes added after it.
+    """
+
+    MISSING = -1
+
+    def __init__(self, raw_values: Sequence[Optional[str]]):
+        vocabulary: Dict[str, int] = {}
+        self.codes = np.fromiter(
+            (self.MISSING if v is None else vocabulary.setdefault(v.lower(), len(vocabulary)) for v in raw_values),
+            dtype=np.int32,
+            count=len(raw_values),
+        )
+        self.vocabulary = vocabulary
+
+    def code(self, value: str) -> int:
+        """Code for ``value`` or -2 (matches nothing) if it never occurs."""
+        return self.vocabulary.get(value.lower(), -2)
+
+    def with_value(self, position: int, raw: Optional[str]) -> "TextColumn":
+        """Copy of the column with one position set (appended when at the end)."""
+        vocabulary = self.vocabulary
+        code = self.MISSING if raw is None else vocabulary.setdefault(raw.lower(), len(vocabulary))
+        column = copy.copy(self)
+        if position == len(self.codes):
+            column.codes = np.append(self.codes, np.int32(code))
+        else:
+            column.codes = self.codes.copy()
+            column.codes[position] = code
+        return column
+
+
+Column = Union[NumericColumn, TextColumn]
+T = TypeVar("T")
+
+SPEC_NUMERIC_FIELDS = tuple(NumericSpecification.model_fields)
+
+
+def numeric_value(product: Product, name: str) -> float:
+    """Value of a numeric column for one product (NaN when missing)."""
+    if name in SPEC_NUMERIC_FIELDS:
+        specs = product.numeric_specifications
+        value = getattr(specs, name) if specs is not None else None
+    else:
+        value = getattr(product, name)
+    return np.nan if value is None else float(value)
+
+
+def text_value(product: Product, name: str) -> Optional[str]:
+    """Value of a text column for one product."""
+    if name.startswith("specifications."):
+        return getattr(product.specifications, name.split(".", 1)[1])
+    return getattr(product, name)
+
+
+class Segments(Sequence):
+    """
+    Immutable product sequence stored in fixed-size segments.
+
+    ``set`` copies only the touched segment and the segment table; every other
+    segment is shared with the previous version, so a write costs
+    ``O(SIZE + len / SIZE)`` instead of a full list copy.
+    """
+
+    SIZE = 1024
+
+    def __init__(self, segments: Tuple[Tuple[Product, ...], ...] = (), length: int = 0):
+        self._segments = segments
+        self._length = length
+
+    @classmethod
+    def of(cls, items: Sequence[Product]) -> "Segments":
+        items = list(items)
+        return cls(tuple(tuple(items[i: i + cls.SIZE]) for i in range(0, len(items), cls.SIZE)), len(items))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._segments[index // self.SIZE][index % self.SIZE]
+
+    def __iter__(self) -> Iterator[Product]:
+        for segment in self._segments:
+            yield from segment
+
+    def set(self, index: int, item: Product) -> "Segments":
+        """New sequence with ``index`` replaced, or ``item`` appended when ``index == len``."""
+        number, offset = divmod(index, self.SIZE)
+        segments = list(self._segments)
+        if number == len(segments):
+            segments.append(())
+        segment = list(segments[number])
+        if offset == len(segment):
+            segment.append(item)
+        else:
+            segment[offset] = item
+        segments[number] = tuple(segment)
+        return Segments(tuple(segments), max(self._length, index + 1))
+
+
+class RangeIndex:
+    """
+    Range-encoded bitmap index over a numeric product attribute.
+
+    Values are split into about ``BINS`` value ranges. Each bin keeps its
+    values sorted together with their positions for exact bisect counts, and
+    ``prefixes[j]`` holds every position stored in the bins before ``j``. A
+    range bitmap is then one cumulative bitmap plus the positions of at most
+    one partial bin, instead of one bit per matching product.
+
+    ``with_change`` copies only the affected bins and flips one bit in the
+    cumulative bitmaps above them; the other bins are shared.
+    """
+
+    BINS = 64
+
+    def __init__(self, values: Sequence[float]):
+        order = sorted(range(len(values)), key=lambda p: (values[p], p))
+        self.step = max(1, -(-len(order) // self.BINS))
+        # strictly increasing lower bounds of bins 1..n; equal values share a bin
+        self.bounds: List[float] = sorted({values[order[i]] for i in range(self.step, len(order), self.step)})
+
+        self.bin_values: List[List[float]] = [[] for _ in range(len(self.bounds) + 1)]
+        self.bin_positions: List[List[int]] = [[] for _ in range(len(self.bounds) + 1)]
+        for position in order:
+            number = bisect_right(self.bounds, values[position])
+            self.bin_values[number].append(values[position])
+            self.bin_positions[number].append(position)
+
+        self.prefixes: List[int] = [bitmap.EMPTY]
+        for positions in self.bin_positions[:-1]:
+            self.prefixes.append(self.prefixes[-1] | bitmap.from_positions(positions))
+
+    def _below(self, value: Optional[float], inclusive: bool) -> Tuple[int, int, int]:
+        # (count, bin, rank inside the bin) of the values sorting before `value`
+        if value is None:
+            number = len(self.bin_values) - 1 if inclusive else 0
+            rank = len(self.bin_values[number]) if inclusive else 0
+        else:
+            number = bisect_right(self.bounds, value)
+            values = self.bin_values[number]
+            rank = bisect_right(values, value) if inclusive else bisect_left(values, value)
+        return sum(len(v) for v in self.bin_values[:number]) + rank, number, rank
+
+    def _bitmap_below(self, number: int, rank: int) -> int:
+        return self.prefixes[number] | bitmap.from_positions(self.bin_positions[number][:rank])
+
+    def count(self, low: Optional[float], high: Optional[float]) -> int:
+        """Exact number of products with ``low <= value <= high``."""
+        return max(0, self._below(high, True)[0] - self._below(low, False)[0])
+
+    def between(self, low: Optional[float], high: Optional[float]) -> int:
+        """Bitmap of the products with ``low <= value <= high``."""
+        upper, upper_bin, upper_rank = self._below(high, True)
+        lower, lower_bin, lower_rank = self._below(low, False)
+        if upper <= lower:
+            return bitmap.EMPTY
+        result = self._bitmap_below(upper_bin, upper_rank)
+        if lower:
+            result &= ~self._bitmap_below(lower_bin, lower_rank)
+        return result
+
+    def with_change(self, position: int, old: Optional[float], new: Optional[float]) -> "RangeIndex":
+        """
+        New index with ``position`` moved from value ``old`` to ``new``.
+
+        ``old=None`` inserts the position and ``new=None`` removes it.
+        """
+        index = copy.copy(self)
+        index.bin_values = list(self.bin_values)
+        index.bin_positions = list(self.bin_positions)
+        index.prefixes = list(self.prefixes)
+        bit = 1 << position
+        for value, insert in ((old, False), (new, True)):
+            if value is None:
+                continue
+            number = bisect_right(self.bounds, value)
+            values = list(index.bin_values[number])
+            positions = list(index.bin_positions[number])
+            low, high = bisect_left(values, value), bisect_right(values, value)
+            at = bisect_left(positions, position, low, high)
+            if insert:
+                values.insert(at, value)
+                positions.insert(at, position)
+            else:
+                del values[at], positions[at]
+            index.bin_values[number], index.bin_positions[number] = values, positions
+            for later in range(number + 1, len(index.prefixes)):
+                index.prefixes[later] = index.prefixes[later] | bit if insert else index.prefixes[later] & ~bit
+        return index
+
+
+class Catalog:
+    """
+    Immutable, indexed version of the product catalog.
+
+    Products are addressed by a stable position. Each indexed attribute
+    keeps one bitmap per distinct (lowercased) value, and numeric attributes
+    keep a ``RangeIndex``. Queries combine these bitmaps instead of scanning
+    product lists.
+
+    Writes never modify a catalog: ``upsert`` and ``delete`` return the next
+    version, which shares unchanged product segments and indexes with this
+    one and only updates the affected bits, columns and sort orders. Deleted
+    products are tombstoned (cleared from ``live``) so positions never shift.
+    A reader holding one version never observes a partially applied write.
+    """
+
+    VALUE_FIELDS = ("category", "brand", "availability")
+    RANGE_FIELDS = ("price", "rating")
+
+    SPEC_NUMERIC_COLUMNS = SPEC_NUMERIC_FIELDS
+    NUMERIC_COLUMNS = ("id", "price", "rating") + SPEC_NUMERIC_COLUMNS
+    TEXT_COLUMNS = ("name", "category", "brand", "availability") + tuple(
+        f"specifications.{name}" for name in ProductSpecification.model_fields
+    )
+
+    def __init__(self, products: Sequence[Product], version: int = 0):
+        self.products: Segments = Segments.of(products)
+        self.size = len(self.products)
+        self.live = bitmap.full(self.size)
+        # generation of this version; every write adds one
+        self.version = version
+        # id -> position; shared with later versions and only ever extended,
+        # so lookups go through `position_of`, which validates the entry
+        self.positions_by_id: Dict[int, int] = {p.id: position for position, p in enumerate(self.products)}
+        self.max_id = max(self.positions_by_id, default=0)
+
+        self.value_index: Dict[str, Dict[str, int]] = {}
+        self.value_counts: Dict[str, Dict[str, int]] = {}
+        for field in self.VALUE_FIELDS:
+            groups: Dict[str, List[int]] = {}
+            for position, product in enumerate(self.products):
+                key = (getattr(product, field) or '').lower()
+                groups.setdefault(key, []).append(position)
+            self.value_index[field] = {key: bitmap.from_positions(ps) for key, ps in groups.items()}
+            self.value_counts[field] = {key: len(ps) for key, ps in groups.items()}
+
+        self.range_index: Dict[str, RangeIndex] = {
+            field: RangeIndex([float(getattr(p, field)) for p in self.products])
+            for field in self.RANGE_FIELDS
+        }
+
+        # columnar copies are built on first use; the catalog never changes
+        # afterwards, so a racing duplicate build is harmless
+        self._columns: Dict[str, Column] = {}
+        self._sort_orders: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._derived: Dict[str, object] = {}
+        self._aggregates: Optional[CatalogAggregates] = None
+
+    @property
+    def count(self) -> int:
+        """Number of live products."""
+        return bitmap.popcount(self.live)
+
+    def position_of(self, product_id: int) -> Optional[int]:
+        """Position of a live product in this version, or None."""
+        position = self.positions_by_id.get(product_id)
+        if (
+            position is None
+            or position >= self.size
+            or not bitmap.contains(self.live, position)
+            or self.products[position].id != product_id
+        ):
+            return None
+        return position
+
+    def get(self, product_id: int) -> Optional[Product]:
+        """Live product with the given id in this version, or None."""
+        position = self.position_of(product_id)
+        return None if position is None else self.products[position]
+
+    def live_products(self) -> List[Product]:
+        """Live products in position order."""
+        return [self.products[p] for p in bitmap.iter_positions(self.live)]
+
+    def upsert(self, product: Product) -> "Catalog":
+        """
+        Next version with ``product`` created, or replacing the product with
+        the same id. A re-created id gets its old position back.
+        """
+        position = self.positions_by_id.get(product.id)
+        if position is not None and position < self.size and self.products[position].id == product.id:
+            old = self.products[position] if bitmap.contains(self.live, position) else None
+            return self._with_change(position, old, product)
+        return self._with_change(self.size, None, product)
+
+    def delete(self, product_id: int) -> "Catalog":
+        """Next version without the product (this version if it does not exist)."""
+        position = self.position_of(product_id)
+        if position is None:
+            return self
+        return self._with_change(position, self.products[position], None)
+
+    def with_products(self, products: Dict[int, Optional[Product]]) -> "Catalog":
+        """
+        Version with several products upserted (or deleted when None).
+
+        Same as chaining ``upsert``/``delete``, except that the aggregates
+        are updated once for the whole batch.
+        """
+        aggregates = self._aggregates
+        catalog = copy.copy(self)
+        catalog._aggregates = None
+        changes: List[Tuple[Optional[Product], Optional[Product]]] = []
+        for product_id, product in products.items():
+            old = catalog.get(product_id)
+            if product is None and old is None:
+                continue
+            catalog = catalog.delete(product_id) if product is None else catalog.upsert(product)
+            changes.append((old, product))
+        if aggregates is not None:
+            catalog._aggregates = aggregates.with_changes(changes)
+        return catalog
+
+    def _with_change(self, position: int, old: Optional[Product], new: Optional[Product]) -> "Catalog":
+        catalog = copy.copy(self)
+        catalog.version = self.version + 1
+        bit = 1 << position
+        appended = position == self.size
+
+        if new is None:
+            catalog.live = self.live & ~bit
+        else:
+            catalog.products = self.products.set(position, new)
+            catalog.size = len(catalog.products)
+            catalog.live = self.live | bit
+            catalog.max_id = max(self.max_id, new.id)
+            if appended:
+                if new.id in self.positions_by_id:
+                    # the id belongs to a sibling version; stop sharing the map
+                    catalog.positions_by_id = dict(self.positions_by_id)
+                catalog.positions_by_id[new.id] = position
+
+        catalog.value_index = dict(self.value_index)
+        catalog.value_counts = dict(self.value_counts)
+        for field in self.VALUE_FIELDS:
+            old_key = None if old is None else (getattr(old, field) or '').lower()
+            new_key = None if new is None else (getattr(new, field) or '').lower()
+            if old_key == new_key:
+                continue
+            index = catalog.value_index[field] = dict(self.value_index[field])
+            counts = catalog.value_counts[field] = dict(self.value_counts[field])
+            if old_key is not None:
+                index[old_key] &= ~bit
+                counts[old_key] -= 1
+            if new_key is not None:
+                index[new_key] = index.get(new_key, bitmap.EMPTY) | bit
+                counts[new_key] = counts.get(new_key, 0) + 1
+
+        catalog.range_index = dict(self.range_index)
+        for field in self.RANGE_FIELDS:
+            old_value = None if old is None else float(getattr(old, field))
+            new_value = None if new is None else float(getattr(new, field))
+            if old_value != new_value:
+                catalog.range_index[field] = self.range_index[field].with_change(position, old_value, new_value)
+
+        # deletes leave columns and sort orders alone (the position is no
+        # longer live); other writes patch whatever has been materialized
+        # (readers may still be materializing into this version, so work on
+        # snapshots of its caches)
+        catalog._columns = dict(self._columns)
+        catalog._sort_orders = dict(self._sort_orders)
+        if new is not None:
+            for name, column in list(catalog._columns.items()):
+                if isinstance(column, NumericColumn):
+                    catalog._columns[name] = column.with_value(position, numeric_value(new, name))
+                else:
+                    catalog._columns[name] = column.with_value(position, text_value(new, name))
+            for (name, descending), order in list(catalog._sort_orders.items()):
+                if name in catalog._columns:
+                    catalog._sort_orders[(name, descending)] = catalog._moved(order, name, descending, position, appended)
+                else:
+                    del catalog._sort_orders[(name, descending)]
+        if self._aggregates is not None:
+            catalog._aggregates = self._aggregates.with_change(old, new)
+        catalog._derived = {}
+        return catalog
+
+    def _moved(self, order: np.ndarray, name: str, descending: bool, position: int, appended: bool) -> np.ndarray:
+        # re-insert `position` into a stable sort order after its value changed
+        column = self._columns[name]
+        assert isinstance(column, NumericColumn)
+        if not appended:
+            order = order[order != position]
+        keys = -column.values[order] if descending else column.values[order]
+        value = -column.values[position] if descending else column.values[position]
+        low = np.searchsorted(keys, value, side="left")
+        high = np.searchsorted(keys, value, side="right")
+        at = low + np.searchsorted(order[low:high], position)
+        return np.insert(order, at, position)
+
+    def column(self, name: str) -> Column:
+        """
+        Columnar view of an attribute, for vectorized evaluation.
+
+        Args:
+            name: One of ``NUMERIC_COLUMNS`` or ``TEXT_COLUMNS``
+
+        Returns:
+            Column: ``NumericColumn`` or ``TextColumn`` aligned with positions
+        """
+        column = self._columns.get(name)
+        if column is None:
+            if name in self.NUMERIC_COLUMNS:
+                column = NumericColumn(np.fromiter(
+                    (numeric_value(p, name) for p in self.products), dtype=np.float64, count=self.size
+                ))
+            elif name in self.TEXT_COLUMNS:
+                column = TextColumn([text_value(p, name) for p in self.products])
+            else:
+                raise KeyError(name)
+            self._columns[name] = column
+        return column
+
+    def aggregates(self) -> CatalogAggregates:
+        """
+        Count/min/max/mean/percentile aggregates of the live products.
+
+        Built on first use; once built, every later version derives its
+        aggregates from this one incrementally.
+        """
+        if self._aggregates is None:
+            self._aggregates = CatalogAggregates.of(self.live_products())
+        return self._aggregates
+
+    def derived(self, key: str, build: Callable[["Catalog"], T]) -> T:
+        """
+        Structure derived from this catalog (e.g. a secondary index), built on
+        first use and kept for the catalog's lifetime. Every new version starts
+        with an empty cache, so derived structures follow reloads and writes.
+        """
+        value = self._derived.get(key)
+        if value is None:
+            value = build(self)
+            self._derived[key] = value
+        return value
+
+    def sort_order(self, name: str, descending: bool = False) -> np.ndarray:
+        """
+        Positions ordered by a numeric column, computed once per catalog and
+        then maintained across writes.
+
+        Ties keep catalog order and missing values always sort last.
+        """
+        key = (name, descending)
+        order = self._sort_orders.get(key)
+        if order is None:
+            column = self.column(name)
+            if not isinstance(column, NumericColumn):
+                raise KeyError(name)
+            values = -column.values if descending else column.values
+            order = np.argsort(values, kind="stable")
+            self._sort_orders[key] = order
+        return order
+
+    @staticmethod
+    def mask_to_bitmap(mask: np.ndarray) -> int:
+        """Convert a boolean position mask into a bitmap."""
+        return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+    def bitmap_to_mask(self, selection: int) -> np.ndarray:
+        """Convert a bitmap into a boolean mask aligned with positions."""
+        data = np.frombuffer(selection.to_bytes((self.size + 7) // 8, "little"), dtype=np.uint8)
+        return np.unpackbits(data, count=self.size, bitorder="little").view(bool)
+
+    def values_bitmap(self, field: str, values) -> int:
+        """Union of the bitmaps for the given (lowercased) values."""
+        index = self.value_index[field]
+        result = bitmap.EMPTY
+        for value in values:
+            result |= index.get(value, bitmap.EMPTY)
+        return result
+
+    def values_count(self, field: str, values) -> int:
+        """Number of products holding any of the given (lowercased) values."""
+        counts = self.value_counts[field]
+        return sum(counts.get(value, 0) for value in values)
+
+    def page(self, selection: int, skip: int, size: int) -> List[Product]:
+        """Materialize one page of products from a selection bitmap."""
+        return [self.products[p] for p in bitmap.select(selection, skip, size)]
+
+    def sorted_page(self, selection: int, sort: str, skip: int, size: int) -> List[Product]:
+        """
+        Materialize one page of a selection ordered by a numeric column.
+
+        Args:
+            selection: Bitmap of the matching positions
+            sort: Column name, prefixed with ``-`` for descending order
+            skip: Number of matching products to skip
+            size: Page size
+        """
+        descending = sort.startswith("-")
+        order = self.sort_order(sort.lstrip("-"), descending)
+        selected = order[self.bitmap_to_mask(selection)[order]]
+        return [self.products[p] for p in selected[skip: skip + size]]
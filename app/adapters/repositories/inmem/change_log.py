@@ -0,0 +1,95 @@
+"""
+Bounded log of catalog writes, keyed by catalog generation.
+
+Every write produces the next catalog generation and records which product
+it touched. The log keeps the last ``capacity`` generations in a ring, so a
+client that is at most ``capacity`` writes behind can be sent only the
+products that changed instead of the whole catalog.
+"""
+from typing import Dict, List, Optional
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+
+class ChangeLog:
+    """
+    Ring buffer of ``(product id, operation)`` per generation.
+
+    Generation ``g`` lives in slot ``g % capacity``. There is a single writer
+    (the repository's write lock); readers take no lock and instead re-check
+    after reading that none of the slots they read was overwritten.
+    """
+
+    def __init__(self, capacity: int, start: int = 0):
+        """
+        Args:
+            capacity: Number of generations kept
+            start: Generation the log begins at; older generations always
+                require a resync
+        """
+        self.capacity = max(1, capacity)
+        self.start = start
+        self.newest = start
+        self._ids: List[int] = [0] * self.capacity
+        self._ops: List[str] = [UPDATED] * self.capacity
+
+    @property
+    def oldest(self) -> int:
+        """Oldest generation a delta can still be computed from."""
+        return max(self.start, self.newest - self.capacity)
+
+    def append(self, generation: int, product_id: int, op: str):
+        """Record the write that produced ``generation``."""
+        if generation != self.newest + 1:
+            raise ValueError(f"expected generation {self.newest + 1}, got {generation}")
+        slot = generation % self.capacity
+        self._ids[slot] = product_id
+        self._ops[slot] = op
+        self.newest = generation
+
+    def truncate(self, generation: int):
+        """Forget the writes after ``generation`` (they were never published)."""
+        self.newest = max(self.start, min(self.newest, generation))
+
+    def changes(self, since: int, upto: int) -> Optional[Dict[int, str]]:
+        """
+        Net change per product between two generations.
+
+        Several writes to one product collapse into one operation: created
+        then deleted cancels out, created then updated stays created and
+        anything ending in a delete is a delete.
+
+        Args:
+            since: Generation the client has
+            upto: Generation to bring it to (at most ``newest``)
+
+        Returns:
+            Optional[Dict[int, str]]: Product id -> operation, in first-change
+            order, or None when ``since`` is no longer (or not yet) covered
+        """
+        if since < self.oldest or since > upto:
+            return None
+        first: Dict[int, str] = {}
+        last: Dict[int, str] = {}
+        for generation in range(since + 1, upto + 1):
+            slot = generation % self.capacity
+            product_id, op = self._ids[slot], self._ops[slot]
+            first.setdefault(product_id, op)
+            last[product_id] = op
+        if since < self.oldest:
+            # the writer lapped us while reading
+            return None
+
+        result: Dict[int, str] = {}
+        for product_id, op in first.items():
+            final = last[product_id]
+            if op == CREATED:
+                if final != DELETED:
+                    result[product_id] = CREATED
+            elif final == DELETED:
+                result[product_id] = DELETED
+            else:
+                result[product_id] = UPDATED
+        return result
@@ -0,0 +1,269 @@
+"""
+Small filter expression language evaluated as vectorized column masks.
+
+Grammar::
+
+    expr       := and_expr ("or" and_expr)*
+    and_expr   := not_expr ("and" not_expr)*
+    not_expr   := "not" not_expr | "(" expr ")" | comparison
+    comparison := field ("==" | "!=" | "<" | "<=" | ">" | ">=") literal
+                | field ["not"] "in" "(" literal ("," literal)* ")"
+    field      := name ("." name)*          e.g. price, specifications.display_type
+    literal    := number | "string" | 'string'
+
+Example: ``price < 1500 and brand in ("Apple","Dell") and specifications.display_type == "OLED"``
+
+Text comparisons are case-insensitive, like the other catalog filters.
+Products with a missing value never satisfy a comparison on that field,
+negated or not: ``not x == v`` matches the same products as ``x != v``.
+"and", "or" and "not" follow three-valued logic, a comparison on a missing
+value being unknown: ``not (screen_inches > 15 and price > 999)``
+still matches a product without a screen size that costs 999 or less.
+"""
+import operator
+import re
+from functools import lru_cache
+from typing import Callable, List, Tuple, Union
+import numpy as np
+from app.errors import CustomError
+from .catalog import Catalog, NumericColumn, TextColumn
+
+
+Mask = np.ndarray
+CompiledFilter = Callable[[Catalog], Mask]
+# (matches, known): a comparison on a missing value is neither true nor false
+_Node = Callable[[Catalog], Tuple[Mask, Mask]]
+
+
+class FilterExpressionError(CustomError):
+    """Raised when a filter expression cannot be parsed or type-checked."""
+
+    def __init__(self, message: str):
+        super().__init__("ERR0002", f"Invalid filter expression: {message}", 400)
+
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|<=|>=|<|>|\(|\)|,)
+      | (?P<name>[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {"and", "or", "not", "in"}
+
+_COMPARATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+Token = Tuple[str, Union[str, float]]
+
+
+def _tokenize(expression: str) -> List[Token]:
+    tokens: List[Token] = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match or match.end() == position:
+            raise FilterExpressionError(f"unexpected character at offset {position}")
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "number":
+            tokens.append(("literal", float(text)))
+        elif kind == "string":
+            tokens.append(("literal", re.sub(r"\\(.)", r"\1", text[1:-1])))
+        elif kind == "name" and text.lower() in _KEYWORDS:
+            tokens.append(("keyword", text.lower()))
+        else:
+            tokens.append((kind, text))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing closures over catalog columns."""
+
+    # nested parentheses/"not" allowed; deeper input would exhaust the stack
+    MAX_DEPTH = 32
+
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.index = 0
+        self.depth = 0
+
+    def _peek(self) -> Token:
+        return self.tokens[self.index] if self.index < len(self.tokens) else ("end", "")
+
+    def _next(self) -> Token:
+        token = self._peek()
+        self.index += 1
+        return token
+
+    def _expect(self, kind: str, value=None):
+        token = self._next()
+        if token[0] != kind or (value is not None and token[1] != value):
+            expected = value if value is not None else kind
+            raise FilterExpressionError(f"expected {expected!r} but found {token[1] or 'end of input'!r}")
+        return token[1]
+
+    def parse(self) -> CompiledFilter:
+        if not self.tokens:
+            raise FilterExpressionError("empty expression")
+        node = self._or()
+        if self.index != len(self.tokens):
+            raise FilterExpressionError(f"unexpected {self._peek()[1]!r}")
+        return lambda catalog: node(catalog)[0]
+
+    def _or(self) -> _Node:
+        nodes = [self._and()]
+        while self._peek() == ("keyword", "or"):
+            self._next()
+            nodes.append(self._and())
+        if len(nodes) == 1:
+            return nodes[0]
+        return lambda catalog: _or_node([node(catalog) for node in nodes])
+
+    def _and(self) -> _Node:
+        nodes = [self._not()]
+        while self._peek() == ("keyword", "and"):
+            self._next()
+            nodes.append(self._not())
+        if len(nodes) == 1:
+            return nodes[0]
+        return lambda catalog: _and_node([node(catalog) for node in nodes])
+
+    def _not(self) -> _Node:
+        token = self._peek()
+        if token not in (("keyword", "not"), ("op", "(")):
+            return self._comparison()
+        self._next()
+        self.depth += 1
+        if self.depth > self.MAX_DEPTH:
+            raise FilterExpressionError(f"nested deeper than {self.MAX_DEPTH} levels")
+        try:
+            if token == ("keyword", "not"):
+                node = self._not()
+                return lambda catalog: _not_node(*node(catalog))
+            node = self._or()
+            self._expect("op", ")")
+            return node
+        finally:
+            self.depth -= 1
+
+    def _literals(self) -> list:
+        self._expect("op", "(")
+        values = [self._expect("literal")]
+        while self._peek() == ("op", ","):
+            self._next()
+            values.append(self._expect("literal"))
+        self._expect("op", ")")
+        return values
+
+    def _comparison(self) -> _Node:
+        field = self._expect("name")
+        if field in Catalog.NUMERIC_COLUMNS:
+            numeric = True
+        elif field in Catalog.TEXT_COLUMNS:
+            numeric = False
+        else:
+            raise FilterExpressionError(f"unknown field {field!r}")
+
+        token = self._next()
+        negate = False
+        if token == ("keyword", "not"):
+            negate = True
+            token = self._next()
+            if token != ("keyword", "in"):
+                raise FilterExpressionError("expected 'in' after 'not'")
+        if token == ("keyword", "in"):
+            values = self._literals()
+            self._check_types(field, numeric, values)
+            return _in_node(field, numeric, values, negate)
+        if token[0] == "op" and token[1] in _COMPARATORS:
+            value = self._expect("literal")
+            self._check_types(field, numeric, [value])
+            if not numeric and token[1] not in ("==", "!="):
+                raise FilterExpressionError(f"operator {token[1]!r} is not supported for text field {field!r}")
+            return _compare_node(field, numeric, token[1], value)
+        raise FilterExpressionError(f"expected a comparison after {field!r}")
+
+    @staticmethod
+    def _check_types(field: str, numeric: bool, values: list):
+        for value in values:
+            if numeric != isinstance(value, float):
+                kind = "number" if numeric else "string"
+                raise FilterExpressionError(f"field {field!r} must be compared with a {kind}")
+
+
+def _not_node(mask: Mask, known: Mask) -> Tuple[Mask, Mask]:
+    # unknown stays unknown: a missing value does not come back in
+    return ~mask & known, known
+
+
+def _and_node(results: List[Tuple[Mask, Mask]]) -> Tuple[Mask, Mask]:
+    mask = np.logical_and.reduce([mask for mask, _ in results])
+    false = np.logical_or.reduce([known & ~mask for mask, known in results])
+    return mask, mask | false
+
+
+def _or_node(results: List[Tuple[Mask, Mask]]) -> Tuple[Mask, Mask]:
+    mask = np.logical_or.reduce([mask for mask, _ in results])
+    return mask, mask | np.logical_and.reduce([known for _, known in results])
+
+
+def _compare_node(field: str, numeric: bool, op: str, value) -> _Node:
+    compare = _COMPARATORS[op]
+
+    def node(catalog: Catalog) -> Tuple[Mask, Mask]:
+        column = catalog.column(field)
+        if numeric:
+            assert isinstance(column, NumericColumn)
+            present = ~np.isnan(column.values)
+            mask = compare(column.values, value)
+        else:
+            assert isinstance(column, TextColumn)
+            present = column.codes != TextColumn.MISSING
+            mask = compare(column.codes, column.code(value))
+        return mask & present, present
+    return node
+
+
+def _in_node(field: str, numeric: bool, values: list, negate: bool) -> _Node:
+    def node(catalog: Catalog) -> Tuple[Mask, Mask]:
+        column = catalog.column(field)
+        if numeric:
+            assert isinstance(column, NumericColumn)
+            present = ~np.isnan(column.values)
+            mask = np.isin(column.values, values)
+        else:
+            assert isinstance(column, TextColumn)
+            present = column.codes != TextColumn.MISSING
+            mask = np.isin(column.codes, [column.code(v) for v in values])
+        return (~mask if negate else mask) & present, present
+    return node
+
+
+@lru_cache(maxsize=256)
+def compile_filter(expression: str) -> CompiledFilter:
+    """
+    Parse and compile a filter expression.
+
+    Compiled forms are cached by expression string, so repeated queries only
+    pay for evaluation.
+
+    Args:
+        expression: Filter expression (see module docstring)
+
+    Returns:
+        CompiledFilter: Callable mapping a ``Catalog`` to a boolean mask
+
+    Raises:
+        FilterExpressionError: If the expression is invalid
+    """
+    return _Parser(_tokenize(expression)).parse()
@@ -0,0 +1,64 @@
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+from .catalog import Catalog
+
+T = TypeVar("T")
+
+
+class IndexSlot(Generic[T]):
+    """
+    Holds the latest secondary index built from a catalog version.
+
+    Unlike ``Catalog.derived`` (dropped by every write), the slot keeps its
+    index across writes: a catalog of up to ``sync_limit`` products gets a
+    fresh index on the next ``get``; a larger one keeps answering from the
+    previous index while a background thread rebuilds it, so a write never
+    makes a reader wait for a full rebuild. Indexes must expose ``version``.
+    """
+
+    def __init__(self, build: Callable[[Catalog], T], sync_limit: int):
+        """
+        Args:
+            build: Builds the index for a catalog version
+            sync_limit: Largest catalog rebuilt in the caller's thread
+        """
+        self.build = build
+        self.sync_limit = sync_limit
+        self.current: Optional[T] = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+
+    def get(self, catalog: Catalog) -> T:
+        """
+        Index for ``catalog``, or the previous one while it is rebuilt.
+
+        Args:
+            catalog: Catalog version the caller is reading
+
+        Returns:
+            T: An index for this version or, for large catalogs, possibly
+            for an earlier one
+        """
+        index = self.current
+        if index is not None and index.version == catalog.version:
+            return index
+        if index is None or catalog.count <= self.sync_limit:
+            return self.rebuild(catalog)
+        with self._lock:
+            start = not self._rebuilding
+            self._rebuilding = True
+        if start:
+            threading.Thread(target=self.rebuild, args=(catalog,), name="index-rebuild", daemon=True).start()
+        return index
+
+    def rebuild(self, catalog: Catalog) -> T:
+        """Build the index for ``catalog`` and keep it unless a newer one exists."""
+        try:
+            index = self.build(catalog)
+        finally:
+            with self._lock:
+                self._rebuilding = False
+        with self._lock:
+            if self.current is None or index.version > self.current.version:
+                self.current = index
+        return index
@@ -0,0 +1,201 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+import numpy as np
+from app import deadline
+from . import bitmap
+from .catalog import Catalog
+from .filter_expression import CompiledFilter, compile_filter
+
+
+class Predicate(ABC):
+    """A single filter condition that can be answered from catalog indexes."""
+
+    field: str
+
+    @abstractmethod
+    def estimate(self, catalog: Catalog) -> int:
+        """Estimated number of matching products (used for ordering)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def bitmap(self, catalog: Catalog) -> int:
+        """Bitmap of every matching product."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def matches(self, catalog: Catalog, position: int) -> bool:
+        """Check a single product, used when few candidates remain."""
+        raise NotImplementedError
+
+    def bitmap_cost(self, catalog: Catalog) -> int:
+        """Approximate number of positions touched to build ``bitmap``."""
+        return 0
+
+
+class ValuePredicate(Predicate):
+    """``field`` equals any of ``values`` (case-insensitive)."""
+
+    def __init__(self, field: str, values: Iterable[str]):
+        self.field = field
+        self.values = {v.lower() for v in values if v}
+
+    def estimate(self, catalog: Catalog) -> int:
+        return catalog.values_count(self.field, self.values)
+
+    def bitmap(self, catalog: Catalog) -> int:
+        return catalog.values_bitmap(self.field, self.values)
+
+    def matches(self, catalog: Catalog, position: int) -> bool:
+        return (getattr(catalog.products[position], self.field) or '').lower() in self.values
+
+
+class RangePredicate(Predicate):
+    """``low <= field <= high``; either bound may be omitted."""
+
+    def __init__(self, field: str, low: Optional[float] = None, high: Optional[float] = None):
+        self.field = field
+        self.low = low
+        self.high = high
+
+    def estimate(self, catalog: Catalog) -> int:
+        return catalog.range_index[self.field].count(self.low, self.high)
+
+    def bitmap(self, catalog: Catalog) -> int:
+        return catalog.range_index[self.field].between(self.low, self.high)
+
+    def bitmap_cost(self, catalog: Catalog) -> int:
+        # two partial bins are materialized around the cumulative bitmaps
+        return 2 * catalog.range_index[self.field].step
+
+    def matches(self, catalog: Catalog, position: int) -> bool:
+        value = getattr(catalog.products[position], self.field)
+        if self.low is not None and value < self.low:
+            return False
+        return self.high is None or value <= self.high
+
+
+class ExpressionPredicate(Predicate):
+    """A compiled ``filter=`` expression, evaluated as one vectorized mask."""
+
+    field = "filter"
+
+    def __init__(self, compiled: CompiledFilter):
+        self.compiled = compiled
+
+    def estimate(self, catalog: Catalog) -> int:
+        # unknown until evaluated; order it after the indexed predicates
+        return catalog.size
+
+    def bitmap(self, catalog: Catalog) -> int:
+        return catalog.mask_to_bitmap(self.compiled(catalog))
+
+    def matches(self, catalog: Catalog, position: int) -> bool:
+        return bitmap.contains(self.bitmap(catalog), position)
+
+
+class SearchPredicate(Predicate):
+    """Products whose name or brand match a ``q=`` text search (see ``SearchIndex``)."""
+
+    field = "q"
+
+    def __init__(self, positions: np.ndarray):
+        """
+        Args:
+            positions: Sorted matching positions from ``SearchIndex.search``
+        """
+        self.positions = positions
+
+    def estimate(self, catalog: Catalog) -> int:
+        return len(self.positions)
+
+    def bitmap(self, catalog: Catalog) -> int:
+        mask = np.zeros(catalog.size, dtype=bool)
+        mask[self.positions[self.positions < catalog.size]] = True
+        return catalog.mask_to_bitmap(mask)
+
+    def bitmap_cost(self, catalog: Catalog) -> int:
+        # a full-size mask is packed into the bitmap
+        return catalog.size // 8
+
+    def matches(self, catalog: Catalog, position: int) -> bool:
+        at = np.searchsorted(self.positions, position)
+        return at < len(self.positions) and self.positions[at] == position
+
+
+def _as_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+def predicates_from_filters(**kwargs) -> List[Predicate]:
+    """
+    Translate repository filter kwargs into predicates.
+
+    Supported kwargs: ``category``, ``brand``, ``availability`` (a string or a
+    list of strings) and the numeric bounds ``min_price``, ``max_price``,
+    ``min_rating`` and ``max_rating``, plus ``filter``, a filter expression
+    string (see ``filter_expression``). Empty or missing filters are ignored.
+
+    Raises:
+        FilterExpressionError: If ``filter`` is not a valid expression
+    """
+    predicates: List[Predicate] = []
+    for field in Catalog.VALUE_FIELDS:
+        values = [v for v in _as_list(kwargs.get(field)) if v]
+        if values:
+            predicates.append(ValuePredicate(field, values))
+    for field in Catalog.RANGE_FIELDS:
+        low = kwargs.get(f"min_{field}")
+        high = kwargs.get(f"max_{field}")
+        if low is not None or high is not None:
+            predicates.append(RangePredicate(field, low, high))
+    expression = kwargs.get("filter")
+    if expression:
+        predicates.append(ExpressionPredicate(compile_filter(expression)))
+    return predicates
+
+
+class QueryPlanner:
+    """
+    Selectivity-aware evaluation of predicate conjunctions.
+
+    Predicates are ordered by their estimated cardinality so the most
+    selective one seeds the result. Following predicates are intersected as
+    bitmaps, except when only a handful of candidates remain: then checking
+    those candidates directly is cheaper than materializing the predicate's
+    bitmap.
+
+    The request deadline is checked before each predicate, so a query whose
+    caller has given up stops between index operations.
+    """
+
+    # probing one candidate costs about this many bitmap position writes
+    PROBE_RATIO = 8
+
+    def execute(self, catalog: Catalog, predicates: List[Predicate]) -> int:
+        """
+        Evaluate the conjunction of ``predicates``.
+
+        Returns:
+            int: Bitmap of the matching product positions
+        """
+        result = catalog.live
+        if not predicates:
+            return result
+
+        ordered = sorted(((p.estimate(catalog), p) for p in predicates), key=lambda item: item[0])
+        result &= ordered[0][1].bitmap(catalog)
+        for _, predicate in ordered[1:]:
+            if not result:
+                break
+            deadline.check("planner")
+            if bitmap.popcount(result) * self.PROBE_RATIO < predicate.bitmap_cost(catalog):
+                result = bitmap.from_positions(
+                    p for p in bitmap.iter_positions(result) if predicate.matches(catalog, p)
+                )
+            else:
+                result &= predicate.bitmap(catalog)
+        return result
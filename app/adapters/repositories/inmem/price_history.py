@@ -0,0 +1,181 @@
+"""
+Per-product price history in fixed-size ring buffers, downsampled into
+hourly and daily tiers.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+# tier name -> (bucket width in seconds, 0 for every change; retained points)
+TIERS: Dict[str, Tuple[int, int]] = {
+    "raw": (0, 128),
+    "hour": (3600, 24 * 14),
+    "day": (86400, 2 * 365),
+}
+RESOLUTIONS = tuple(TIERS)
+
+
+class PriceRing:
+    """
+    Up to ``capacity`` (timestamp, price) pairs in two typed arrays.
+
+    The arrays grow on demand until they reach ``capacity``; after that each
+    append overwrites the oldest pair. Timestamps never decrease, so the
+    physical layout is two sorted runs, ``[start, size)`` (older) followed
+    by ``[0, start)`` (newer), and a time range is found with two bisects
+    on the arrays themselves, without copying or rotating them.
+    """
+
+    __slots__ = ("capacity", "times", "prices", "start", "wrapped")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = array("d")
+        self.prices = array("d")
+        self.start = 0
+        # whether older pairs have been overwritten
+        self.wrapped = False
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def last(self) -> Optional[Tuple[float, float]]:
+        if not self.times:
+            return None
+        at = (self.start or len(self.times)) - 1
+        return self.times[at], self.prices[at]
+
+    def oldest(self) -> Optional[float]:
+        return self.times[self.start] if self.times else None
+
+    def append(self, timestamp: float, price: float):
+        if len(self.times) < self.capacity:
+            self.times.append(timestamp)
+            self.prices.append(price)
+            return
+        self.times[self.start] = timestamp
+        self.prices[self.start] = price
+        self.start = (self.start + 1) % self.capacity
+        self.wrapped = True
+
+    def replace_last(self, price: float):
+        self.prices[(self.start or len(self.times)) - 1] = price
+
+    def _runs(self) -> List[Tuple[int, int]]:
+        size = len(self.times)
+        return [(self.start, size), (0, self.start)] if self.start else [(0, size)]
+
+    def between(self, since: Optional[float], until: Optional[float]) -> List[Tuple[float, float]]:
+        """
+        Pairs with ``since <= timestamp <= until``, oldest first.
+
+        Args:
+            since: Lower bound in epoch seconds, or None for the oldest pair
+            until: Upper bound in epoch seconds, or None for the newest pair
+        """
+        pairs: List[Tuple[float, float]] = []
+        for lo, hi in self._runs():
+            first = lo if since is None else bisect_left(self.times, since, lo, hi)
+            last = hi if until is None else bisect_right(self.times, until, lo, hi)
+            pairs.extend(zip(self.times[first:last], self.prices[first:last]))
+        return pairs
+
+
+class PriceSeries:
+    """The raw, hourly and daily rings of one product."""
+
+    __slots__ = ("rings",)
+
+    def __init__(self):
+        self.rings: Dict[str, PriceRing] = {name: PriceRing(capacity) for name, (_, capacity) in TIERS.items()}
+
+    def record(self, timestamp: float, price: float):
+        last = self.rings["raw"].last()
+        if last is not None:
+            timestamp = max(timestamp, last[0])  # keep every ring sorted if the clock steps back
+        for name, (width, _) in TIERS.items():
+            ring = self.rings[name]
+            if not width:
+                ring.append(timestamp, price)
+                continue
+            bucket = timestamp - timestamp % width
+            last = ring.last()
+            if last is not None and last[0] == bucket:
+                ring.replace_last(price)  # the bucket keeps its closing price
+            else:
+                ring.append(bucket, price)
+
+    def resolution_for(self, since: Optional[float]) -> str:
+        """Finest tier still holding every point from ``since`` on."""
+        for name in RESOLUTIONS:
+            ring = self.rings[name]
+            if not ring.wrapped or since is not None and ring.oldest() <= since:
+                return name
+        return RESOLUTIONS[-1]
+
+
+class PriceHistoryStore:
+    """
+    Price history of every product whose price was set since startup.
+
+    A product gets its rings on its first recorded price, so untouched
+    products cost nothing; from then on its memory is capped by the tier
+    capacities (``TIERS``, about 19 KB per product) however often the price
+    changes. Recording is O(1) per tier and a range query is two bisects
+    per ring plus the copy of the points returned.
+
+    The history is kept in memory only and starts empty on every restart.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            clock: Source of the timestamps of recorded prices (epoch seconds)
+        """
+        self._clock = clock
+        self._series: Dict[int, PriceSeries] = {}
+        self._lock = threading.Lock()
+
+    def record(self, product_id: int, price: float, timestamp: Optional[float] = None):
+        """Record that ``product_id`` costs ``price`` from ``timestamp`` (default: now) on."""
+        with self._lock:
+            series = self._series.get(product_id)
+            if series is None:
+                series = self._series[product_id] = PriceSeries()
+            series.record(self._clock() if timestamp is None else timestamp, float(price))
+
+    def forget(self, product_id: int):
+        """Drop the history of a deleted product."""
+        with self._lock:
+            self._series.pop(product_id, None)
+
+    def between(
+        self,
+        product_id: int,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        resolution: Optional[str] = None,
+    ) -> Tuple[str, List[Tuple[float, float]]]:
+        """
+        Recorded prices of a product within a time range.
+
+        Args:
+            product_id: Product identifier
+            since: Lower bound in epoch seconds (inclusive), or None
+            until: Upper bound in epoch seconds (inclusive), or None
+            resolution: raw, hour or day; by default the finest tier that
+                still covers ``since``
+
+        Returns:
+            Tuple containing:
+            - str: Resolution of the points
+            - List[Tuple[float, float]]: (timestamp, price) pairs, oldest first
+        """
+        with self._lock:
+            series = self._series.get(product_id)
+            if series is None:
+                return resolution or RESOLUTIONS[0], []
+            resolution = resolution or series.resolution_for(since)
+            return resolution, series.rings[resolution].between(since, until)
@@ -1,9 +1,74 @@
-import time
 import json
+from collections import deque
+from datetime import datetime, timezone
 import os
-from typing import List, Tuple
-from app.core.domain.product import Product, ProductSpecification
+import threading
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from app.core.domain.product import (
+    CatalogSummary, PriceHistory, PricePoint, Product, ProductChange, ProductSpecification, Suggestion,
+)
+from app import deadline
 from app.core.ports.repositories import ProductRepository
+from app.errors import CustomError
+from . import bitmap
+from .change_log import CREATED, DELETED, UPDATED, ChangeLog
+from .catalog import Catalog
+from .planner import Predicate, QueryPlanner, SearchPredicate, predicates_from_filters
+from .ranking import Normalizer, top_k
+from .similarity import SimilarityIndex
+from .index_slot import IndexSlot
+from .price_history import PriceHistoryStore
+from .search import SearchIndex
+from .spec_normalizer import normalize_product
+from .suggest import SuggestIndex
+from .variants import CatalogVariant, Overrides
+from .wal import WriteAheadLog
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "data.json")
+CHANGE_LOG_CAPACITY = int(os.getenv("CHANGE_LOG_CAPACITY", "10000"))
+# after a write, catalogs larger than this rebuild their text indexes in the background
+TEXT_INDEX_SYNC_REBUILD_LIMIT = 100_000
+
+
+def read_products(json_file_path: str = DATA_FILE) -> List[Product]:
+    """
+    Read products from a JSON data file.
+    
+    Args:
+        json_file_path: Path to a JSON document with a top-level "products" list
+        
+    Returns:
+        List[Product]: Products in file order
+        
+    Raises:
+        FileNotFoundError, json.JSONDecodeError: If the file is missing or invalid
+    """
+    products = []
+    with open(json_file_path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+        products_data = data.get("products", [])
+        
+        for product_data in products_data:
+            # Convert specifications dict to ProductSpecification object
+            specs_data = product_data.get("specifications", {})
+            specifications = ProductSpecification(**specs_data)
+            
+            # Create Product object
+            product = Product(
+                id=product_data["id"],
+                name=product_data["name"],
+                category=product_data["category"],
+                image_url=product_data.get("image_url"),
+                description=product_data["description"],
+                price=product_data["price"],
+                rating=product_data["rating"],
+                specifications=specifications,
+                availability=product_data["availability"],
+                brand=product_data["brand"]
+            )
+            products.append(product)
+    return products
+
 
 class InMemoryProductRepository(ProductRepository):
     """
@@ -12,18 +77,166 @@ class InMemoryProductRepository(ProductRepository):
     This repository loads product data from a JSON file at initialization
     and stores it in memory for fast access. Suitable for development,
     testing, and small-scale applications.
+
+    Products are held in an indexed ``Catalog`` (per-value bitmaps and range
+    indexes) and filters are answered by the ``QueryPlanner``.
+
+    Writes are serialized by a lock and publish a new catalog version with a
+    single reference assignment. Readers take no lock: each query reads
+    ``self._catalog`` once and works on that immutable snapshot. With a
+    ``WriteAheadLog`` writes are acknowledged, and published to readers,
+    only once they are on disk: writers build on the newest version
+    (``self._head``) while ``self._catalog`` advances as fsyncs complete.
+
+    Every price set by a write is also recorded in a ``PriceHistoryStore``.
+
+    Named variants of the catalog (see ``CatalogVariant``) are served next
+    to it: reads take an optional ``variant`` and every write is replayed
+    on each variant.
     """
 
-    def __init__(self):
+    _planner = QueryPlanner()
+    _wal: Optional[WriteAheadLog] = None
+    # replaced, never mutated, so readers can iterate it without the write lock
+    _variants: Dict[str, CatalogVariant] = {}
+
+    def __init__(
+        self,
+        products: Optional[List[Product]] = None,
+        storage: Optional[WriteAheadLog] = None,
+        variants: Optional[Dict[str, Overrides]] = None,
+    ):
         """
         Initialize the repository and load product data from JSON file.
         
         The repository automatically loads all products from the data.json
-        file located in the resources directory.
+        file located in the resources directory, unless an explicit product
+        list is given (e.g. one shard of a larger catalog).
+        
+        Args:
+            products: Optional products to serve instead of data.json
+            storage: Optional write-ahead log; the catalog is recovered from it
+                (seeded from ``products``/data.json the first time) and every
+                write is made durable before it is acknowledged
+            variants: Optional catalog variants to serve, name -> overrides
+                (see ``put_variant``)
         """
         super().__init__()
+        self._write_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._price_history = PriceHistoryStore()
         self._products = []
-        self._load_products_from_json()
+        if storage is not None:
+            self._wal = storage
+            recovered, generation = storage.recover(seed=lambda: read_products() if products is None else products)
+            self._load(recovered, generation)
+        elif products is None:
+            self._load_products_from_json()
+        else:
+            self._products = products
+        for name, overrides in (variants or {}).items():
+            self.put_variant(name, overrides)
+
+    @property
+    def _products(self) -> List[Product]:
+        return self._catalog.live_products()
+
+    @_products.setter
+    def _products(self, products: List[Product]):
+        # every assignment is an ingestion: normalize specs and rebuild indexes.
+        # A reload is a new generation that no change log entry leads to, so
+        # delta clients are told to resync.
+        previous = getattr(self, "_head", None)
+        self._load(products, previous.version + 1 if previous is not None else 0)
+
+    def _load(self, products: List[Product], generation: int):
+        self._changes = ChangeLog(CHANGE_LOG_CAPACITY, start=generation)
+        self._catalog = Catalog([normalize_product(p) for p in products], version=generation)
+        self._catalog.aggregates()  # maintained incrementally by every later version
+        self._head = self._catalog
+        # written but not yet durable: (WAL ticket, catalog, product id, effect), in
+        # ticket order; a reload supersedes them
+        self._unpublished: Deque[Tuple[int, Catalog, int, Optional[Callable[[], None]]]] = deque()
+        self._suggestions = IndexSlot(SuggestIndex, TEXT_INDEX_SYNC_REBUILD_LIMIT)
+        self._suggestions.rebuild(self._catalog)
+        # built on the first `q=` search
+        self._search = IndexSlot(SearchIndex, TEXT_INDEX_SYNC_REBUILD_LIMIT)
+        # variants follow a reload too
+        self._variants = {name: self._variant_of(name, variant.overrides) for name, variant in self._variants.items()}
+
+    def _publish(
+        self, catalog: Catalog, product_id: int, op: str, effect: Optional[Callable[[], None]] = None
+    ) -> Optional[int]:
+        # called with the write lock held; log first: readers bound the change
+        # log by the catalog generation they read. With a WAL the version is
+        # only buffered here and made visible by _commit once it is durable.
+        self._changes.append(catalog.version, product_id, op)
+        self._head = catalog
+        if self._wal is None:
+            self._apply(catalog, product_id, effect)
+            return None
+        ticket = self._wal.append(catalog.version, op, product_id, catalog.get(product_id))
+        self._unpublished.append((ticket, catalog, product_id, effect))
+        return ticket
+
+    def _apply(self, catalog: Catalog, product_id: int, effect: Optional[Callable[[], None]]):
+        # make one write visible: catalog, variants and its side effects (price history)
+        self._catalog = catalog
+        for variant in self._variants.values():
+            variant.follow(catalog, product_id)
+        if effect is not None:
+            effect()
+
+    def _commit(self, ticket: Optional[int]):
+        # called after releasing the write lock, so concurrent writers share fsyncs.
+        # Raises if the fsync failed, and then the write is never published.
+        if ticket is None:
+            return
+        try:
+            self._wal.sync(ticket)
+        except BaseException:
+            self._discard_unpublished()
+            raise
+        with self._publish_lock:
+            # records are durable in ticket order: everything up to ours is on disk
+            self._publish_durable(ticket)
+        if self._wal.needs_compaction():
+            threading.Thread(target=self.compact, name="catalog-compaction", daemon=True).start()
+
+    def _publish_durable(self, ticket: int):
+        # called with the publish lock held
+        while self._unpublished and self._unpublished[0][0] <= ticket:
+            _, catalog, product_id, effect = self._unpublished.popleft()
+            self._apply(catalog, product_id, effect)
+
+    def _discard_unpublished(self):
+        # the log failed and its error is sticky: no buffered write will ever be
+        # durable. Publish those that made it to disk, then roll the head and the
+        # change log back to the published catalog so later writes and
+        # compactions do not build on a write its client was told had failed.
+        with self._write_lock, self._publish_lock:
+            self._publish_durable(self._wal.durable)
+            self._unpublished.clear()
+            self._head = self._catalog
+            self._changes.truncate(self._catalog.version)
+
+    def compact(self):
+        """
+        Snapshot the current catalog and drop the write-ahead log it covers.
+        
+        Only the log rotation happens under the write lock; the snapshot is
+        written from the immutable catalog version while writes continue.
+        The rotation makes every write up to that version durable first, and
+        fails instead if the log cannot, so a snapshot never holds a write
+        that was not acknowledged.
+        """
+        if self._wal is None:
+            return
+        with self._write_lock:
+            catalog = self._head
+            if not self._wal.begin_compaction(catalog.version):
+                return
+        self._wal.finish_compaction(catalog.version, catalog.live_products())
 
     def _load_products_from_json(self):
         """
@@ -36,34 +249,9 @@ class InMemoryProductRepository(ProductRepository):
         Raises:
             Prints warnings for file access or parsing errors but doesn't crash
         """
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        json_file_path = os.path.join(current_dir, "resources", "data.json")
-        
+        json_file_path = DATA_FILE
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                products_data = data.get("products", [])
-                
-                for product_data in products_data:
-                    # Convert specifications dict to ProductSpecification object
-                    specs_data = product_data.get("specifications", {})
-                    specifications = ProductSpecification(**specs_data)
-                    
-                    # Create Product object
-                    product = Product(
-                        id=product_data["id"],
-                        name=product_data["name"],
-                        category=product_data["category"],
-                        image_url=product_data.get("image_url"),
-                        description=product_data["description"],
-                        price=product_data["price"],
-                        rating=product_data["rating"],
-                        specifications=specifications,
-                        availability=product_data["availability"],
-                        brand=product_data["brand"]
-                    )
-                    self._products.append(product)
-                    
+            self._products = read_products(json_file_path)
         except FileNotFoundError:
             print(f"Warning: Product data file not found at {json_file_path}")
         except json.JSONDecodeError as e:
@@ -79,39 +267,386 @@ class InMemoryProductRepository(ProductRepository):
             page: Page number (1-based indexing)
             size: Number of products per page
             **kwargs: Additional parameters including:
-                - delay: Optional delay in seconds for testing purposes
+                - category, brand, availability: Value filters (str or list)
+                - min_price, max_price, min_rating, max_rating: Range filters
+                - filter: Filter expression, e.g. 'price < 1500 and brand in ("Apple","Dell")'
+                - q: Text search over names and brands, tolerant to typos
+                - sort: Numeric column to order by (e.g. price, -rating, memory_gb);
+                  prefix with '-' for descending order
+                - variant: Catalog variant to read instead of the base catalog
                 
         Returns:
             Tuple containing:
             - List[Product]: Products for the requested page
-            - int: Total number of products in the repository
+            - int: Total number of products matching the filters
+            
+        Raises:
+            CustomError: ERR0006 (404) if the variant does not exist
+            DeadlineExceeded: If the request deadline passes before the page is cut
         """
-        delay = kwargs.get("delay", 0)
-        try:
-            base_delay = float(delay)
-        except Exception:
-            base_delay = 0.0
-        # Adiciona latência artificial global (ms) se configurada via /admin/fault
-        try:
-            injected_ms = float(os.environ.get("ARTIFICIAL_LATENCY_MS", "0"))
-        except Exception:
-            injected_ms = 0.0
-        total_sleep = base_delay + (injected_ms / 1000.0)
-        if total_sleep > 0:
-            time.sleep(total_sleep)
-
-        # Apply optional filters
-        products = self._products
-        category = kwargs.get("category")
-        if category:
-            # allow single string or list of categories
-            if isinstance(category, str):
-                category_list = [category]
+        # Apply optional filters via bitmap indexes; total comes from popcount
+        catalog, search = self._view(kwargs.get("variant"))
+        selection = self._planner.execute(catalog, self._predicates(catalog, search, kwargs))
+        deadline.check("repository")
+
+        skip = (page - 1) * size
+        sort = kwargs.get("sort")
+        if sort:
+            self._check_numeric_field(sort.lstrip("-"), "sort")
+            items = catalog.sorted_page(selection, sort, skip, size)
+        else:
+            items = catalog.page(selection, skip, size)
+        return items, bitmap.popcount(selection)
+
+    def _variant(self, name: Optional[str]) -> Optional[CatalogVariant]:
+        if not name:
+            return None
+        variant = self._variants.get(name)
+        if variant is None:
+            raise CustomError("ERR0006", f"Unknown catalog variant: {name}", 404)
+        return variant
+
+    def _view(self, name: Optional[str]) -> Tuple[Catalog, IndexSlot]:
+        # catalog and text search index a read works on
+        variant = self._variant(name)
+        if variant is None:
+            return self._catalog, self._search
+        return variant.catalog, variant.search
+
+    def _predicates(self, catalog: Catalog, search: IndexSlot, kwargs: Dict[str, Any]) -> List[Predicate]:
+        predicates = predicates_from_filters(**kwargs)
+        query = kwargs.get("q")
+        if query:
+            deadline.check("search")
+            positions = search.get(catalog).search(query)
+            if positions is not None:
+                predicates.append(SearchPredicate(positions))
+        return predicates
+
+    @staticmethod
+    def _check_numeric_field(name: str, usage: str):
+        if name not in Catalog.NUMERIC_COLUMNS:
+            raise CustomError("ERR0003", f"Unsupported {usage} field: {name}", 400)
+
+    def find_similar(self, product_id: int, k: int, variant: Optional[str] = None) -> Optional[List[Product]]:
+        """
+        Retrieve the nearest neighbours of a product within its category.
+        
+        Uses the catalog's ``SimilarityIndex`` (a NumPy feature matrix per
+        category, built once per loaded catalog).
+        
+        Args:
+            product_id: Identifier of the reference product
+            k: Maximum number of similar products to return
+            variant: Catalog variant to read instead of the base catalog
+            
+        Returns:
+            Optional[List[Product]]: Up to k products, closest first, or None
+            if the product does not exist
+        """
+        catalog = self._view(variant)[0]
+        position = catalog.position_of(product_id)
+        if position is None:
+            return None
+        index = catalog.derived("similarity", SimilarityIndex)
+        deadline.check("repository")
+        return [catalog.products[p] for p in index.nearest(position, k)]
+
+    def find_top(self, k: int, weights: Dict[str, float], **kwargs) -> List[Product]:
+        """
+        Retrieve the top-k products for a weighted score over normalized columns.
+        
+        Candidates come from the same filters as find_paginated; the k best are
+        picked with a partial selection instead of sorting every candidate.
+        
+        Args:
+            k: Number of products to return
+            weights: Numeric column name -> weight (e.g. {"rating": 0.7, "price": -0.3})
+            **kwargs: Filters, as accepted by find_paginated, plus:
+                - normalization: Optional fixed scaling bounds per column
+                  (used when this repository is one shard of a larger catalog)
+            
+        Returns:
+            List[Product]: Up to k products, best first
+        """
+        for name in weights:
+            self._check_numeric_field(name, "weight")
+        catalog, search = self._view(kwargs.get("variant"))
+        selection = self._planner.execute(catalog, self._predicates(catalog, search, kwargs))
+        deadline.check("repository")
+        bounds = kwargs.get("normalization")
+        normalizer = Normalizer(catalog, bounds) if bounds is not None else None
+        positions = top_k(catalog, catalog.bitmap_to_mask(selection), weights, k, normalizer)
+        return [catalog.products[p] for p in positions]
+
+    def find_by_id(self, product_id: int, variant: Optional[str] = None) -> Optional[Product]:
+        """
+        Retrieve a single product.
+        
+        Args:
+            product_id: Product identifier
+            variant: Catalog variant to read instead of the base catalog
+            
+        Returns:
+            Optional[Product]: The product, or None if it does not exist
+        """
+        return self._view(variant)[0].get(product_id)
+
+    def find_suggestions(self, prefix: str, limit: int, variant: Optional[str] = None) -> List[Suggestion]:
+        """
+        Complete a typed prefix to product names and brands.
+        
+        Answered from a ``SuggestIndex`` built at load and rebuilt after
+        writes (in the background for large catalogs, see ``IndexSlot``).
+        
+        Args:
+            prefix: Typed text (case-insensitive)
+            limit: Number of completions
+            variant: Catalog variant to read instead of the base catalog
+            
+        Returns:
+            List[Suggestion]: Completions, best rated first
+        """
+        selected = self._variant(variant)
+        if selected is None:
+            return self._suggestions.get(self._catalog).suggest(prefix, limit)
+        return selected.suggestions.get(selected.catalog).suggest(prefix, limit)
+
+    def get_stats(self, variant: Optional[str] = None) -> CatalogSummary:
+        """
+        Aggregates of the current catalog version.
+        
+        Computed at load and updated incrementally by every write, so a call
+        only assembles (per group, cached) summaries.
+        
+        Args:
+            variant: Catalog variant to read instead of the base catalog
+            
+        Returns:
+            CatalogSummary: Overall, per-category and per-brand numbers
+        """
+        catalog = self._view(variant)[0]
+        return catalog.aggregates().summary(catalog.version)
+
+    @staticmethod
+    def _ingest(product_data: Dict[str, Any]) -> Product:
+        # numeric specifications are always derived from the text, never trusted
+        data = {key: value for key, value in product_data.items() if key != "numeric_specifications"}
+        return normalize_product(Product.model_validate(data))
+
+    @classmethod
+    def _patched(cls, current: Product, changes: Dict[str, Any]) -> Product:
+        data = current.model_dump()
+        for key, value in changes.items():
+            if key == "specifications" and value is not None:
+                data["specifications"] = dict(data["specifications"], **value)
             else:
-                category_list = list(category)
+                data[key] = value
+        return cls._ingest(dict(data, id=current.id))
 
-            category_set = {c.lower() for c in category_list if c}
-            products = [p for p in products if (p.category or '').lower() in category_set]
+    def create(self, product_data: Dict[str, Any]) -> Product:
+        """
+        Add a product to the catalog.
+        
+        Args:
+            product_data: Product fields; when ``id`` is missing the next free
+                id (one above the highest ever used) is assigned
+            
+        Returns:
+            Product: The stored product
+            
+        Raises:
+            CustomError: ERR0004 (409) if a product with the id already exists
+        """
+        with self._write_lock:
+            catalog = self._head
+            product_id = product_data.get("id")
+            if product_id is None:
+                product_id = catalog.max_id + 1
+            elif catalog.position_of(product_id) is not None:
+                raise CustomError("ERR0004", f"Product {product_id} already exists", 409)
+            product = self._ingest(dict(product_data, id=product_id))
+            ticket = self._publish(
+                catalog.upsert(product), product_id, CREATED,
+                lambda: self._price_history.record(product_id, product.price),
+            )
+        self._commit(ticket)
+        return product
 
-        skip = (page - 1) * size
-        return products[skip: skip + size], len(products)
\ No newline at end of file
+    def update(self, product_id: int, product_data: Dict[str, Any]) -> Optional[Product]:
+        """
+        Replace an existing product.
+        
+        Args:
+            product_id: Identifier of the product to replace
+            product_data: Complete product fields (``id`` is ignored)
+            
+        Returns:
+            Optional[Product]: The stored product, or None if it does not exist
+        """
+        with self._write_lock:
+            catalog = self._head
+            current = catalog.get(product_id)
+            if current is None:
+                return None
+            product = self._ingest(dict(product_data, id=product_id))
+            ticket = self._publish(
+                catalog.upsert(product), product_id, UPDATED, lambda: self._record_price(current, product)
+            )
+        self._commit(ticket)
+        return product
+
+    def patch(self, product_id: int, changes: Dict[str, Any]) -> Optional[Product]:
+        """
+        Change some fields of an existing product.
+        
+        Args:
+            product_id: Identifier of the product to change
+            changes: Fields to overwrite; ``specifications`` is merged key by key
+            
+        Returns:
+            Optional[Product]: The stored product, or None if it does not exist
+        """
+        with self._write_lock:
+            catalog = self._head
+            current = catalog.get(product_id)
+            if current is None:
+                return None
+            product = self._patched(current, changes)
+            ticket = self._publish(
+                catalog.upsert(product), product_id, UPDATED, lambda: self._record_price(current, product)
+            )
+        self._commit(ticket)
+        return product
+
+    def delete(self, product_id: int) -> bool:
+        """
+        Remove a product from the catalog.
+        
+        Args:
+            product_id: Identifier of the product to remove
+            
+        Returns:
+            bool: True if the product existed
+        """
+        with self._write_lock:
+            catalog = self._head
+            if catalog.position_of(product_id) is None:
+                return False
+            ticket = self._publish(
+                catalog.delete(product_id), product_id, DELETED, lambda: self._price_history.forget(product_id)
+            )
+        self._commit(ticket)
+        return True
+
+    def _variant_of(self, name: str, overrides: Overrides) -> CatalogVariant:
+        return CatalogVariant(name, overrides, self._catalog, self._patched, TEXT_INDEX_SYNC_REBUILD_LIMIT)
+
+    def put_variant(self, name: str, overrides: Overrides) -> int:
+        """
+        Create or replace a catalog variant.
+        
+        Variants live in memory only; they are not written to the WAL.
+        
+        Args:
+            name: Variant name
+            overrides: Product id -> fields to change (merged like ``patch``),
+                or None to hide the product in the variant
+            
+        Returns:
+            int: Number of live products in the variant
+        """
+        # the publish lock keeps writes being published from missing the new variant
+        with self._write_lock, self._publish_lock:
+            variant = self._variant_of(name, dict(overrides))
+            self._variants = dict(self._variants, **{name: variant})
+        return variant.catalog.count
+
+    def delete_variant(self, name: str) -> bool:
+        """
+        Stop serving a catalog variant.
+        
+        Returns:
+            bool: True if the variant existed
+        """
+        with self._write_lock, self._publish_lock:
+            if name not in self._variants:
+                return False
+            self._variants = {key: variant for key, variant in self._variants.items() if key != name}
+        return True
+
+    def list_variants(self) -> Dict[str, int]:
+        """
+        Catalog variants being served.
+        
+        Returns:
+            Dict[str, int]: Variant name -> number of overridden products
+        """
+        return {name: len(variant.overrides) for name, variant in sorted(self._variants.items())}
+
+    def _record_price(self, previous: Product, product: Product):
+        # called when the write is published, in write order
+        if product.price != previous.price:
+            self._price_history.record(product.id, product.price)
+
+    def find_price_history(
+        self,
+        product_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        resolution: Optional[str] = None,
+    ) -> Optional[PriceHistory]:
+        """
+        Prices a product had within a time range.
+        
+        Args:
+            product_id: Product identifier
+            since: Start of the range (inclusive), or None for the oldest point kept
+            until: End of the range (inclusive), or None for now
+            resolution: raw, hour or day; by default the finest one still
+                covering ``since``
+            
+        Returns:
+            Optional[PriceHistory]: The points, or None if the product does not exist
+        """
+        product = self._catalog.get(product_id)
+        if product is None:
+            return None
+        resolution, pairs = self._price_history.between(
+            product_id,
+            since.timestamp() if since is not None else None,
+            until.timestamp() if until is not None else None,
+            resolution,
+        )
+        return PriceHistory(
+            product_id=product_id,
+            resolution=resolution,
+            current_price=product.price,
+            points=[
+                PricePoint(timestamp=datetime.fromtimestamp(timestamp, timezone.utc), price=price)
+                for timestamp, price in pairs
+            ],
+        )
+
+    def find_changes(self, since: int) -> Tuple[int, Optional[List[ProductChange]]]:
+        """
+        Products created, updated or deleted after a catalog generation.
+        
+        Args:
+            since: Generation the caller is at
+            
+        Returns:
+            Tuple containing:
+            - int: Current generation
+            - Optional[List[ProductChange]]: Net change per product, or None
+              when ``since`` is older than the change log (or unknown) and the
+              caller has to resync from a full listing
+        """
+        catalog = self._catalog
+        changes = self._changes.changes(since, catalog.version)
+        if changes is None:
+            return catalog.version, None
+        return catalog.version, [
+            ProductChange(id=product_id, op=op, product=None if op == DELETED else catalog.get(product_id))
+            for product_id, op in changes.items()
+        ]
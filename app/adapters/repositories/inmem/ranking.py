@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.domain.product import Product
+from .catalog import Catalog, NumericColumn, numeric_value
+
+
+# (min, max, mean) of a column's present values; None when every value is missing
+Bounds = Optional[Tuple[float, float, float]]
+
+
+def value_bounds(values: np.ndarray) -> Bounds:
+    """Scaling bounds of a numeric column."""
+    if np.isnan(values).all():
+        return None
+    return float(np.nanmin(values)), float(np.nanmax(values)), float(np.nanmean(values))
+
+
+def scale(values: np.ndarray, bounds: Bounds) -> np.ndarray:
+    """Min-max scale ``values`` to ``[0, 1]``; missing values take the mean."""
+    if bounds is None:
+        return np.full(values.shape, 0.5)
+    low, high, mean = bounds
+    span = high - low
+    if not span:
+        return np.full(values.shape, 0.5)
+    return (np.where(np.isnan(values), mean, values) - low) / span
+
+
+class Normalizer:
+    """
+    Min-max normalized copies of the catalog's numeric columns.
+
+    Values are scaled to ``[0, 1]`` over the live catalog so scores are
+    comparable between queries; missing values take the column mean. Fixed
+    ``bounds`` can be supplied when the catalog is one shard of a larger one,
+    so every shard scores on the same scale.
+    """
+
+    def __init__(self, catalog: Catalog, bounds: Optional[Dict[str, Bounds]] = None):
+        self.catalog = catalog
+        self.bounds = bounds
+        self.columns: Dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        normalized = self.columns.get(name)
+        if normalized is None:
+            column = self.catalog.column(name)
+            assert isinstance(column, NumericColumn)
+            if self.bounds is not None and name in self.bounds:
+                bounds = self.bounds[name]
+            else:
+                bounds = value_bounds(column.values[self.catalog.bitmap_to_mask(self.catalog.live)])
+            normalized = scale(column.values, bounds)
+            self.columns[name] = normalized
+        return normalized
+
+
+def top_k(
+    catalog: Catalog,
+    selection_mask: np.ndarray,
+    weights: Dict[str, float],
+    k: int,
+    normalizer: Optional[Normalizer] = None,
+) -> List[int]:
+    """
+    Positions of the ``k`` best-scoring selected products.
+
+    The score is the weighted sum of normalized columns. Selection uses
+    ``argpartition`` (linear time); only the k winners are sorted, by score
+    and then catalog order.
+
+    Args:
+        catalog: Catalog to rank
+        selection_mask: Boolean mask of the candidate positions
+        weights: Column name -> weight (negative weights prefer low values)
+        k: Number of positions to return
+        normalizer: Scaling to use; defaults to the catalog's own bounds
+
+    Returns:
+        List[int]: Positions, best first
+    """
+    candidates = np.flatnonzero(selection_mask)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+    if normalizer is None:
+        normalizer = catalog.derived("normalizer", Normalizer)
+    scores = np.zeros(len(candidates))
+    for name, weight in weights.items():
+        scores += weight * normalizer.column(name)[candidates]
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.lexsort((candidates[best], -scores[best]))]
+    return candidates[best].tolist()
+
+
+def score(product: Product, weights: Dict[str, float], bounds: Dict[str, Bounds]) -> float:
+    """Score of a single product, on the same scale as ``top_k``."""
+    return sum(
+        weight * float(scale(np.array([numeric_value(product, name)]), bounds.get(name))[0])
+        for name, weight in weights.items()
+    )
@@ -0,0 +1,169 @@
+"""
+Typo-tolerant text search over product names and brands.
+"""
+import re
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from prometheus_client import Histogram
+from . import bitmap
+
+SEARCH_LATENCY = Histogram(
+    "catalog_search_seconds",
+    "Latency of q= text searches; mode is fuzzy when a term needed typo-tolerant matching",
+    ["mode"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+TOKEN = re.compile(r"\w+")
+# candidate terms verified with edit distance per misspelled query term
+CANDIDATES = 64
+# distinct name/brand texts whose terms are remembered while building
+TOKENIZED_CACHE = 100_000
+
+
+def trigrams(term: str) -> List[str]:
+    """Distinct trigrams of a term, padded so prefixes weigh more than suffixes."""
+    padded = f"  {term} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def max_edits(term: str) -> int:
+    """Typos tolerated for a query term: none for very short or numeric terms."""
+    if term.isdigit():
+        # a mistyped number is another valid number
+        return 0
+    return 0 if len(term) <= 2 else 1 if len(term) <= 5 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """
+    Edit distance between ``a`` and ``b`` if it is at most ``limit``.
+
+    Insertions, deletions, substitutions and transpositions of adjacent
+    characters ("samsnug") cost one edit (optimal string alignment).
+
+    Returns:
+        Optional[int]: The distance, or None as soon as it must exceed ``limit``
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return None
+        before, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+def _postings(keys: array, values: array, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR layout: ``values`` grouped by ``keys`` plus per-key offsets."""
+    keys_np = np.frombuffer(keys, dtype=np.int32)
+    order = np.argsort(keys_np, kind="stable")
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys_np, minlength=count), out=offsets[1:])
+    return np.frombuffer(values, dtype=np.int32)[order], offsets
+
+
+class SearchIndex:
+    """
+    Inverted index of name and brand terms with a trigram index over the terms.
+
+    A query matches the products that contain every query term. A term that
+    exists in the vocabulary is looked up directly (exact search). A term
+    that does not is treated as a typo: the trigram index proposes the
+    vocabulary terms sharing the most trigrams with it, and only the best
+    ``CANDIDATES`` of those are verified with a bounded edit distance
+    (``max_edits``). All postings are flat int32 arrays with offsets, so
+    a million-product catalog does not create millions of Python objects.
+
+    The index belongs to one catalog version; positions of products changed
+    later may be missing or stale, so callers intersect with ``live``.
+    """
+
+    def __init__(self, catalog):
+        """
+        Args:
+            catalog: Catalog whose live products are indexed
+        """
+        self.version = catalog.version
+        self.terms: Dict[str, int] = {}
+        term_ids, positions = array("i"), array("i")
+        tokenized: Dict[str, List[int]] = {}
+        for position in bitmap.iter_positions(catalog.live):
+            product = catalog.products[position]
+            text = f"{product.name} {product.brand or ''}"
+            ids = tokenized.get(text)
+            if ids is None:
+                ids = [self.terms.setdefault(t, len(self.terms)) for t in set(TOKEN.findall(text.lower()))]
+                if len(tokenized) < TOKENIZED_CACHE:
+                    tokenized[text] = ids
+            term_ids.extend(ids)
+            positions.extend([position] * len(ids))
+        self.postings, self.offsets = _postings(term_ids, positions, len(self.terms))
+        self.vocabulary: List[str] = list(self.terms)
+
+        self.grams: Dict[str, int] = {}
+        gram_ids, gram_terms = array("i"), array("i")
+        for term_id, term in enumerate(self.vocabulary):
+            if not max_edits(term):
+                continue  # never a fuzzy candidate
+            for gram in trigrams(term):
+                gram_ids.append(self.grams.setdefault(gram, len(self.grams)))
+                gram_terms.append(term_id)
+        self.gram_postings, self.gram_offsets = _postings(gram_ids, gram_terms, len(self.grams))
+
+    def _fuzzy_terms(self, term: str) -> List[int]:
+        limit = max_edits(term)
+        grams = [self.grams[g] for g in trigrams(term) if g in self.grams]
+        if not limit or not grams:
+            return []
+        candidates = np.concatenate([self.gram_postings[self.gram_offsets[g]:self.gram_offsets[g + 1]] for g in grams])
+        term_ids, shared = np.unique(candidates, return_counts=True)
+        # one edit (a transposition at worst) changes at most four trigrams
+        keep = shared >= max(1, len(trigrams(term)) - 4 * limit)
+        term_ids, shared = term_ids[keep], shared[keep]
+        if len(term_ids) > CANDIDATES:
+            best = np.argpartition(-shared, CANDIDATES - 1)[:CANDIDATES]
+            term_ids = term_ids[best]
+        return [int(t) for t in term_ids if edit_distance(term, self.vocabulary[t], limit) is not None]
+
+    def search(self, query: str) -> Optional[np.ndarray]:
+        """
+        Positions of the products matching every term of ``query``.
+
+        Args:
+            query: Free text; misspelled terms are matched approximately
+
+        Returns:
+            Optional[np.ndarray]: Sorted positions, or None if the query has no terms
+        """
+        terms = set(TOKEN.findall(query.lower()))
+        if not terms:
+            return None
+        start = time.perf_counter()
+        fuzzy = False
+        result: Optional[np.ndarray] = None
+        for term in terms:
+            exact = self.terms.get(term)
+            if exact is not None:
+                matched = [exact]
+            else:
+                fuzzy = True
+                matched = self._fuzzy_terms(term)
+            slices = [self.postings[self.offsets[t]:self.offsets[t + 1]] for t in matched]
+            positions = np.unique(np.concatenate(slices)) if len(slices) > 1 else (
+                slices[0] if slices else np.zeros(0, dtype=np.int32)
+            )
+            result = positions if result is None else np.intersect1d(result, positions, assume_unique=True)
+            if not len(result):
+                break
+        SEARCH_LATENCY.labels(mode="fuzzy" if fuzzy else "exact").observe(time.perf_counter() - start)
+        return result
@@ -0,0 +1,138 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .catalog import Catalog, NumericColumn, TextColumn
+
+
+class SimilarityIndex:
+    """
+    Per-category feature matrices for nearest-neighbour queries.
+
+    Each product is described by price, rating, the normalized numeric
+    specification columns and a one-hot encoding of its brand. Numeric
+    features are standardized within the category and missing values are
+    imputed with the category mean (zero after standardization), so every
+    feature weighs roughly the same in the Euclidean distance. Only live
+    products are indexed.
+    """
+
+    NUMERIC_FEATURES = ("price", "rating") + Catalog.SPEC_NUMERIC_COLUMNS
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        # category code -> (positions, feature matrix)
+        self.blocks: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        # position -> (category code, row inside the block)
+        self.rows: Dict[int, Tuple[int, int]] = {}
+
+        categories = catalog.column("category").codes
+        brands = catalog.column("brand").codes
+        live = catalog.bitmap_to_mask(catalog.live)
+        numeric = np.column_stack([self._values(name) for name in self.NUMERIC_FEATURES]) \
+            if catalog.size else np.empty((0, len(self.NUMERIC_FEATURES)))
+
+        for code in np.unique(categories[live]):
+            positions = np.flatnonzero((categories == code) & live)
+            block = numeric[positions]
+            block[:, np.isnan(block).all(axis=0)] = 0.0
+            mean = np.nanmean(block, axis=0)
+            std = np.nanstd(block, axis=0)
+            std[std == 0] = 1.0
+            standardized = np.nan_to_num((block - mean) / std, nan=0.0)
+
+            _, brand_index = np.unique(brands[positions], return_inverse=True)
+            one_hot = np.zeros((len(positions), brand_index.max() + 1))
+            one_hot[np.arange(len(positions)), brand_index] = 1.0
+
+            self.blocks[int(code)] = (positions, np.hstack([standardized, one_hot]))
+            for row, position in enumerate(positions):
+                self.rows[int(position)] = (int(code), row)
+
+    def _values(self, name: str) -> np.ndarray:
+        column = self.catalog.column(name)
+        assert isinstance(column, NumericColumn)
+        return column.values
+
+    def nearest(self, position: int, k: int) -> List[int]:
+        """
+        Positions of the ``k`` products closest to ``position`` in its category.
+
+        One vectorized distance computation over the category block, then
+        ``argpartition`` to select the k smallest; only those k are sorted.
+        """
+        code, row = self.rows[position]
+        positions, matrix = self.blocks[code]
+        k = min(k, len(positions) - 1)
+        if k <= 0:
+            return []
+        distances = np.square(matrix - matrix[row]).sum(axis=1)
+        distances[row] = np.inf
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return positions[nearest].tolist()
+
+
+def category_features(catalog: Catalog, category: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Live positions of a category and their raw numeric features (NaN when
+    missing), in ``SimilarityIndex.NUMERIC_FEATURES`` order.
+
+    Used when the category is spread over several catalogs (shards), which
+    standardize it with statistics merged across all of them.
+    """
+    categories = catalog.column("category")
+    assert isinstance(categories, TextColumn)
+    live = catalog.bitmap_to_mask(catalog.live)
+    positions = np.flatnonzero((categories.codes == categories.code(category)) & live)
+    columns = []
+    for name in SimilarityIndex.NUMERIC_FEATURES:
+        column = catalog.column(name)
+        assert isinstance(column, NumericColumn)
+        columns.append(column.values[positions])
+    block = np.column_stack(columns) if columns else np.empty((len(positions), 0))
+    return positions, block
+
+
+def nearest_in_category(
+    catalog: Catalog,
+    category: str,
+    brand: Optional[str],
+    reference: np.ndarray,
+    mean: np.ndarray,
+    std: np.ndarray,
+    k: int,
+    exclude: Optional[int] = None,
+) -> List[Tuple[float, int]]:
+    """
+    The ``k`` live products of a category closest to a reference, as
+    ``(squared distance, position)`` pairs, closest first.
+
+    Same distance as ``SimilarityIndex``, on given standardization
+    statistics: the one-hot brand encoding adds 2 when brands differ.
+
+    Args:
+        catalog: Catalog to search
+        category: Category of the reference product
+        brand: Brand of the reference product
+        reference: Standardized numeric features of the reference product
+        mean: Per-feature mean of the category
+        std: Per-feature standard deviation of the category (no zeros)
+        k: Number of neighbours
+        exclude: Position to skip (the reference product itself)
+    """
+    positions, block = category_features(catalog, category)
+    if k <= 0 or not len(positions):
+        return []
+    standardized = np.nan_to_num((block - mean) / std, nan=0.0)
+    distances = np.square(standardized - reference).sum(axis=1)
+    brands = catalog.column("brand")
+    assert isinstance(brands, TextColumn)
+    brand_code = TextColumn.MISSING if brand is None else brands.code(brand)
+    distances += np.where(brands.codes[positions] == brand_code, 0.0, 2.0)
+    if exclude is not None:
+        distances[positions == exclude] = np.inf
+    k = min(k, int(np.isfinite(distances).sum()))
+    if k <= 0:
+        return []
+    nearest = np.argpartition(distances, k - 1)[:k]
+    nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+    return [(float(distances[i]), int(positions[i])) for i in nearest]
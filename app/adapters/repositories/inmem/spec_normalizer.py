@@ -0,0 +1,121 @@
+"""
+Ingestion-time extraction of numeric values from free-text specifications.
+
+``ProductSpecification`` stores text such as ``"8GB Unified Memory"`` or
+``"Up to 22 hours"``. The normalizer runs once per product when it enters
+the catalog and produces a ``NumericSpecification`` so filters, sorting and
+the comparison view never run regexes at request time.
+
+A field whose source text is present but cannot be interpreted is left as
+``None`` and counted in ``spec_normalization_failures_total``.
+"""
+import re
+from typing import Callable, Dict, Optional, Tuple
+from prometheus_client import Counter
+from app.core.domain.product import NumericSpecification, Product, ProductSpecification
+
+
+SPEC_NORMALIZATION_FAILURES = Counter(
+    "spec_normalization_failures_total",
+    "Specification values that could not be normalized to a number",
+    ["field"],
+)
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_CAPACITY = re.compile(_NUMBER + r"\s*(TB|GB|MB)\b", re.IGNORECASE)
+_WEIGHT = re.compile(_NUMBER + r"\s*(kg|g|lbs?|pounds?)\b", re.IGNORECASE)
+_HOURS = re.compile(_NUMBER + r"\s*(?:hours?|hrs?|h)\b", re.IGNORECASE)
+_INCHES = re.compile(_NUMBER + r'\s*(?:-?\s*inch(?:es)?|in\b|")', re.IGNORECASE)
+_HERTZ = re.compile(_NUMBER + r"\s*Hz\b", re.IGNORECASE)
+
+_CAPACITY_TO_GB = {
+    # memory is binary, storage is marketed in decimal units
+    "memory": {"tb": 1024.0, "gb": 1.0, "mb": 1 / 1024},
+    "storage": {"tb": 1000.0, "gb": 1.0, "mb": 1 / 1000},
+}
+_WEIGHT_TO_KG = {"kg": 1.0, "g": 0.001, "lb": 0.45359237, "lbs": 0.45359237, "pound": 0.45359237, "pounds": 0.45359237}
+
+# (value, failed)
+Extracted = Tuple[Optional[float], bool]
+
+
+def _capacity(kind: str) -> Callable[[str], Optional[float]]:
+    def extract(text: str) -> Optional[float]:
+        match = _CAPACITY.search(text)
+        if not match:
+            return None
+        return float(match.group(1)) * _CAPACITY_TO_GB[kind][match.group(2).lower()]
+    return extract
+
+
+def _weight(text: str) -> Optional[float]:
+    match = _WEIGHT.search(text)
+    if not match:
+        return None
+    return float(match.group(1)) * _WEIGHT_TO_KG[match.group(2).lower()]
+
+
+def _first(pattern: re.Pattern) -> Callable[[str], Optional[float]]:
+    def extract(text: str) -> Optional[float]:
+        match = pattern.search(text)
+        return float(match.group(1)) if match else None
+    return extract
+
+
+def _refresh(text: str) -> Extracted:
+    # most displays simply do not state a refresh rate; only text that
+    # mentions Hz without a readable number counts as a failure
+    match = _HERTZ.search(text)
+    if match:
+        return float(match.group(1)), False
+    return None, "hz" in text.lower()
+
+
+_EXTRACTORS: Dict[str, Tuple[Tuple[str, ...], Callable[[str], Optional[float]]]] = {
+    "memory_gb": (("memory",), _capacity("memory")),
+    "storage_gb": (("storage",), _capacity("storage")),
+    "weight_kg": (("weight",), _weight),
+    "battery_hours": (("battery_life",), _first(_HOURS)),
+    "screen_inches": (("screen_size", "display"), _first(_INCHES)),
+}
+
+FIELDS = tuple(NumericSpecification.model_fields)
+
+
+def _extract(field: str, specs: ProductSpecification) -> Extracted:
+    if field == "refresh_hz":
+        text = specs.display or specs.screen_size
+        return _refresh(text) if text else (None, False)
+    sources, extract = _EXTRACTORS[field]
+    for source in sources:
+        text = getattr(specs, source)
+        if text:
+            value = extract(text)
+            return value, value is None
+    return None, False
+
+
+def normalize_specifications(specs: ProductSpecification) -> NumericSpecification:
+    """
+    Extract typed numeric values from free-text specifications.
+
+    Args:
+        specs: Free-text product specifications
+
+    Returns:
+        NumericSpecification: Parsed values; unparseable fields are None
+    """
+    values = {}
+    for field in FIELDS:
+        value, failed = _extract(field, specs)
+        if failed:
+            SPEC_NORMALIZATION_FAILURES.labels(field=field).inc()
+        values[field] = value
+    return NumericSpecification(**values)
+
+
+def normalize_product(product: Product) -> Product:
+    """Return ``product`` with ``numeric_specifications`` filled in (idempotent)."""
+    if product.numeric_specifications is not None:
+        return product
+    return product.model_copy(update={"numeric_specifications": normalize_specifications(product.specifications)})
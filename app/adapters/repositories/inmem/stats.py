@@ -0,0 +1,210 @@
+"""
+Catalog aggregates (count, min/max/mean/percentiles, availability ratios)
+maintained incrementally across catalog versions.
+"""
+import copy
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.domain.product import CatalogSummary, GroupSummary, NumericSummary, Product
+
+PERCENTILES = (25, 50, 75, 90, 99)
+
+
+def _numeric_summary(values: np.ndarray, total: float) -> NumericSummary:
+    # nearest-rank percentiles straight from the sorted values
+    last = len(values) - 1
+    return NumericSummary(
+        min=float(values[0]),
+        max=float(values[-1]),
+        mean=round(total / len(values), 4),
+        **{f"p{p}": float(values[min(last, int(np.ceil(p / 100 * len(values))) - 1)]) for p in PERCENTILES},
+    )
+
+
+def _inserted(values: np.ndarray, added: List[float]) -> np.ndarray:
+    added = np.sort(np.array(added, dtype=np.float64))
+    return np.insert(values, np.searchsorted(values, added), added)
+
+
+def _removed(values: np.ndarray, removed: List[float]) -> np.ndarray:
+    removed = np.sort(np.array(removed, dtype=np.float64))
+    # the k-th copy of a repeated value is removed at its first occurrence + k
+    repeat = np.arange(len(removed)) - np.searchsorted(removed, removed)
+    return np.delete(values, np.searchsorted(values, removed) + repeat)
+
+
+class GroupAggregate:
+    """
+    Aggregates of one group of products (a category, a brand or the whole
+    catalog): sorted price and rating arrays, their sums and availability
+    counts. Immutable; ``changed`` returns the next version.
+    """
+
+    __slots__ = ("label", "prices", "ratings", "price_sum", "rating_sum", "availability", "_summary")
+
+    def __init__(self, label: str, prices: np.ndarray, ratings: np.ndarray, price_sum: float, rating_sum: float,
+                 availability: Dict[str, int]):
+        self.label = label
+        self.prices = prices
+        self.ratings = ratings
+        self.price_sum = price_sum
+        self.rating_sum = rating_sum
+        self.availability = availability
+        self._summary: Optional[GroupSummary] = None
+
+    @classmethod
+    def of(cls, label: str, products: Iterable[Product]) -> "GroupAggregate":
+        """Aggregates of ``products`` from scratch."""
+        prices: List[float] = []
+        ratings: List[float] = []
+        availability: Dict[str, int] = {}
+        for product in products:
+            prices.append(float(product.price))
+            ratings.append(float(product.rating))
+            availability[product.availability] = availability.get(product.availability, 0) + 1
+        return cls(label, np.sort(np.array(prices, dtype=np.float64)), np.sort(np.array(ratings, dtype=np.float64)),
+                   float(sum(prices)), float(sum(ratings)), availability)
+
+    @classmethod
+    def merge(cls, parts: List["GroupAggregate"]) -> "GroupAggregate":
+        """Aggregates of the union of disjoint groups (e.g. one per shard)."""
+        availability: Dict[str, int] = {}
+        for part in parts:
+            for key, count in part.availability.items():
+                availability[key] = availability.get(key, 0) + count
+        return cls(
+            parts[0].label,
+            np.sort(np.concatenate([p.prices for p in parts])),
+            np.sort(np.concatenate([p.ratings for p in parts])),
+            sum(p.price_sum for p in parts),
+            sum(p.rating_sum for p in parts),
+            availability,
+        )
+
+    @property
+    def count(self) -> int:
+        return len(self.prices)
+
+    def changed(self, removed: List[Product], added: List[Product]) -> "GroupAggregate":
+        """Next version without the ``removed`` products and with the ``added`` ones."""
+        group = copy.copy(self)
+        group._summary = None
+        group.availability = dict(self.availability)
+        if removed:
+            group.prices = _removed(group.prices, [float(p.price) for p in removed])
+            group.ratings = _removed(group.ratings, [float(p.rating) for p in removed])
+            group.price_sum -= sum(float(p.price) for p in removed)
+            group.rating_sum -= sum(float(p.rating) for p in removed)
+            for product in removed:
+                group.availability[product.availability] -= 1
+                if not group.availability[product.availability]:
+                    del group.availability[product.availability]
+        if added:
+            group.prices = _inserted(group.prices, [float(p.price) for p in added])
+            group.ratings = _inserted(group.ratings, [float(p.rating) for p in added])
+            group.price_sum += sum(float(p.price) for p in added)
+            group.rating_sum += sum(float(p.rating) for p in added)
+            for product in added:
+                group.availability[product.availability] = group.availability.get(product.availability, 0) + 1
+        return group
+
+    def summary(self) -> GroupSummary:
+        """Public numbers of the group, computed once per version."""
+        if self._summary is None:
+            self._summary = GroupSummary(
+                count=self.count,
+                price=_numeric_summary(self.prices, self.price_sum),
+                rating=_numeric_summary(self.ratings, self.rating_sum),
+                availability={key: round(n / self.count, 4) for key, n in sorted(self.availability.items())},
+            )
+        return self._summary
+
+
+class CatalogAggregates:
+    """
+    Aggregates of a catalog version, overall and per value of ``DIMENSIONS``.
+
+    Built once when a catalog is loaded; ``with_change`` derives the next
+    version from one product change, touching only the groups that product
+    leaves or joins (a sorted insert/delete each) and sharing the rest.
+    """
+
+    DIMENSIONS = ("category", "brand")
+
+    def __init__(self, total: GroupAggregate, groups: Dict[str, Dict[str, GroupAggregate]]):
+        self.total = total
+        self.groups = groups
+
+    @staticmethod
+    def _key(product: Product, dimension: str) -> str:
+        return (getattr(product, dimension) or "").lower()
+
+    @classmethod
+    def of(cls, products: List[Product]) -> "CatalogAggregates":
+        """Aggregates of ``products`` from scratch."""
+        groups: Dict[str, Dict[str, GroupAggregate]] = {}
+        for dimension in cls.DIMENSIONS:
+            members: Dict[str, List[Product]] = {}
+            for product in products:
+                members.setdefault(cls._key(product, dimension), []).append(product)
+            groups[dimension] = {
+                key: GroupAggregate.of(getattr(items[0], dimension) or "", items) for key, items in members.items()
+            }
+        return cls(GroupAggregate.of("all", products), groups)
+
+    @classmethod
+    def merge(cls, parts: List["CatalogAggregates"]) -> "CatalogAggregates":
+        """Aggregates of the union of disjoint catalogs (e.g. one per shard)."""
+        groups: Dict[str, Dict[str, GroupAggregate]] = {}
+        for dimension in cls.DIMENSIONS:
+            members: Dict[str, List[GroupAggregate]] = {}
+            for part in parts:
+                for key, group in part.groups[dimension].items():
+                    members.setdefault(key, []).append(group)
+            groups[dimension] = {key: GroupAggregate.merge(items) for key, items in members.items()}
+        return cls(GroupAggregate.merge([part.total for part in parts]), groups)
+
+    def with_change(self, old: Optional[Product], new: Optional[Product]) -> "CatalogAggregates":
+        """Next version after ``old`` was replaced by ``new`` (None for create/delete)."""
+        return self.with_changes([(old, new)])
+
+    def with_changes(self, changes: List[Tuple[Optional[Product], Optional[Product]]]) -> "CatalogAggregates":
+        """
+        Next version after several (old, new) replacements, each group being
+        updated once for the whole batch.
+        """
+        removed = [old for old, _ in changes if old is not None]
+        added = [new for _, new in changes if new is not None]
+        groups = dict(self.groups)
+        for dimension in self.DIMENSIONS:
+            leaving: Dict[str, List[Product]] = {}
+            joining: Dict[str, List[Product]] = {}
+            for product in removed:
+                leaving.setdefault(self._key(product, dimension), []).append(product)
+            for product in added:
+                joining.setdefault(self._key(product, dimension), []).append(product)
+            groups[dimension] = current = dict(self.groups[dimension])
+            for key in leaving.keys() | joining.keys():
+                group = current.get(key)
+                if group is None:
+                    new = joining[key][0]
+                    current[key] = GroupAggregate.of(getattr(new, dimension) or "", joining[key])
+                    continue
+                group = group.changed(leaving.get(key, []), joining.get(key, []))
+                if group.count:
+                    current[key] = group
+                else:
+                    del current[key]
+        return CatalogAggregates(self.total.changed(removed, added), groups)
+
+    def summary(self, generation: int) -> CatalogSummary:
+        """Public numbers of the catalog version."""
+        def by_label(dimension: str) -> Dict[str, GroupSummary]:
+            return {group.label: group.summary() for _, group in sorted(self.groups[dimension].items())}
+
+        return CatalogSummary(
+            generation=generation,
+            total=self.total.summary() if self.total.count else None,
+            categories=by_label("category"),
+            brands=by_label("brand"),
+        )
@@ -0,0 +1,141 @@
+"""
+Prefix autocomplete over product names and brands.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+import numpy as np
+from app.core.domain.product import Suggestion
+from .catalog import TextColumn
+
+MAX_LIMIT = 20
+# ranges up to this many keys are ranked on the fly ...
+SCAN_LIMIT = 2048
+# ... larger ones (short or very common prefixes) use a precomputed top list
+PRECOMPUTED_PREFIX_LENGTH = 3
+MEMOIZED_PREFIXES = 4096
+
+_END = "\U0010ffff"
+
+
+def _best(ranks: np.ndarray, k: int) -> np.ndarray:
+    """Offsets of the ``k`` highest ranks, best first."""
+    if len(ranks) > k:
+        candidates = np.argpartition(-ranks, k - 1)[:k]
+    else:
+        candidates = np.arange(len(ranks))
+    return candidates[np.argsort(-ranks[candidates])]
+
+
+class SuggestIndex:
+    """
+    Sorted array of lowercase completion keys, searched with ``bisect``.
+
+    Every distinct product name and brand is one key. Its completions are
+    the keys in ``[bisect_left(prefix), bisect_left(prefix + max char))``,
+    ranked by the best rating among the products behind the key, then by
+    how many products share it. Small ranges are ranked with a partial
+    selection; for prefixes matching more than ``SCAN_LIMIT`` keys the best
+    ``MAX_LIMIT`` are precomputed (up to ``PRECOMPUTED_PREFIX_LENGTH``
+    characters) or memoized on first use, so a keystroke never ranks a
+    large share of the catalog.
+
+    The keys belong to one catalog version; only the memo of large ranges
+    grows after construction.
+    """
+
+    def __init__(self, catalog):
+        """
+        Args:
+            catalog: Catalog whose live products are indexed
+        """
+        self.version = catalog.version
+        self._products = catalog.products
+        live = catalog.bitmap_to_mask(catalog.live)
+        ratings = catalog.column("rating").values
+        keys: List[str] = []
+        kinds: List[str] = []
+        positions, counts = [], []
+        # brands first: on equal keys the stable sort below keeps brand before name
+        for kind in ("brand", "name"):
+            # the lowercased vocabulary of the text column is the set of keys
+            column = catalog.column(kind)
+            by_code: List[str] = [""] * len(column.vocabulary)
+            for key, code in list(column.vocabulary.items()):
+                if code < len(by_code):
+                    by_code[code] = key
+            candidates = np.flatnonzero(live & (column.codes >= 0))
+            codes = column.codes[candidates]
+            # group by code, best rating first, catalog order on ties
+            order = np.lexsort((candidates, -ratings[candidates], codes))
+            grouped = codes[order]
+            starts = np.flatnonzero(np.diff(grouped, prepend=np.int32(TextColumn.MISSING)))
+            keys.extend(by_code[code] for code in grouped[starts].tolist())
+            kinds.extend([kind] * len(starts))
+            positions.append(candidates[order[starts]])
+            counts.append(np.diff(np.r_[starts, len(grouped)]))
+
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys: List[str] = [keys[i] for i in order]
+        self.kinds: List[str] = [kinds[i] for i in order]
+        order = np.asarray(order, dtype=np.int64)
+        # position of the best-rated product behind each key
+        self.positions = np.concatenate(positions).astype(np.int64)[order]
+        self.counts = np.concatenate(counts).astype(np.int64)[order]
+        self.ratings = ratings[self.positions]
+        # one unique sortable integer: rating, then product count, then key order
+        self.ranks = (
+            (np.round(self.ratings * 100).astype(np.int64) << 54)
+            | (np.minimum(self.counts, (1 << 22) - 1) << 32)
+            | ((1 << 32) - 1 - np.arange(len(order), dtype=np.int64))
+        )
+
+        self._top: Dict[str, np.ndarray] = {}
+        for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+            start = 0
+            while start < len(self.keys):
+                prefix = self.keys[start][:length]
+                end = bisect_left(self.keys, prefix + _END, start)
+                if end - start > SCAN_LIMIT:
+                    self._top[prefix] = start + _best(self.ranks[start:end], MAX_LIMIT)
+                start = end
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + _END)
+
+    def suggest(self, prefix: str, limit: int) -> List[Suggestion]:
+        """
+        Best completions of a prefix.
+
+        Args:
+            prefix: Typed text; matched case-insensitively against the start
+                of names and brands
+            limit: Number of completions (at most ``MAX_LIMIT``)
+
+        Returns:
+            List[Suggestion]: Completions, best first
+        """
+        prefix = prefix.strip().lower()
+        limit = min(limit, MAX_LIMIT)
+        if not prefix or limit < 1:
+            return []
+        start, end = self._range(prefix)
+        if end - start <= SCAN_LIMIT:
+            best = start + _best(self.ranks[start:end], limit)
+        else:
+            best = self._top.get(prefix)
+            if best is None:
+                best = start + _best(self.ranks[start:end], MAX_LIMIT)
+                if len(self._top) < MEMOIZED_PREFIXES:
+                    self._top[prefix] = best
+        return [self.suggestion(int(i)) for i in best[:limit]]
+
+    def suggestion(self, index: int) -> Suggestion:
+        product = self._products[int(self.positions[index])]
+        kind = self.kinds[index]
+        return Suggestion(
+            text=product.name if kind == "name" else product.brand,
+            kind=kind,
+            rating=float(self.ratings[index]),
+            count=int(self.counts[index]),
+            product_id=product.id if kind == "name" else None,
+        )
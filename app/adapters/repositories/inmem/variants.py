@@ -0,0 +1,83 @@
+"""
+Named catalog variants (regional price lists, A/B test catalogs) derived
+from the base catalog by a set of per-product overrides.
+"""
+from typing import Any, Callable, Dict, Optional
+from app.core.domain.product import Product
+from .catalog import Catalog
+from .index_slot import IndexSlot
+from .search import SearchIndex
+from .suggest import SuggestIndex
+
+# product id -> fields replacing the base product's, or None to hide the product
+Overrides = Dict[int, Optional[Dict[str, Any]]]
+
+# larger override sets rebuild the variant's indexes instead of patching the base's
+INCREMENTAL_LIMIT = 1_000
+
+
+class CatalogVariant:
+    """
+    A catalog that differs from the base catalog only by ``overrides``.
+
+    The variant's catalog is a sibling version of the base catalog: the
+    overrides are applied with ``Catalog.with_products``, so the variant
+    shares every unchanged product record, segment, bitmap and range bin
+    with the base and pays only for the positions it changes. Past
+    ``INCREMENTAL_LIMIT`` overrides patching index by index costs more than
+    building the indexes once, so the catalog is built from scratch (still
+    sharing the product records that are not overridden).
+
+    ``follow`` replays every base write on the variant, re-applying the
+    override of the written product, so the variant never falls behind.
+    The variant keeps its own text indexes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        overrides: Overrides,
+        base: Catalog,
+        apply: Callable[[Product, Dict[str, Any]], Product],
+        sync_limit: int,
+    ):
+        """
+        Args:
+            name: Variant name, as sent in the ``X-Catalog-Variant`` header
+            overrides: Product id -> changed fields (merged like a PATCH), or
+                None to hide the product; ids absent from the base are kept
+                and apply if such a product is created later
+            base: Current base catalog
+            apply: Returns the base product with an override applied
+            sync_limit: ``IndexSlot`` limit for the variant's text indexes
+        """
+        self.name = name
+        self.overrides = overrides
+        self._apply = apply
+        self.catalog = self._derive(base)
+        self.catalog.aggregates()
+        self.suggestions = IndexSlot(SuggestIndex, sync_limit)
+        self.search = IndexSlot(SearchIndex, sync_limit)
+
+    def _product(self, product: Product) -> Optional[Product]:
+        # the variant's version of a base product (None when hidden)
+        if product.id not in self.overrides:
+            return product
+        override = self.overrides[product.id]
+        return None if override is None else self._apply(product, override)
+
+    def _derive(self, base: Catalog) -> Catalog:
+        if len(self.overrides) > INCREMENTAL_LIMIT:
+            products = (self._product(product) for product in base.live_products())
+            return Catalog([product for product in products if product is not None], version=base.version)
+        products = (base.get(product_id) for product_id in self.overrides)
+        return base.with_products({p.id: self._product(p) for p in products if p is not None})
+
+    def follow(self, base: Catalog, product_id: int):
+        """Apply the base catalog's latest write of ``product_id`` to the variant."""
+        product = base.get(product_id)
+        changed = None if product is None else self._product(product)
+        if changed is None:
+            self.catalog = self.catalog.delete(product_id)
+        else:
+            self.catalog = self.catalog.upsert(changed)
@@ -0,0 +1,278 @@
+"""
+Durable storage for the writable in-memory catalog.
+
+The catalog lives in memory; durability comes from two kinds of files in
+one directory:
+
+- ``snapshot.json``: the full catalog at some generation ``G``
+- ``wal-<first generation>.log``: append-only JSON lines, one per write
+
+A write is appended to an in-memory buffer while the repository holds its
+write lock (so the log order is the generation order) and is acknowledged
+once a ``sync`` covering it returns. ``sync`` uses group commit: the first
+waiting writer becomes the leader and writes and fsyncs every buffered
+record at once, while writers arriving meanwhile wait for that (or the
+next) fsync instead of issuing their own.
+
+On startup the snapshot is loaded and every later log record is replayed.
+Compaction rotates to a new log segment at a generation boundary, writes a
+new snapshot of that (immutable) catalog version in the background and then
+deletes the segments it covers, so recovery time stays bounded.
+"""
+import glob
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Histogram
+from app.core.domain.product import Product
+
+WAL_FSYNCS = Counter("catalog_wal_fsyncs_total", "fsync calls issued by the catalog write-ahead log")
+WAL_GROUP_SIZE = Histogram(
+    "catalog_wal_group_commit_records",
+    "Records made durable by one fsync",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 1024),
+)
+WAL_COMPACTIONS = Counter("catalog_wal_compactions_total", "Catalog snapshots written by WAL compaction")
+
+SNAPSHOT_FILE = "snapshot.json"
+_SEGMENT_PATTERN = "wal-*.log"
+
+
+def _segment_name(first_generation: int) -> str:
+    return f"wal-{first_generation:020d}.log"
+
+
+def _segment_start(path: str) -> int:
+    return int(os.path.basename(path)[4:-4])
+
+
+def _fsync_directory(directory: str):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # pragma: no cover - platforms without directory fds
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """
+    Append-only, group-committed log of catalog writes plus snapshots.
+
+    Args:
+        directory: Directory holding the snapshot and the log segments
+        compact_after: Records in the current segment that trigger compaction
+        fsync: Set to False to skip fsync (benchmarks of the non-durable path)
+    """
+
+    def __init__(self, directory: str, compact_after: int = 100_000, fsync: bool = True):
+        self.directory = directory
+        self.compact_after = compact_after
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._buffer: List[bytes] = []
+        self._appended = 0
+        self._durable = 0
+        self._flushing = False
+        self._error: Optional[BaseException] = None
+        self._file = None
+        self._segment_records = 0
+        self._compacting = False
+
+    def recover(self, seed: Callable[[], List[Product]]) -> Tuple[List[Product], int]:
+        """
+        Rebuild the catalog from the snapshot and the log, then open the log
+        for appending.
+
+        Args:
+            seed: Products to start from when there is no snapshot yet
+
+        Returns:
+            Tuple containing:
+            - List[Product]: Live products in catalog order
+            - int: Generation of the recovered catalog
+        """
+        snapshot = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot):
+            with open(snapshot, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            generation = data["generation"]
+            products: Dict[int, Optional[Product]] = {
+                item["id"]: Product.model_validate(item) for item in data["products"]
+            }
+        else:
+            generation = 0
+            products = {product.id: product for product in seed()}
+
+        for path in sorted(glob.glob(os.path.join(self.directory, _SEGMENT_PATTERN)), key=_segment_start):
+            generation = self._replay(path, generation, products)
+
+        self._open_segment(generation + 1)
+        # deleted ids keep their slot (None) while replaying so a re-created
+        # product returns to its old place, as it does in a live catalog
+        return [p for p in products.values() if p is not None], generation
+
+    @staticmethod
+    def _replay(path: str, generation: int, products: Dict[int, Optional[Product]]) -> int:
+        with open(path, "rb") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn tail of a write that was never acknowledged
+                    break
+                if record["g"] <= generation:
+                    continue
+                if record["product"] is None:
+                    products[record["id"]] = None
+                else:
+                    products[record["id"]] = Product.model_validate(record["product"])
+                generation = record["g"]
+        return generation
+
+    def _open_segment(self, first_generation: int):
+        self._file = open(os.path.join(self.directory, _segment_name(first_generation)), "ab")
+        self._segment_records = 0
+        _fsync_directory(self.directory)
+
+    def append(self, generation: int, op: str, product_id: int, product: Optional[Product]) -> int:
+        """
+        Buffer one write. Call with the repository's write lock held so records
+        stay in generation order, then ``sync`` the returned ticket after
+        releasing it.
+
+        Returns:
+            int: Ticket to pass to ``sync``
+        """
+        record = {
+            "g": generation,
+            "op": op,
+            "id": product_id,
+            "product": None if product is None else product.model_dump(exclude={"numeric_specifications"}),
+        }
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            self._buffer.append(line)
+            self._appended += 1
+            self._segment_records += 1
+            return self._appended
+
+    @property
+    def durable(self) -> int:
+        """Ticket of the newest record known to be on disk."""
+        with self._lock:
+            return self._durable
+
+    def sync(self, ticket: int):
+        """
+        Block until the record with ``ticket`` is on disk.
+
+        Raises:
+            OSError: If the write or fsync covering the record failed
+        """
+        with self._lock:
+            while self._durable < ticket:
+                if self._error is not None:
+                    raise self._error
+                if self._flushing:
+                    self._flushed.wait()
+                    continue
+                self._flush_locked()
+
+    def _flush_locked(self):
+        # leader: write and fsync everything buffered so far, without holding
+        # the lock during I/O so followers can keep appending
+        self._flushing = True
+        batch, self._buffer = self._buffer, []
+        upto = self._appended
+        file = self._file
+        self._lock.release()
+        try:
+            file.write(b"".join(batch))
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+                WAL_FSYNCS.inc()
+            WAL_GROUP_SIZE.observe(len(batch))
+        except BaseException as err:
+            self._lock.acquire()
+            self._error = err
+            self._flushing = False
+            self._flushed.notify_all()
+            raise
+        self._lock.acquire()
+        self._durable = upto
+        self._flushing = False
+        self._flushed.notify_all()
+
+    def needs_compaction(self) -> bool:
+        """True when the current segment is large and no compaction is running."""
+        return self._segment_records >= self.compact_after and not self._compacting
+
+    def begin_compaction(self, generation: int) -> bool:
+        """
+        Start a new segment after ``generation``. Call with the repository's
+        write lock held, so no record of a later generation is buffered yet.
+        Every record up to ``generation`` is on disk when this returns.
+
+        Returns:
+            bool: False if a compaction is already running
+
+        Raises:
+            OSError: If the log failed, so records up to ``generation`` may not be durable
+        """
+        with self._lock:
+            if self._compacting:
+                return False
+            while self._flushing:
+                self._flushed.wait()
+            if self._error is not None:
+                raise self._error
+            if self._buffer:
+                self._flush_locked()
+            self._compacting = True
+            self._file.close()
+            self._open_segment(generation + 1)
+            return True
+
+    def finish_compaction(self, generation: int, products: List[Product]):
+        """
+        Write the snapshot of ``generation`` and drop the segments it covers.
+        Runs without any lock; ``products`` come from an immutable catalog.
+        """
+        try:
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            temporary = path + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump({
+                    "generation": generation,
+                    "products": [p.model_dump(exclude={"numeric_specifications"}) for p in products],
+                }, file, separators=(",", ":"))
+                file.flush()
+                if self.fsync:
+                    os.fsync(file.fileno())
+            os.replace(temporary, path)
+            _fsync_directory(self.directory)
+            for segment in glob.glob(os.path.join(self.directory, _SEGMENT_PATTERN)):
+                if _segment_start(segment) <= generation:
+                    os.remove(segment)
+            WAL_COMPACTIONS.inc()
+        finally:
+            self._compacting = False
+
+    def close(self):
+        """Flush pending records and close the current segment."""
+        with self._lock:
+            while self._flushing:
+                self._flushed.wait()
+            if self._buffer:
+                self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
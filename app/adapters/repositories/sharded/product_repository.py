@@ -0,0 +1,394 @@
+import atexit
+import heapq
+import threading
+from concurrent.futures import Future
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app import deadline
+from app.adapters.repositories.inmem.catalog import Catalog, numeric_value
+from app.adapters.repositories.inmem.change_log import CREATED, DELETED, UPDATED, ChangeLog
+from app.adapters.repositories.inmem.product_repository import CHANGE_LOG_CAPACITY, read_products
+from app.adapters.repositories.inmem.ranking import Bounds, score, value_bounds
+from app.adapters.repositories.inmem.similarity import SimilarityIndex
+from app.adapters.repositories.inmem.stats import CatalogAggregates
+from app.adapters.repositories.inmem.spec_normalizer import normalize_product
+from app.core.domain.product import CatalogSummary, PriceHistory, Product, ProductChange, Suggestion
+from app.core.ports.repositories import ProductRepository
+from app.errors import CustomError
+from .shard import ShardClient
+
+
+def shard_of(product_id: int, shards: int) -> int:
+    """Shard owning a product id (multiplicative hash, stable across runs)."""
+    return ((product_id * 2654435761) & 0xFFFFFFFF) % shards
+
+
+class ShardedProductRepository(ProductRepository):
+    """
+    ProductRepository partitioned across local shard processes.
+
+    Products are assigned to shards by a hash of their id. Each shard holds
+    its partition in an ``InMemoryProductRepository`` with its own indexes.
+    Queries are scattered to every shard and gathered here: pages with a
+    k-way merge over the shards' already ordered results, totals by summing,
+    and top-k by re-ranking the shards' local winners on one global scale.
+
+    Writes go to the shard owning the product id. New products get the next
+    catalog sequence, so merged pages keep the single-catalog order. The
+    coordinator numbers the writes itself (its change-feed generation) and
+    logs them in a ``ChangeLog`` for ``find_changes``.
+
+    Catalog variants are defined on every shard, each shard holding the
+    overrides of the products it owns.
+
+    Reads forward the remaining request budget to the shards, which skip
+    commands whose deadline passed while they were queued, and the
+    coordinator stops waiting for replies at the deadline.
+    """
+
+    def __init__(
+        self,
+        shards: int = 2,
+        products: Optional[List[Product]] = None,
+        variants: Optional[Dict[str, Dict[int, Optional[Dict[str, Any]]]]] = None,
+    ):
+        """
+        Partition the catalog and start one process per shard.
+
+        Args:
+            shards: Number of shard processes
+            products: Optional products to serve instead of data.json
+            variants: Optional catalog variants to serve, name -> overrides
+        """
+        super().__init__()
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+        products = [normalize_product(p) for p in (read_products() if products is None else products)]
+
+        # global scaling bounds so every shard scores top-k on the same scale
+        self._bounds: Dict[str, Bounds] = {
+            name: value_bounds(np.fromiter((numeric_value(p, name) for p in products), dtype=np.float64, count=len(products)))
+            for name in Catalog.NUMERIC_COLUMNS
+        }
+
+        partitions: List[List[Tuple[int, Product]]] = [[] for _ in range(shards)]
+        for sequence, product in enumerate(products):
+            partitions[shard_of(product.id, shards)].append((sequence, product))
+        self._shards = [ShardClient(partition) for partition in partitions]
+        self._next_sequence = len(products)
+        self._max_id = max((p.id for p in products), default=0)
+        self._write_lock = threading.Lock()
+        self._changes = ChangeLog(CHANGE_LOG_CAPACITY)
+        self._log_lock = threading.Lock()  # writes to different shards run concurrently
+        self._bounds_stale = False
+        # per variant (None for the base catalog), dropped by every write
+        self._variant_bounds: Dict[str, Dict[str, Bounds]] = {}
+        self._stats: Dict[Optional[str], CatalogSummary] = {}
+        self._variants: Dict[str, int] = {}
+        atexit.register(self.close)
+        for name, overrides in (variants or {}).items():
+            self.put_variant(name, overrides)
+
+    def close(self):
+        """Stop every shard process."""
+        for shard in self._shards:
+            shard.close()
+        self._shards = []
+
+    @staticmethod
+    def _reply(future: Future) -> Any:
+        # a shard's reply, or DeadlineExceeded once the request's deadline passes
+        while True:
+            try:
+                return future.result(deadline.remaining())
+            except TimeoutError:
+                deadline.check("coordinator")
+
+    def _gather(self, command: str, *args) -> list:
+        futures = [shard.submit(command, *args) for shard in self._shards]
+        return [self._reply(future) for future in futures]
+
+    def find_paginated(self, page: int, size: int, **kwargs) -> Tuple[List[Product], int]:
+        """
+        Retrieve a page by scatter/gather.
+        
+        Every shard returns the merge keys of its first ``page * size``
+        matches in order; the key lists are k-way merged, the requested slice
+        is cut from the merge, and only those products are fetched from
+        their shards.
+        
+        Args:
+            page: Page number (1-based indexing)
+            size: Number of products per page
+            **kwargs: Filters and sort, as accepted by InMemoryProductRepository
+            
+        Returns:
+            Tuple containing:
+            - List[Product]: Products for the requested page
+            - int: Total number of products matching the filters
+        """
+        skip = (page - 1) * size
+        replies = self._gather("find", skip + size, kwargs)
+        total = sum(count for count, _ in replies)
+        tagged = [[(key, index) for key in keys] for index, (_, keys) in enumerate(replies)]
+        selected = list(islice(heapq.merge(*tagged), skip, skip + size))
+
+        # the catalog sequence is the last element of every merge key
+        wanted: Dict[int, List[int]] = {}
+        for key, index in selected:
+            wanted.setdefault(index, []).append(key[-1])
+        variant = kwargs.get("variant")
+        futures = {index: self._shards[index].submit("fetch", sequences, variant) for index, sequences in wanted.items()}
+        fetched = {index: iter(self._reply(future)) for index, future in futures.items()}
+        # None: deleted (or hidden by the variant) between the merge and the fetch
+        products = [next(fetched[index]) for _, index in selected]
+        return [product for product in products if product is not None], total
+
+    def find_top(self, k: int, weights: Dict[str, float], **kwargs) -> List[Product]:
+        """
+        Retrieve the top-k products across shards.
+        
+        Each shard selects its local top k using the global normalization
+        bounds, so the global top k is among the shards' winners.
+        
+        Args:
+            k: Number of products to return
+            weights: Numeric column name -> weight
+            **kwargs: Filters, as accepted by find_paginated
+            
+        Returns:
+            List[Product]: Up to k products, best first
+        """
+        for name in weights:
+            if name not in Catalog.NUMERIC_COLUMNS:
+                raise CustomError("ERR0003", f"Unsupported weight field: {name}", 400)
+        bounds = self._bounds_for(kwargs.get("variant"))
+        replies = self._gather("top", k, weights, dict(kwargs, normalization=bounds))
+        candidates = [
+            (-score(product, weights, bounds), sequence, product)
+            for items in replies for sequence, product in items
+        ]
+        return [product for _, _, product in heapq.nsmallest(k, candidates, key=itemgetter(0, 1))]
+
+    def find_similar(self, product_id: int, k: int, variant: Optional[str] = None) -> Optional[List[Product]]:
+        """
+        Nearest neighbours of a product within its category, across shards.
+
+        The reference product comes from its owning shard. Its category is
+        standardized with statistics merged from every shard, so distances
+        are those of a single catalog; each shard then returns its local
+        k nearest and the global k nearest are among them.
+
+        Args:
+            product_id: Identifier of the reference product
+            k: Maximum number of similar products to return
+            variant: Catalog variant to read instead of the base catalog
+
+        Returns:
+            Optional[List[Product]]: Up to k products, closest first, or None
+            if the product does not exist
+        """
+        reference = self.find_by_id(product_id, variant=variant)
+        if reference is None:
+            return None
+        moments = self._gather("similar_moments", reference.category, variant)
+        count = sum(m[0] for m in moments)
+        total = sum(m[1] for m in moments)
+        squares = sum(m[2] for m in moments)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / count, 0.0)
+            std = np.sqrt(np.maximum(np.where(count > 0, squares / count, 0.0) - mean * mean, 0.0))
+        std[std < 1e-12] = 1.0
+        features = np.array([numeric_value(reference, name) for name in SimilarityIndex.NUMERIC_FEATURES])
+        standardized = np.nan_to_num((features - mean) / std, nan=0.0)
+
+        replies = self._gather(
+            "similar", reference.category, reference.brand, standardized, mean, std, k, product_id, variant
+        )
+        candidates = [candidate for items in replies for candidate in items]
+        return [product for _, _, product in heapq.nsmallest(k, candidates, key=itemgetter(0, 1))]
+
+    def find_suggestions(self, prefix: str, limit: int, variant: Optional[str] = None) -> List[Suggestion]:
+        """
+        Complete a prefix across shards.
+        
+        Each shard returns its best ``limit`` completions; the same name or
+        brand from several shards is merged (best rating, summed counts) and
+        re-ranked. Counts only include shards where the key made the local top.
+        """
+        merged: Dict[Tuple[str, str], Suggestion] = {}
+        for items in self._gather("suggest", prefix, limit, variant):
+            for item in items:
+                key = (item.text.lower(), item.kind)
+                seen = merged.get(key)
+                if seen is None:
+                    merged[key] = item
+                else:
+                    best = item if item.rating > seen.rating else seen
+                    merged[key] = best.model_copy(update={"count": seen.count + item.count})
+        ranked = sorted(merged.items(), key=lambda entry: (-entry[1].rating, -entry[1].count, entry[0]))
+        return [item for _, item in ranked[:limit]]
+
+    def get_stats(self, variant: Optional[str] = None) -> CatalogSummary:
+        """
+        Catalog aggregates merged from every shard's.
+        
+        The merge is redone only after a write; otherwise the last summary is
+        returned. The generation is the sum of the shards' generations.
+        """
+        summary = self._stats.get(variant)
+        if summary is None:
+            generations = self._gather("generation", variant)
+            summary = CatalogAggregates.merge(self._gather("aggregates", variant)).summary(sum(generations))
+            self._stats[variant] = summary
+        return summary
+
+    def _bounds_for(self, variant: Optional[str]) -> Dict[str, Bounds]:
+        if not variant:
+            if self._bounds_stale:
+                self._refresh_bounds()
+            return self._bounds
+        bounds = self._variant_bounds.get(variant)
+        if bounds is None:
+            bounds = self._variant_bounds[variant] = self._merged_bounds(variant)
+        return bounds
+
+    def _refresh_bounds(self):
+        self._bounds_stale = False
+        try:
+            self._bounds = self._merged_bounds(None)
+        except BaseException:
+            self._bounds_stale = True
+            raise
+
+    def _merged_bounds(self, variant: Optional[str]) -> Dict[str, Bounds]:
+        # combine the shards' (min, max, sum, count) into global bounds
+        merged: Dict[str, Bounds] = {}
+        replies = self._gather("bounds_parts", variant)
+        for name in Catalog.NUMERIC_COLUMNS:
+            parts = [reply[name] for reply in replies if reply[name] is not None]
+            if not parts:
+                merged[name] = None
+                continue
+            low = min(part[0] for part in parts)
+            high = max(part[1] for part in parts)
+            mean = sum(part[2] for part in parts) / sum(part[3] for part in parts)
+            merged[name] = (low, high, mean)
+        return merged
+
+    def _written(self, product_id: Optional[int] = None, op: Optional[str] = None):
+        # every cached merge may include the written product
+        self._bounds_stale = True
+        self._variant_bounds = {}
+        self._stats = {}
+        if op is not None:
+            with self._log_lock:
+                self._changes.append(self._changes.newest + 1, product_id, op)
+
+    def _owner(self, product_id: int) -> ShardClient:
+        return self._shards[shard_of(product_id, len(self._shards))]
+
+    def find_by_id(self, product_id: int, variant: Optional[str] = None) -> Optional[Product]:
+        """Retrieve a single product from its shard."""
+        return self._reply(self._owner(product_id).submit("get", product_id, variant))
+
+    def find_price_history(self, product_id: int, **kwargs) -> Optional[PriceHistory]:
+        """Price history of a product, kept by its shard."""
+        return self._reply(self._owner(product_id).submit("price_history", product_id, kwargs))
+
+    def create(self, product_data: Dict[str, Any]) -> Product:
+        """
+        Add a product on its owning shard.
+        
+        Ids are assigned here (one above the highest ever used) so they are
+        unique across shards.
+        """
+        with self._write_lock:
+            product_id = product_data.get("id")
+            if product_id is None:
+                product_id = self._max_id + 1
+            product = self._owner(product_id).submit(
+                "create", self._next_sequence, dict(product_data, id=product_id)
+            ).result()
+            self._next_sequence += 1
+            self._max_id = max(self._max_id, product.id)
+            self._written(product.id, CREATED)
+        return product
+
+    def update(self, product_id: int, product_data: Dict[str, Any]) -> Optional[Product]:
+        """Replace a product on its owning shard."""
+        product = self._owner(product_id).submit("update", product_id, product_data).result()
+        self._written(product_id, UPDATED if product is not None else None)
+        return product
+
+    def patch(self, product_id: int, changes: Dict[str, Any]) -> Optional[Product]:
+        """Change some fields of a product on its owning shard."""
+        product = self._owner(product_id).submit("patch", product_id, changes).result()
+        self._written(product_id, UPDATED if product is not None else None)
+        return product
+
+    def delete(self, product_id: int) -> bool:
+        """Remove a product from its owning shard."""
+        deleted = self._owner(product_id).submit("delete", product_id).result()
+        self._written(product_id, DELETED if deleted else None)
+        return deleted
+
+    def find_changes(self, since: int) -> Tuple[int, Optional[List[ProductChange]]]:
+        """
+        Products created, updated or deleted after a coordinator generation.
+
+        The generation counts the writes made through this coordinator since
+        it started (unlike ``get_stats``, which sums the shards'); changed
+        products are read from their shards.
+
+        Args:
+            since: Generation the caller is at
+
+        Returns:
+            Tuple containing:
+            - int: Current generation
+            - Optional[List[ProductChange]]: Net change per product, or None
+              when ``since`` is older than the change log (or unknown) and the
+              caller has to resync from a full listing
+        """
+        generation = self._changes.newest
+        changes = self._changes.changes(since, generation)
+        if changes is None:
+            return generation, None
+        futures = {
+            product_id: self._owner(product_id).submit("get", product_id, None)
+            for product_id, op in changes.items() if op != DELETED
+        }
+        products = {product_id: self._reply(future) for product_id, future in futures.items()}
+        result = []
+        for product_id, op in changes.items():
+            product = products.get(product_id)
+            if op != DELETED and product is None:
+                op = DELETED  # deleted after the generation was read
+            result.append(ProductChange(id=product_id, op=op, product=product))
+        return generation, result
+
+    def put_variant(self, name: str, overrides: Dict[int, Optional[Dict[str, Any]]]) -> int:
+        """Define a variant on every shard, each with the overrides of its own products."""
+        parts: List[Dict[int, Optional[Dict[str, Any]]]] = [{} for _ in self._shards]
+        for product_id, override in overrides.items():
+            parts[shard_of(product_id, len(self._shards))][product_id] = override
+        with self._write_lock:
+            futures = [shard.submit("put_variant", name, part) for shard, part in zip(self._shards, parts)]
+            count = sum(future.result() for future in futures)
+            self._variants[name] = len(overrides)
+            self._written()
+        return count
+
+    def delete_variant(self, name: str) -> bool:
+        """Drop a variant from every shard."""
+        with self._write_lock:
+            self._gather("delete_variant", name)
+            self._written()
+            return self._variants.pop(name, None) is not None
+
+    def list_variants(self) -> Dict[str, int]:
+        """Variant name -> number of overridden products."""
+        return dict(sorted(self._variants.items()))
@@ -0,0 +1,256 @@
+"""
+Shard worker process and the coordinator-side client that talks to it.
+
+Each shard runs in its own process and serves one partition of the catalog
+from an ``InMemoryProductRepository``. Requests and replies travel over a
+``multiprocessing`` pipe as ``(request_id, command, args, budget)`` tuples,
+so one client can have several requests in flight from different threads.
+``budget`` is the caller's remaining request deadline in seconds.
+"""
+import itertools
+import math
+import multiprocessing
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app import deadline
+from app.adapters.repositories.inmem.catalog import numeric_value
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.adapters.repositories.inmem.similarity import category_features, nearest_in_category
+from app.core.domain.product import Product
+from app.errors import CustomError
+
+
+def sort_key(product: Product, sort: Optional[str], sequence: int) -> tuple:
+    """
+    Merge key reproducing the single-catalog order across shards.
+
+    Unsorted pages follow the original catalog order (``sequence``). Sorted
+    pages order by the column, missing values last, ties by catalog order,
+    exactly like ``Catalog.sort_order``.
+    """
+    if not sort:
+        return (sequence,)
+    value = numeric_value(product, sort.lstrip("-"))
+    if math.isnan(value):
+        return (1, 0.0, sequence)
+    return (0, -value if sort.startswith("-") else value, sequence)
+
+
+# commands run under the caller's deadline; writes always complete
+READ_COMMANDS = frozenset((
+    "find", "fetch", "top", "suggest", "aggregates", "generation", "count", "get", "price_history", "bounds_parts",
+    "similar_moments", "similar",
+))
+
+
+class ShardServer:
+    """Command handlers running inside a shard process."""
+
+    def __init__(self, partition: List[Tuple[int, Product]]):
+        self.repo = InMemoryProductRepository(products=[product for _, product in partition])
+        # live products only; a deleted id leaves both maps
+        self.sequence: Dict[int, int] = {product.id: sequence for sequence, product in partition}
+        self.by_sequence: Dict[int, Product] = {sequence: product for sequence, product in partition}
+        # sequence of each deleted id: the catalog gives a re-created id its old
+        # position back, so its merge key must keep the old sequence too
+        self.retired: Dict[int, int] = {}
+
+    def find(self, limit: int, kwargs: dict) -> Tuple[int, List[tuple]]:
+        """
+        Merge keys of the first ``limit`` matches.
+
+        Only keys travel back; the coordinator fetches the few products that
+        survive the merge, so deep pages do not ship whole products.
+        """
+        items, total = self.repo.find_paginated(page=1, size=max(limit, 1), **kwargs)
+        sort = kwargs.get("sort")
+        return total, [sort_key(p, sort, self.sequence[p.id]) for p in items[:limit]]
+
+    def fetch(self, sequences: List[int], variant: Optional[str] = None) -> List[Optional[Product]]:
+        """Products for the given catalog sequence numbers (None once deleted)."""
+        products = [self.by_sequence.get(sequence) for sequence in sequences]
+        if variant:
+            return [None if p is None else self.repo.find_by_id(p.id, variant=variant) for p in products]
+        return products
+
+    def top(self, k: int, weights: Dict[str, float], kwargs: dict) -> List[Tuple[int, Product]]:
+        """Local top-k, scored on the coordinator's global normalization."""
+        items = self.repo.find_top(k=k, weights=weights, **kwargs)
+        return [(self.sequence[p.id], p) for p in items]
+
+    def suggest(self, prefix: str, limit: int, variant: Optional[str] = None) -> list:
+        return self.repo.find_suggestions(prefix, limit, variant=variant)
+
+    def aggregates(self, variant: Optional[str] = None):
+        return self.repo._view(variant)[0].aggregates()
+
+    def generation(self, variant: Optional[str] = None) -> int:
+        return self.repo._view(variant)[0].version
+
+    def count(self) -> int:
+        return len(self.repo._products)
+
+    def get(self, product_id: int, variant: Optional[str] = None) -> Optional[Product]:
+        return self.repo.find_by_id(product_id, variant=variant)
+
+    def price_history(self, product_id: int, kwargs: dict):
+        return self.repo.find_price_history(product_id, **kwargs)
+
+    def similar_moments(self, category: str, variant: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per similarity feature (count, sum, sum of squares) of the category's live products."""
+        _, block = category_features(self.repo._view(variant)[0], category)
+        present = ~np.isnan(block)
+        values = np.where(present, block, 0.0)
+        return present.sum(axis=0), values.sum(axis=0), np.square(values).sum(axis=0)
+
+    def similar(
+        self,
+        category: str,
+        brand: Optional[str],
+        reference: np.ndarray,
+        mean: np.ndarray,
+        std: np.ndarray,
+        k: int,
+        exclude_id: int,
+        variant: Optional[str] = None,
+    ) -> List[Tuple[float, int, Product]]:
+        """Local nearest neighbours as (distance, catalog sequence, product), on the coordinator's statistics."""
+        catalog = self.repo._view(variant)[0]
+        nearest = nearest_in_category(
+            catalog, category, brand, reference, mean, std, k, exclude=catalog.position_of(exclude_id)
+        )
+        deadline.check("shard")
+        return [
+            (distance, self.sequence[catalog.products[position].id], catalog.products[position])
+            for distance, position in nearest
+        ]
+
+    def _stored(self, product: Optional[Product], sequence: Optional[int] = None) -> Optional[Product]:
+        # new ids take the coordinator's sequence; live ids keep their place
+        if product is not None:
+            sequence = self.sequence.setdefault(product.id, sequence)
+            self.by_sequence[sequence] = product
+        return product
+
+    def create(self, sequence: int, product_data: dict) -> Product:
+        product = self.repo.create(product_data)
+        return self._stored(product, self.retired.pop(product.id, sequence))
+
+    def update(self, product_id: int, product_data: dict) -> Optional[Product]:
+        return self._stored(self.repo.update(product_id, product_data))
+
+    def patch(self, product_id: int, changes: dict) -> Optional[Product]:
+        return self._stored(self.repo.patch(product_id, changes))
+
+    def delete(self, product_id: int) -> bool:
+        if not self.repo.delete(product_id):
+            return False
+        sequence = self.sequence.pop(product_id)
+        del self.by_sequence[sequence]
+        self.retired[product_id] = sequence
+        return True
+
+    def put_variant(self, name: str, overrides: dict) -> int:
+        return self.repo.put_variant(name, overrides)
+
+    def delete_variant(self, name: str) -> bool:
+        return self.repo.delete_variant(name)
+
+    def bounds_parts(self, variant: Optional[str] = None) -> Dict[str, Optional[Tuple[float, float, float, int]]]:
+        """Per numeric column (min, max, sum, count) of the live products."""
+        catalog = self.repo._view(variant)[0]
+        live = catalog.bitmap_to_mask(catalog.live)
+        parts = {}
+        for name in catalog.NUMERIC_COLUMNS:
+            values = catalog.column(name).values[live]
+            values = values[~np.isnan(values)]
+            parts[name] = (float(values.min()), float(values.max()), float(values.sum()), len(values)) if len(values) else None
+        return parts
+
+
+def _serve(conn, partition: List[Tuple[int, Product]]):
+    server = ShardServer(partition)
+    conn.send((None, True, None))  # ready
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        request_id, command, args, budget = message
+        try:
+            with deadline.scope(budget if command in READ_COMMANDS else None):
+                deadline.check("shard")  # the caller gave up while this waited in the queue
+                reply = getattr(server, command)(*args)
+            conn.send((request_id, True, reply))
+        except CustomError as err:
+            conn.send((request_id, False, ("custom", err.code, str(err), err.status_code)))
+        except Exception as err:
+            conn.send((request_id, False, ("error", type(err).__name__, str(err), 500)))
+    conn.close()
+
+
+class ShardClient:
+    """
+    Coordinator-side handle of one shard process.
+
+    Sends are serialized by a lock; a reader thread resolves the pending
+    future of each reply, so callers from several threads can wait on the
+    same shard concurrently.
+    """
+
+    def __init__(self, partition: List[Tuple[int, Product]], context: Optional[Any] = None):
+        context = context or multiprocessing.get_context("spawn")
+        self._conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, partition), daemon=True)
+        self.process.start()
+        child.close()
+        self._conn.recv()  # wait until the shard has built its indexes
+
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._send_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_replies, daemon=True)
+        self._reader.start()
+
+    def _read_replies(self):
+        while True:
+            try:
+                request_id, ok, payload = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(payload)
+            elif payload[0] == "custom":
+                future.set_exception(CustomError(payload[1], payload[2], payload[3]))
+            else:
+                future.set_exception(RuntimeError(f"shard error {payload[1]}: {payload[2]}"))
+        for future in list(self._pending.values()):
+            future.set_exception(RuntimeError("shard process exited"))
+        self._pending.clear()
+
+    def submit(self, command: str, *args) -> Future:
+        """Send a command; the returned future resolves with the shard's reply."""
+        future: Future = Future()
+        request_id = next(self._ids)
+        self._pending[request_id] = future
+        with self._send_lock:
+            self._conn.send((request_id, command, args, deadline.remaining()))
+        return future
+
+    def close(self):
+        try:
+            with self._send_lock:
+                self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._conn.close()
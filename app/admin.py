@@ -0,0 +1,23 @@
+"""
+Admin token check shared by the ``/admin/*`` routes and the catalog writes.
+"""
+import os
+from typing import Optional
+from fastapi import Header, HTTPException
+
+# read once at import; the default only suits local runs
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "secret")
+
+
+def check_admin_token(x_admin_token: Optional[str]):
+    """
+    Raises:
+        HTTPException: 401 unless ``x_admin_token`` is the admin token
+    """
+    if x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="invalid admin token")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None, description="Admin token required for catalog writes")):
+    """FastAPI dependency rejecting requests without the admin token."""
+    check_admin_token(x_admin_token)
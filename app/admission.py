@@ -0,0 +1,239 @@
+"""
+Admission control: an adaptive concurrency limit with priority-aware load
+shedding, in front of the routers.
+"""
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+from prometheus_client import Counter, Gauge
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# latency above which the concurrency limit shrinks
+TARGET_LATENCY_MS = float(os.getenv("ADMISSION_TARGET_LATENCY_MS", "500"))
+INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "64"))
+MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "8"))
+MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "1024"))
+
+# paths admitted whatever the load: probes, scrapes and the mitigation hook
+ALWAYS_ADMITTED = frozenset(("/health", "/metrics", "/admin/mitigate"))
+PRIORITY_HEADER = b"x-priority"
+# share of the limit each priority may fill; lower priorities are shed first
+PRIORITY_SHARES = {"high": 1.0, "normal": 0.9, "low": 0.5}
+_WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+_SHED_BODY = b'{"code":"ERR0007","message":"Server overloaded, retry later"}'
+
+CONCURRENCY_LIMIT = Gauge("admission_concurrency_limit", "Current adaptive concurrency limit")
+IN_FLIGHT = Gauge("admission_in_flight", "Requests admitted and not yet finished")
+SHED_REQUESTS = Counter("admission_shed_total", "Requests rejected by admission control", ["priority"])
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted by AIMD on observed latency.
+
+    Every finished request is a sample. A sample slower than the target, or
+    one that hit its deadline, cuts the limit by ``backoff``, at most once
+    per observed latency so a burst of slow completions counts as one
+    congestion signal. Faster samples raise it by ``1 / limit``, about one
+    request per limit's worth of completions, but only while at least half
+    of the limit is in use, so an idle server does not grow a limit it has
+    never tested.
+
+    The limiter is used from the event loop only and needs no lock.
+    """
+
+    def __init__(
+        self,
+        initial: int = INITIAL_LIMIT,
+        min_limit: int = MIN_LIMIT,
+        max_limit: int = MAX_LIMIT,
+        target_latency: float = TARGET_LATENCY_MS / 1000.0,
+        backoff: float = 0.9,
+    ):
+        """
+        Args:
+            initial: Starting limit
+            min_limit: The limit never goes below this
+            max_limit: The limit never goes above this
+            target_latency: Latency in seconds above which the limit shrinks
+            backoff: Multiplicative decrease factor
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.limit = float(max(min_limit, min(max_limit, initial)))
+        self.in_flight = 0
+        self.latency = 0.0  # exponentially weighted mean of the samples
+        self._decreased_at = 0.0
+        CONCURRENCY_LIMIT.set(self.limit)
+
+    def try_acquire(self, priority: str) -> bool:
+        """Admit a request of ``priority`` if its share of the limit has room."""
+        if self.in_flight >= max(1.0, self.limit * PRIORITY_SHARES[priority]):
+            return False
+        self.in_flight += 1
+        IN_FLIGHT.set(self.in_flight)
+        return True
+
+    def suspend(self):
+        """Stop counting an admitted request as in flight (see ``suspended``)."""
+        self.in_flight -= 1
+        IN_FLIGHT.set(self.in_flight)
+
+    def resume(self):
+        """Count a suspended request as in flight again; it is not re-admitted."""
+        self.in_flight += 1
+        IN_FLIGHT.set(self.in_flight)
+
+    def release(self, latency: float, dropped: bool = False, now: Optional[float] = None):
+        """
+        Finish an admitted request and adjust the limit.
+
+        Args:
+            latency: Seconds the request took
+            dropped: Whether it ended in a timeout (always a congestion signal)
+            now: Current ``time.monotonic()`` value (for tests)
+        """
+        now = time.monotonic() if now is None else now
+        used = self.in_flight
+        self.in_flight -= 1
+        IN_FLIGHT.set(self.in_flight)
+        self.latency = latency if not self.latency else 0.9 * self.latency + 0.1 * latency
+        if dropped or latency > self.target_latency:
+            if now - self._decreased_at >= latency:
+                self._decreased_at = now
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        elif used >= self.limit / 2:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        CONCURRENCY_LIMIT.set(self.limit)
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: about one typical request."""
+        return max(1, math.ceil(self.latency))
+
+
+limiter = AdaptiveLimiter()
+
+
+class _Admission:
+    # an admitted request's hold on its limiter
+    def __init__(self, limiter: AdaptiveLimiter):
+        self.limiter = limiter
+        self.suspended = 0.0  # seconds spent in ``suspended`` blocks
+
+
+_admission: ContextVar[Optional[_Admission]] = ContextVar("admission", default=None)
+
+
+@asynccontextmanager
+async def suspended() -> AsyncIterator[None]:
+    """
+    Release the current request's slot while it waits on something that is
+    not work of this server, such as an injected delay.
+
+    The wait neither fills the concurrency limit nor counts towards the
+    request's latency sample, so artificial latency (``X-Delay``, fault
+    injection) is not taken for congestion. Outside an admitted request
+    this does nothing.
+    """
+    admission = _admission.get()
+    if admission is None:
+        yield
+        return
+    admission.limiter.suspend()
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        admission.suspended += time.monotonic() - start
+        admission.limiter.resume()
+
+
+def priority_of(scope: Scope) -> str:
+    """
+    Priority of a request: ``high`` for writes, otherwise ``normal`` unless
+    the client marks it ``X-Priority: low`` (prefetches, batch jobs).
+    Clients can only lower their priority.
+    """
+    if scope["method"] in _WRITE_METHODS:
+        return "high"
+    for name, value in scope["headers"]:
+        if name == PRIORITY_HEADER and value.strip().lower() == b"low":
+            return "low"
+    return "normal"
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware admitting requests through an ``AdaptiveLimiter``.
+
+    A request over its priority's share of the limit is answered at once
+    with 503 ``ERR0007`` and ``Retry-After`` instead of queueing until it
+    times out. ``ALWAYS_ADMITTED`` paths and non-HTTP scopes skip the
+    limiter and do not count towards it. Time a request spends in
+    ``suspended`` is left out of its slot and of its latency sample.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: Optional[AdaptiveLimiter] = None):
+        """
+        Args:
+            app: Wrapped ASGI application
+            limiter: Limiter to admit through (default: the process-wide one)
+        """
+        self.app = app
+        self._limiter = limiter
+
+    @property
+    def limiter(self) -> AdaptiveLimiter:
+        # resolved per request so tests can swap the module-level limiter
+        return self._limiter or limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in ALWAYS_ADMITTED:
+            await self.app(scope, receive, send)
+            return
+
+        current = self.limiter
+        priority = priority_of(scope)
+        if not current.try_acquire(priority):
+            SHED_REQUESTS.labels(priority=priority).inc()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_SHED_BODY)).encode()),
+                    (b"retry-after", str(current.retry_after()).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _SHED_BODY})
+            return
+
+        status = 200
+
+        async def observed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        admission = _Admission(current)
+        token = _admission.set(admission)
+        start = time.monotonic()
+        cancelled = False
+        try:
+            await self.app(scope, receive, observed_send)
+        except asyncio.CancelledError:
+            # cut by the request timeout
+            cancelled = True
+            raise
+        finally:
+            _admission.reset(token)
+            # a timeout reached during an injected delay says nothing about load
+            dropped = (cancelled or status == 504) and not admission.suspended
+            current.release(time.monotonic() - start - admission.suspended, dropped=dropped)
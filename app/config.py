@@ -1,12 +1,97 @@
+import json
+import os
+from typing import Any, Dict, Optional
+from .adapters.repositories.cached.product_repository import CachingProductRepository
 from .adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from .adapters.repositories.inmem.wal import WriteAheadLog
+from .adapters.repositories.sharded.product_repository import ShardedProductRepository
 from .core.services.product_service import ProductServiceImpl
 from dependency_injector import containers, providers
 
+
+def _shard_count() -> int:
+    # CATALOG_SHARDS > 1 partitions the catalog across local shard processes
+    return int(os.getenv("CATALOG_SHARDS", "1"))
+
+
+def _catalog_storage() -> Optional[WriteAheadLog]:
+    # CATALOG_DATA_DIR makes catalog writes durable (snapshot + write-ahead log)
+    directory = os.getenv("CATALOG_DATA_DIR")
+    if not directory:
+        return None
+    return WriteAheadLog(directory, compact_after=int(os.getenv("CATALOG_WAL_COMPACT_AFTER", "100000")))
+
+
+def _catalog_variants() -> Dict[str, Dict[int, Optional[Dict[str, Any]]]]:
+    # CATALOG_VARIANTS_FILE: JSON {"variant": {"<product id>": {fields} or null}} served from startup
+    path = os.getenv("CATALOG_VARIANTS_FILE")
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        variants = json.load(file)
+    return {
+        name: {int(product_id): override for product_id, override in overrides.items()}
+        for name, overrides in variants.items()
+    }
+
+
+def check_settings():
+    """
+    Reject catalog settings that cannot work together, at startup.
+
+    Raises:
+        ValueError: If ``CATALOG_DATA_DIR`` is combined with ``CATALOG_SHARDS`` > 1
+            (shards keep their partitions in memory only, so the writes would
+            silently lose their durability)
+    """
+    if _shard_count() > 1 and os.getenv("CATALOG_DATA_DIR"):
+        raise ValueError("CATALOG_DATA_DIR is not supported with CATALOG_SHARDS > 1: sharded catalogs are not persisted")
+
+
+def _repository_mode() -> str:
+    check_settings()
+    return "sharded" if _shard_count() > 1 else "inmem"
+
+
+def _cache_ttl() -> float:
+    # CATALOG_CACHE_TTL > 0 puts a read-through query cache in front of the backend
+    return float(os.getenv("CATALOG_CACHE_TTL", "0"))
+
+
+def _cache_stale_ttl() -> float:
+    return float(os.getenv("CATALOG_CACHE_STALE_TTL", "30"))
+
+
+def _cache_mode() -> str:
+    return "cached" if _cache_ttl() > 0 else "direct"
+
+
 class Container(containers.DeclarativeContainer):
 
     #Repositories
-    product_repository = providers.Singleton(InMemoryProductRepository)
+    backend_repository = providers.Selector(
+        providers.Callable(_repository_mode),
+        inmem=providers.Singleton(
+            InMemoryProductRepository,
+            storage=providers.Callable(_catalog_storage),
+            variants=providers.Callable(_catalog_variants),
+        ),
+        sharded=providers.Singleton(
+            ShardedProductRepository,
+            shards=providers.Callable(_shard_count),
+            variants=providers.Callable(_catalog_variants),
+        ),
+    )
+    product_repository = providers.Selector(
+        providers.Callable(_cache_mode),
+        direct=backend_repository,
+        cached=providers.Singleton(
+            CachingProductRepository,
+            backend=backend_repository,
+            ttl=providers.Callable(_cache_ttl),
+            stale_ttl=providers.Callable(_cache_stale_ttl),
+        ),
+    )
     
     #Services
     product_service = providers.Factory(ProductServiceImpl, repo=product_repository)
-    
\ No newline at end of file
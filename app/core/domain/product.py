@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class ProductSpecification(BaseModel):
     # Common fields
@@ -30,6 +31,15 @@ class ProductSpecification(BaseModel):
     gaming_features: Optional[str] = Field(description="Gaming-specific features and capabilities", default=None)
     audio: Optional[str] = Field(description="Speaker configuration and audio technologies", default=None)
 
+class NumericSpecification(BaseModel):
+    """Typed numeric values extracted from the free-text specifications at ingestion."""
+    memory_gb: Optional[float] = Field(description="RAM capacity in GB", default=None)
+    storage_gb: Optional[float] = Field(description="Storage capacity in GB", default=None)
+    weight_kg: Optional[float] = Field(description="Weight in kilograms", default=None)
+    battery_hours: Optional[float] = Field(description="Rated battery life in hours", default=None)
+    screen_inches: Optional[float] = Field(description="Display diagonal in inches", default=None)
+    refresh_hz: Optional[float] = Field(description="Display refresh rate in Hz", default=None)
+
 class Product(BaseModel):
     id: int = Field(description="Unique product identifier")
     name: str = Field(description="Product name and model")
@@ -40,4 +50,65 @@ class Product(BaseModel):
     rating: float = Field(description="Customer rating out of 5.0", ge=0, le=5)
     specifications: ProductSpecification = Field(description="Detailed technical specifications")
     availability: str = Field(description="Current stock status (In Stock, Out of Stock)")
-    brand: str = Field(description="Product manufacturer or brand name")
\ No newline at end of file
+    brand: str = Field(description="Product manufacturer or brand name")
+    numeric_specifications: Optional[NumericSpecification] = Field(
+        description="Normalized numeric specification values for filtering, sorting and comparison",
+        default=None
+    )
+
+class ProductChange(BaseModel):
+    """Net change of one product between two catalog generations."""
+    id: int = Field(description="Product identifier")
+    op: str = Field(description="created, updated or deleted")
+    product: Optional[Product] = Field(description="Current product; null when deleted", default=None)
+
+
+class Suggestion(BaseModel):
+    """Autocomplete completion: a product name or a brand."""
+    text: str = Field(description="Completed name or brand")
+    kind: str = Field(description="name or brand")
+    rating: float = Field(description="Best rating among the products it completes to")
+    count: int = Field(description="Number of products it completes to")
+    product_id: Optional[int] = Field(description="Best-rated product with this name; null for brands", default=None)
+
+
+class NumericSummary(BaseModel):
+    """Distribution of a numeric attribute within a group of products."""
+    min: float
+    max: float
+    mean: float
+    p25: float
+    p50: float
+    p75: float
+    p90: float
+    p99: float
+
+
+class GroupSummary(BaseModel):
+    """Aggregates of a group of products (a category, a brand or the whole catalog)."""
+    count: int = Field(description="Number of products")
+    price: NumericSummary
+    rating: NumericSummary
+    availability: Dict[str, float] = Field(description="Share of the products per availability value")
+
+
+class CatalogSummary(BaseModel):
+    """Catalog-wide and per-category/per-brand aggregates of one catalog generation."""
+    generation: int = Field(description="Catalog generation the numbers describe")
+    total: Optional[GroupSummary] = Field(description="Whole catalog; null when it is empty", default=None)
+    categories: Dict[str, GroupSummary]
+    brands: Dict[str, GroupSummary]
+
+
+class PricePoint(BaseModel):
+    """Price of a product at a point in time."""
+    timestamp: datetime = Field(description="When the price was set; start of the bucket for hour/day resolutions")
+    price: float = Field(description="Price; the last one of the bucket for hour/day resolutions")
+
+
+class PriceHistory(BaseModel):
+    """Recorded prices of a product within a time range."""
+    product_id: int = Field(description="Product identifier")
+    resolution: str = Field(description="raw, hour or day")
+    current_price: float = Field(description="Price of the product now")
+    points: List[PricePoint] = Field(description="Oldest first; empty if the price never changed since startup")
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from ..domain.product import Product
-from typing import List, Tuple
+from datetime import datetime
+from ..domain.product import CatalogSummary, PriceHistory, Product, ProductChange, Suggestion
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class ProductService(ABC):
@@ -20,7 +21,7 @@ class ProductService(ABC):
         Args:
             page: Page number (1-based indexing)
             size: Number of products per page
-            **kwargs: Additional parameters (e.g., delay for testing)
+            **kwargs: Additional parameters (filters, text search, sort)
             
         Returns:
             Tuple containing:
@@ -30,4 +31,239 @@ class ProductService(ABC):
         Raises:
             NotImplementedError: Must be implemented by concrete classes
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def find_similar(self, product_id: int, k: int, variant: Optional[str] = None) -> Optional[List[Product]]:
+        """
+        Retrieve the products most similar to a given product.
+        
+        Args:
+            product_id: Identifier of the reference product
+            k: Maximum number of similar products to return
+            variant: Catalog variant to read instead of the base catalog (None for the base)
+            
+        Returns:
+            Optional[List[Product]]: Similar products, closest first, or None
+            if the product does not exist
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+
+    def find_top(self, k: int, weights: Dict[str, float], **kwargs) -> List[Product]:
+        """
+        Retrieve the best-scoring products for a weighted linear score.
+        
+        Args:
+            k: Number of products to return
+            weights: Attribute name -> weight (negative favours lower values)
+            **kwargs: Filters, as accepted by find_paginated
+            
+        Returns:
+            List[Product]: Up to k products, best first
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+
+    def find_by_id(self, product_id: int, variant: Optional[str] = None) -> Optional[Product]:
+        """
+        Retrieve a single product.
+        
+        Args:
+            product_id: Product identifier
+            variant: Catalog variant to read instead of the base catalog (None for the base)
+            
+        Returns:
+            Optional[Product]: The product, or None if it does not exist
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def create(self, product_data: Dict[str, Any]) -> Product:
+        """
+        Add a product.
+        
+        Args:
+            product_data: Product fields; a missing ``id`` is assigned
+            
+        Returns:
+            Product: The stored product
+            
+        Raises:
+            CustomError: If a product with the same id already exists
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def update(self, product_id: int, product_data: Dict[str, Any]) -> Optional[Product]:
+        """
+        Replace an existing product.
+        
+        Args:
+            product_id: Identifier of the product to replace
+            product_data: Complete product fields
+            
+        Returns:
+            Optional[Product]: The stored product, or None if it does not exist
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def patch(self, product_id: int, changes: Dict[str, Any]) -> Optional[Product]:
+        """
+        Change some fields of an existing product.
+        
+        Args:
+            product_id: Identifier of the product to change
+            changes: Fields to overwrite; ``specifications`` is merged key by key
+            
+        Returns:
+            Optional[Product]: The stored product, or None if it does not exist
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def delete(self, product_id: int) -> bool:
+        """
+        Remove a product.
+        
+        Args:
+            product_id: Identifier of the product to remove
+            
+        Returns:
+            bool: True if the product existed
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def find_changes(self, since: int) -> Tuple[int, Optional[List[ProductChange]]]:
+        """
+        Products created, updated or deleted after a catalog generation.
+        
+        Args:
+            since: Catalog generation the caller is at
+            
+        Returns:
+            Tuple containing:
+            - int: Current catalog generation
+            - Optional[List[ProductChange]]: Net change per product, or None
+              when the caller is too far behind and must resync
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def find_suggestions(self, prefix: str, limit: int, variant: Optional[str] = None) -> List[Suggestion]:
+        """
+        Complete a typed prefix to product names and brands.
+        
+        Args:
+            prefix: Typed text (case-insensitive)
+            limit: Maximum number of completions
+            variant: Catalog variant to read instead of the base catalog (None for the base)
+            
+        Returns:
+            List[Suggestion]: Completions, best rated first
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def get_stats(self, variant: Optional[str] = None) -> CatalogSummary:
+        """
+        Overall, per-category and per-brand aggregates of the catalog.
+        
+        Args:
+            variant: Catalog variant to read instead of the base catalog (None for the base)
+            
+        Returns:
+            CatalogSummary: Counts, price/rating distributions and availability ratios
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def find_price_history(
+        self,
+        product_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        resolution: Optional[str] = None,
+    ) -> Optional[PriceHistory]:
+        """
+        Prices a product had within a time range.
+        
+        Args:
+            product_id: Product identifier
+            since: Start of the range (inclusive), or None for the oldest point kept
+            until: End of the range (inclusive), or None for now
+            resolution: raw, hour or day; by default the finest one still covering ``since``
+            
+        Returns:
+            Optional[PriceHistory]: The points, or None if the product does not exist
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+
+    def put_variant(self, name: str, overrides: Dict[int, Optional[Dict[str, Any]]]) -> int:
+        """
+        Create or replace a named catalog variant.
+        
+        Args:
+            name: Variant name, selected per request with ``X-Catalog-Variant``
+            overrides: Product id -> fields to change (merged like ``patch``),
+                or None to hide the product in the variant
+            
+        Returns:
+            int: Number of live products in the variant
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def delete_variant(self, name: str) -> bool:
+        """
+        Stop serving a catalog variant.
+        
+        Args:
+            name: Variant name
+            
+        Returns:
+            bool: True if the variant existed
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
+
+    def list_variants(self) -> Dict[str, int]:
+        """
+        Catalog variants being served.
+        
+        Returns:
+            Dict[str, int]: Variant name -> number of overridden products
+            
+        Raises:
+            NotImplementedError: Must be implemented by concrete classes
+        """
+        raise NotImplementedError
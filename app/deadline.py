@@ -0,0 +1,128 @@
+"""
+Request deadlines carried from the HTTP edge down to the repository.
+
+The observability middleware starts a deadline for every request, from the
+caller's budget (``X-Request-Deadline`` or ``grpc-timeout``) capped by the
+server timeout. The deadline lives in a context variable, so it follows the
+request into the threadpool that runs sync handlers and into the service
+and repository, which call ``check`` between expensive steps and stop as
+soon as the answer can no longer be delivered.
+"""
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterable, Iterator, Optional, Tuple
+from prometheus_client import Counter
+from app.errors import CustomError
+
+DEADLINE_HEADER = b"x-request-deadline"
+GRPC_TIMEOUT_HEADER = b"grpc-timeout"
+
+# grpc-timeout units, in seconds
+_GRPC_UNITS = {"H": 3600.0, "M": 60.0, "S": 1.0, "m": 1e-3, "u": 1e-6, "n": 1e-9}
+_GRPC_TIMEOUT = re.compile(r"^(\d{1,8})([HMSmun])$")
+
+# time.monotonic() value past which the current request is abandoned
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+WORK_ABANDONED = Counter(
+    "request_deadline_abandoned_total",
+    "Requests answered with a timeout while their handler was still running",
+)
+WORK_AVOIDED = Counter(
+    "request_deadline_avoided_total",
+    "Operations skipped because the request deadline had already passed",
+    ["stage"],
+)
+
+
+class DeadlineExceeded(CustomError):
+    """The request's deadline passed before the operation finished (ERR0001, 504)."""
+
+    def __init__(self, stage: str):
+        super().__init__("ERR0001", "Request timed out", 504)
+        self.stage = stage
+
+
+def parse_budget(headers: Iterable[Tuple[bytes, bytes]], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds the caller is willing to wait, from the request headers.
+
+    ``X-Request-Deadline`` is an absolute Unix time in seconds (fractions
+    allowed); ``grpc-timeout`` is a relative budget such as ``250m`` or
+    ``2S``. When both are present the earlier one wins. Malformed values are
+    ignored.
+
+    Args:
+        headers: Raw ASGI header pairs (lower-case names)
+        now: Current Unix time (default: ``time.time()``)
+
+    Returns:
+        Optional[float]: Remaining budget in seconds (zero or negative if
+        already expired), or None if the caller sent no budget
+    """
+    budget = None
+    for name, value in headers:
+        if name == DEADLINE_HEADER:
+            try:
+                seconds = float(value) - (time.time() if now is None else now)
+            except ValueError:
+                continue
+        elif name == GRPC_TIMEOUT_HEADER:
+            match = _GRPC_TIMEOUT.match(value.decode("latin-1").strip())
+            if match is None:
+                continue
+            seconds = int(match.group(1)) * _GRPC_UNITS[match.group(2)]
+        else:
+            continue
+        if seconds == seconds and (budget is None or seconds < budget):  # skip NaN
+            budget = seconds
+    return budget
+
+
+def start(budget: Optional[float]) -> Token:
+    """Give the current context ``budget`` seconds (None: no deadline); pass the token to ``reset``."""
+    return _deadline.set(None if budget is None else time.monotonic() + budget)
+
+
+def reset(token: Token):
+    """Restore the deadline that was current before ``start``."""
+    _deadline.reset(token)
+
+
+@contextmanager
+def scope(budget: Optional[float]) -> Iterator[None]:
+    """Run a block under a ``budget``-second deadline."""
+    token = start(budget)
+    try:
+        yield
+    finally:
+        reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """Whether the current request's deadline has passed."""
+    deadline = _deadline.get()
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def check(stage: str):
+    """
+    Stop the current operation if its deadline has passed.
+
+    Args:
+        stage: Where the check runs (label of the avoided-work counter)
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed
+    """
+    if expired():
+        WORK_AVOIDED.labels(stage=stage).inc()
+        raise DeadlineExceeded(stage)
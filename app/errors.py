@@ -1,18 +1,20 @@
+from typing import Dict, Optional
 from fastapi import Request, FastAPI
 from fastapi.responses import JSONResponse
 
 
 class CustomError(Exception):
-    def __init__(self, code: str, message: str, status_code: int):
+    def __init__(self, code: str, message: str, status_code: int, headers: Optional[Dict[str, str]] = None):
         super().__init__(message)
         self.code = code
         self.status_code = status_code
+        self.headers = headers
 
 
 def error_handler(app: FastAPI):
     @app.exception_handler(CustomError)
     async def custom_handler(request: Request, err: CustomError):
-        return JSONResponse(status_code=err.status_code, content={"code":err.code, "message": str(err)})
+        return JSONResponse(status_code=err.status_code, content={"code":err.code, "message": str(err)}, headers=err.headers)
     
     @app.exception_handler(Exception)
     async def default_handler(request: Request, err: Exception):
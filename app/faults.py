@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from typing import List, Optional
+from fastapi import Header
+from app import admission
+
+
+class FaultState:
+    """
+    Artificial faults injected through ``/admin/fault``, shared in-process by
+    the admin endpoints and the request path.
+    """
+
+    MAX_LATENCY_MS = 5000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency_ms = 0
+        self.leak: List[bytes] = []
+
+    def add_latency(self, inc: int) -> int:
+        """Add ``inc`` ms (capped to 0..MAX_LATENCY_MS) and return the new value."""
+        with self._lock:
+            self.latency_ms = max(0, min(self.MAX_LATENCY_MS, self.latency_ms + inc))
+            return self.latency_ms
+
+    def allocate(self, kb: int) -> int:
+        """Hold on to ``kb`` more kilobytes and return the number of chunks held."""
+        with self._lock:
+            if kb > 0:
+                self.leak.append(b"0" * 1024 * kb)
+            return len(self.leak)
+
+    def reset(self) -> int:
+        """Clear every fault and return the number of chunks freed."""
+        with self._lock:
+            freed = len(self.leak)
+            self.latency_ms = 0
+            self.leak = []
+            return freed
+
+
+faults = FaultState()
+
+
+async def inject_delay(
+    x_delay: Optional[int] = Header(
+        None,
+        description="Optional delay in seconds for performance testing",
+        example=2,
+        ge=0,
+        le=10
+    ),
+):
+    """
+    Route dependency that delays a request by ``X-Delay`` plus the injected latency.
+
+    The wait is awaited on the event loop before the endpoint is dispatched,
+    so a delayed request holds no threadpool worker and other routes keep
+    their latency, like a slow downstream dependency would. It also holds
+    no admission slot (``admission.suspended``).
+    """
+    seconds = (x_delay or 0) + faults.latency_ms / 1000.0
+    if seconds > 0:
+        async with admission.suspended():
+            await asyncio.sleep(seconds)
@@ -11,27 +11,29 @@ from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
 from opentelemetry import trace as _otel_trace
-from .logger import setup_logger, logger_middleware
+from .logger import setup_logger
 import time
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY, CollectorRegistry, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
 from fastapi import Response
-from .middlewares import timeout_middleware
+from .middlewares import DEFAULT_TIMEOUT, ObservabilityMiddleware
+from .faults import faults
+from .admin import check_admin_token
+from .admission import AdmissionMiddleware
+from .rate_limit import RateLimitMiddleware, from_env as rate_limit_buckets
+from .adapters.httphandlers.bulkhead import isolated
 from .adapters.httphandlers.product_handler import router as product_router
-from .config import Container
+from .config import Container, check_settings
 import logging
 import asyncio
 import json
 from datetime import datetime
 from fastapi import HTTPException, Header, Request
 
-# --- Fault injection state (module-level for simplicity) ---
-_artificial_latency_ms: int = 0
-_memory_leak_holder: list[bytes] = []
-_ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "secret")
-
 logger = setup_logger(level=logging.INFO)
 
 # Initialize and wire the dependency injection container
+check_settings()
 container = Container()
 container.wire(modules=["app.adapters.httphandlers.product_handler"])
 
@@ -72,6 +74,14 @@ app = FastAPI(
     ]
 )
 
+# Adaptive concurrency limit and load shedding, innermost so shed responses
+# still get CORS headers, metrics and access logs
+app.add_middleware(AdmissionMiddleware)
+
+# Per-client token buckets shared by the local workers (RATE_LIMIT_RATE > 0
+# enables them); over-budget clients are rejected before taking a slot
+app.add_middleware(RateLimitMiddleware, buckets=rate_limit_buckets())
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -95,12 +105,17 @@ app.add_middleware(
         "Content-Type",
         "Authorization",
         "X-Delay",  # Custom header for performance testing
+        "X-Request-Deadline",  # Caller's deadline (app.deadline)
+        "grpc-timeout",
+        "X-Priority",  # Load shedding priority (app.admission)
+        "X-API-Key",  # Rate limiting identity (app.rate_limit)
         "X-Requested-With",
         "Origin",
         "Cache-Control",
         "Pragma",
     ],
     expose_headers=[
+        "Retry-After",
         "X-Total-Count",
         "X-Page-Count", 
         "Content-Range",
@@ -109,13 +124,6 @@ app.add_middleware(
 
 app.include_router(product_router)
 
-# Prometheus metrics (RED/USE & Golden Signals)
-# Requests: total count, duration, in-progress
-REQUEST_COUNT = Counter("http_requests_total", "Total HTTP requests", ["method", "endpoint", "http_status"])
-REQUEST_ERRORS = Counter("http_request_errors_total", "Total HTTP request errors", ["method", "endpoint", "http_status"])
-REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency in seconds", ["method", "endpoint"])
-IN_PROGRESS = Gauge("http_requests_inprogress", "In-progress HTTP requests", ["method", "endpoint"])
-
 # Container/process metrics
 CONTAINER_START_TIME = Gauge("container_start_time_seconds", "Container start time in unix seconds")
 CONTAINER_UPTIME = Gauge("container_uptime_seconds", "Container uptime in seconds")
@@ -138,46 +146,28 @@ ARTIFICIAL_LATENCY_INJECTED_MS.set(0)
 MEMORY_LEAK_CHUNKS.set(0)
 
 
-@app.middleware("http")
-async def prometheus_middleware(request, call_next):
-    method = request.method
-    endpoint = request.url.path
-    IN_PROGRESS.labels(method=method, endpoint=endpoint).inc()
-    start = time.time()
-    try:
-        resp = await call_next(request)
-        status = resp.status_code
-        # count requests and errors
-        REQUEST_COUNT.labels(method=method, endpoint=endpoint, http_status=status).inc()
-        if status >= 400:
-            REQUEST_ERRORS.labels(method=method, endpoint=endpoint, http_status=status).inc()
-        return resp
-    except Exception:
-        # unexpected exception - record as 500
-        REQUEST_ERRORS.labels(method=method, endpoint=endpoint, http_status=500).inc()
-        raise
-    finally:
-        elapsed = time.time() - start
-        REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(elapsed)
-        IN_PROGRESS.labels(method=method, endpoint=endpoint).dec()
+def _metrics_registry():
+    # with several workers (app.server) every process writes its samples to
+    # PROMETHEUS_MULTIPROC_DIR and a scrape aggregates all of them
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
 
 
 @app.get("/metrics")
+@isolated("ops")
 def metrics():
     # update uptime on scrape
     CONTAINER_UPTIME.set(time.time() - _start_time)
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(_metrics_registry()), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/health")
-def health():
-    """Health check endpoint"""
-    return {"status": "healthy", "uptime": time.time() - _start_time, "artificial_latency_ms": _artificial_latency_ms, "leak_chunks": len(_memory_leak_holder)}
-
-
-def _auth_admin(x_admin_token: str | None):
-    if x_admin_token != _ADMIN_TOKEN:
-        raise HTTPException(status_code=401, detail="invalid admin token")
+async def health():
+    """Health check endpoint; runs on the event loop, so no bulkhead can starve it"""
+    return {"status": "healthy", "uptime": time.time() - _start_time, "artificial_latency_ms": faults.latency_ms, "leak_chunks": len(faults.leak)}
 
 
 @app.post("/admin/fault")
@@ -186,23 +176,16 @@ async def inject_fault(mode: str, inc: int = 0, kb: int = 0, x_admin_token: str
     - mode=latency & inc=NN adds milliseconds per request (capped)
     - mode=leak & kb=NN allocates memory chunks (approx)
     """
-    _auth_admin(x_admin_token)
-    global _artificial_latency_ms
+    check_admin_token(x_admin_token)
     if mode == "latency":
-        _artificial_latency_ms = max(0, min(5000, _artificial_latency_ms + inc))
-        ARTIFICIAL_LATENCY_INJECTED_MS.set(_artificial_latency_ms)
-        # Expor também via env para que camadas internas (ex: repository) possam compor com X-Delay sem dependência circular
-        try:
-            os.environ["ARTIFICIAL_LATENCY_MS"] = str(_artificial_latency_ms)
-        except Exception:
-            pass
-        return {"mode": mode, "artificial_latency_ms": _artificial_latency_ms}
+        # read by the inject_delay dependency on the next request; no env round trip
+        latency_ms = faults.add_latency(inc)
+        ARTIFICIAL_LATENCY_INJECTED_MS.set(latency_ms)
+        return {"mode": mode, "artificial_latency_ms": latency_ms}
     elif mode == "leak":
-        # allocate kb chunk
-        if kb > 0:
-            _memory_leak_holder.append(b"0" * 1024 * kb)
-        MEMORY_LEAK_CHUNKS.set(len(_memory_leak_holder))
-        return {"mode": mode, "leak_chunks": len(_memory_leak_holder), "allocated_kb": kb}
+        chunks = faults.allocate(kb)
+        MEMORY_LEAK_CHUNKS.set(chunks)
+        return {"mode": mode, "leak_chunks": chunks, "allocated_kb": kb}
     else:
         raise HTTPException(status_code=400, detail="unknown mode")
 
@@ -210,17 +193,10 @@ async def inject_fault(mode: str, inc: int = 0, kb: int = 0, x_admin_token: str
 @app.post("/admin/mitigate")
 async def mitigate(request: Request, all: bool = True, x_admin_token: str | None = Header(default=None)):
     """Reset artificial faults (self-healing action)."""
-    _auth_admin(x_admin_token)
-    global _artificial_latency_ms
-    _artificial_latency_ms = 0
-    freed = len(_memory_leak_holder)
-    _memory_leak_holder.clear()
+    check_admin_token(x_admin_token)
+    freed = faults.reset()
     # update gauges
     ARTIFICIAL_LATENCY_INJECTED_MS.set(0)
-    try:
-        os.environ["ARTIFICIAL_LATENCY_MS"] = "0"
-    except Exception:
-        pass
     MEMORY_LEAK_CHUNKS.set(0)
     # Emit structured log so Loki/Grafana panels can also show manual mitigation events
     try:
@@ -260,14 +236,12 @@ except Exception:
 # Custom error handlers
 error_handler(app)
 
-# Logger middleware
-logger_middleware(app, logger)
-
-# Timeout middleware
-timeout_middleware(app)
+# Metrics, access log, trace correlation and timeout in one pure ASGI layer
+# (outside CORS; /metrics and /health bypass it)
+app.add_middleware(ObservabilityMiddleware, logger=logger, timeout=DEFAULT_TIMEOUT)
 
-# (Middleware de latência global removido; agora a latência artificial é aplicada
-# diretamente na camada de repositório combinando X-Delay + ARTIFICIAL_LATENCY_MS.)
+# (A latência artificial e o X-Delay são aplicados pela dependência assíncrona
+# app.faults.inject_delay, aguardada no event loop antes do handler.)
 
 
 def configure_opentelemetry(app: FastAPI, logger: logging.Logger) -> bool:
@@ -1,7 +1,16 @@
 import asyncio
+import os
+import time
+from typing import Dict, Optional, Sequence, Tuple
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from opentelemetry.trace import get_current_span
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.routing import BaseRoute, Mount
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
+from . import deadline
 
 DEFAULT_TIMEOUT = 5  # seconds
 
@@ -31,3 +40,301 @@ def timeout_middleware(app: FastAPI, timeout: int = DEFAULT_TIMEOUT, logger: log
             )
 
     return middleware
+
+
+# Prometheus metrics (RED/USE & Golden Signals)
+# Requests: total count, duration, in-progress
+REQUEST_COUNT = Counter("http_requests_total", "Total HTTP requests", ["method", "endpoint", "http_status"])
+REQUEST_ERRORS = Counter("http_request_errors_total", "Total HTTP request errors", ["method", "endpoint", "http_status"])
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency in seconds", ["method", "endpoint"])
+IN_PROGRESS = Gauge("http_requests_inprogress", "In-progress HTTP requests", ["method", "endpoint"])
+
+METRIC_SERIES_OVERFLOW = Counter(
+    "http_metrics_series_overflow_total",
+    "Requests recorded under the overflow labels because the series cap was reached",
+)
+
+# distinct (method, endpoint[, status]) label sets before requests go to the overflow labels
+MAX_METRIC_SERIES = int(os.getenv("HTTP_METRICS_MAX_SERIES", "2000"))
+# endpoint label of paths matching no route, and of requests over the series cap
+UNMATCHED_ENDPOINT = "<unmatched>"
+OVERFLOW_ENDPOINT = "<overflow>"
+# endpoint label of the files served by a static mount at "/" (the frontend)
+FRONTEND_ENDPOINT = "<frontend>"
+_KNOWN_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+# paths served without metrics, access log or timeout (scrapes and probes)
+BYPASS_PATHS = frozenset(("/metrics", "/health"))
+# largest request body copied into the access log
+MAX_LOGGED_BODY = 1024
+_LOGGED_BODY_METHODS = frozenset(("POST", "PUT", "PATCH"))
+_TIMEOUT_BODY = b'{"code":"ERR0001","message":"Request timed out"}'
+
+
+def _trace_ids() -> Tuple[Optional[str], Optional[str]]:
+    # trace/span ids of the active OpenTelemetry span, if any
+    try:
+        ctx = get_current_span().get_span_context()
+    except Exception:
+        return None, None
+    trace_id = format(ctx.trace_id, "032x") if ctx and ctx.trace_id else None
+    span_id = format(ctx.span_id, "016x") if ctx and ctx.span_id else None
+    return trace_id, span_id
+
+
+class RouteLabeler:
+    """
+    Endpoint label of a request path: the template of the route it matches
+    (``/v1/products/{product_id}``), ``FRONTEND_ENDPOINT`` for files of a
+    static mount at "/" and ``UNMATCHED_ENDPOINT`` otherwise, so labels are
+    bounded by the routes and not by what clients send.
+
+    A mount at "/" matches every path, so it only labels the paths it has a
+    file for; the rest (``/v1/nope``, scanner probes) stay unmatched. Paths
+    of routes without parameters and frontend files are cached; other paths
+    are matched against the route regexes in routing order (method ignored).
+    """
+
+    CACHE_SIZE = 1024
+
+    def __init__(self, routes: Sequence[BaseRoute]):
+        """
+        Args:
+            routes: The application's routes (live list; later additions are seen)
+        """
+        self._routes = routes
+        self._exact: Dict[str, str] = {}
+
+    def __call__(self, path: str) -> str:
+        label = self._exact.get(path)
+        if label is not None:
+            return label
+        for route in self._routes:
+            if isinstance(route, Mount) and route.path == "":
+                if not _serves(route.app, path):
+                    continue
+                label = FRONTEND_ENDPOINT
+            else:
+                regex = getattr(route, "path_regex", None)
+                if regex is None or not regex.match(path):
+                    continue
+                label = route.path_format
+            if label in (path, FRONTEND_ENDPOINT) and len(self._exact) < self.CACHE_SIZE:
+                self._exact[path] = label
+            return label
+        return UNMATCHED_ENDPOINT
+
+
+def _serves(app: ASGIApp, path: str) -> bool:
+    # whether a static mount at "/" has a file (or, in html mode, a directory) for path
+    if not isinstance(app, StaticFiles):
+        return False
+    try:
+        _, stat = app.lookup_path(os.path.normpath(os.path.join(*path.split("/"))))
+    except (OSError, ValueError):  # name too long, NUL byte...
+        return False
+    return stat is not None
+
+
+class RequestMetrics:
+    """
+    Labelled children of the HTTP request metrics, cached per label set.
+
+    ``.labels()`` hashes and validates the label values on every call; the
+    children are looked up here once per (method, endpoint) and
+    (method, endpoint, status) instead. At most ``max_series`` label sets
+    are created: past the cap, requests are recorded under method ``OTHER``
+    and endpoint ``OVERFLOW_ENDPOINT`` and counted by
+    ``http_metrics_series_overflow_total``, so neither Prometheus nor the
+    ``/metrics`` render grows without bound.
+    """
+
+    def __init__(self, max_series: int = MAX_METRIC_SERIES):
+        self.max_series = max_series
+        self._routes: Dict[Tuple[str, str], tuple] = {}
+        self._statuses: Dict[Tuple[str, str, int], tuple] = {}
+
+    def _full(self) -> bool:
+        if len(self._routes) + len(self._statuses) < self.max_series:
+            return False
+        METRIC_SERIES_OVERFLOW.inc()
+        return True
+
+    def route(self, method: str, endpoint: str) -> tuple:
+        """(in-progress gauge, latency histogram) children of a request."""
+        if method not in _KNOWN_METHODS:
+            method = "OTHER"
+        key = (method, endpoint)
+        children = self._routes.get(key)
+        if children is None:
+            if self._full():
+                key = ("OTHER", OVERFLOW_ENDPOINT)
+                children = self._routes.get(key)
+            if children is None:
+                children = self._routes[key] = (
+                    IN_PROGRESS.labels(method=key[0], endpoint=key[1]),
+                    REQUEST_LATENCY.labels(method=key[0], endpoint=key[1]),
+                )
+        return children
+
+    def status(self, method: str, endpoint: str, status: int) -> tuple:
+        """(request counter, error counter or None) children of a finished request."""
+        if method not in _KNOWN_METHODS:
+            method = "OTHER"
+        key = (method, endpoint, status)
+        children = self._statuses.get(key)
+        if children is None:
+            if self._full():
+                key = ("OTHER", OVERFLOW_ENDPOINT, status)
+                children = self._statuses.get(key)
+            if children is None:
+                labels = {"method": key[0], "endpoint": key[1], "http_status": key[2]}
+                children = self._statuses[key] = (
+                    REQUEST_COUNT.labels(**labels),
+                    REQUEST_ERRORS.labels(**labels) if status >= 400 else None,
+                )
+        return children
+
+
+class ObservabilityMiddleware:
+    """
+    Pure ASGI middleware doing metrics, access logging, trace correlation
+    and the request timeout in a single pass.
+
+    It replaces a stack of ``@app.middleware("http")`` layers: each of those
+    is a ``BaseHTTPMiddleware`` that runs the rest of the app in its own
+    task and re-streams the response through a memory channel, so the
+    per-request overhead of the stack exceeded the cost of most handlers.
+    Here the request is observed by wrapping ``receive``/``send`` only: the
+    status comes from ``http.response.start`` and the logged body is copied
+    from the ``http.request`` messages as the app reads them.
+
+    Metrics are labelled by route template (``RouteLabeler``) through the
+    cached, capped children of ``RequestMetrics``; the access log keeps the
+    raw path.
+
+    The timeout is also the request's deadline (``app.deadline``), shortened
+    to the caller's own budget when it sends ``X-Request-Deadline`` or
+    ``grpc-timeout``; requests arriving past their deadline get a 504
+    without reaching the app.
+
+    ``/metrics``, ``/health`` and non-HTTP scopes go straight to the app.
+    """
+
+    def __init__(self, app: ASGIApp, logger: Optional[logging.Logger] = None, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Args:
+            app: Wrapped ASGI application
+            logger: Access log destination; None disables the access log
+            timeout: Seconds a request may take before a 504 is returned
+                (only while the response has not started); callers can ask
+                for less, not more
+        """
+        self.app = app
+        self.logger = logger
+        self.timeout = timeout
+        self.metrics = RequestMetrics()
+        self._labeler: Optional[RouteLabeler] = None
+
+    def _endpoint(self, scope: Scope) -> str:
+        # route template of the request, from the routes of the application serving it
+        if self._labeler is None:
+            router = getattr(scope.get("app"), "router", None)
+            if router is None:
+                return UNMATCHED_ENDPOINT
+            self._labeler = RouteLabeler(router.routes)
+        return self._labeler(scope["path"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in BYPASS_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        status = 500
+        started = False
+        body = bytearray() if self.logger and method in _LOGGED_BODY_METHODS else None
+
+        async def observed_receive() -> Message:
+            message = await receive()
+            if body is not None and message["type"] == "http.request" and len(body) <= MAX_LOGGED_BODY:
+                body.extend(message.get("body", b"")[:MAX_LOGGED_BODY + 1 - len(body)])
+            return message
+
+        async def observed_send(message: Message):
+            nonlocal status, started
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                started = True
+            await send(message)
+
+        endpoint = self._endpoint(scope)
+        in_progress, latency = self.metrics.route(method, endpoint)
+        in_progress.inc()
+        start = time.perf_counter()
+        budget = deadline.parse_budget(scope["headers"])
+        budget = self.timeout if budget is None else min(budget, self.timeout)
+        token = deadline.start(budget)
+        try:
+            if budget <= 0:
+                # the caller has already given up: do not start the work at all
+                deadline.WORK_AVOIDED.labels(stage="admission").inc()
+                status = 504
+                await self._send_timeout(send)
+            else:
+                await asyncio.wait_for(self.app(scope, observed_receive, observed_send), timeout=budget)
+        except asyncio.TimeoutError:
+            # a sync handler keeps running in its thread until its next deadline check
+            deadline.WORK_ABANDONED.inc()
+            if self.logger:
+                self.logger.warning("Request timed out", extra={"method": method, "path": path})
+            # once the response has started the server can only drop the connection
+            if not started:
+                status = 504
+                await self._send_timeout(send)
+        except Exception:
+            # unexpected exception - record as 500
+            self.metrics.status(method, endpoint, 500)[1].inc()
+            raise
+        finally:
+            deadline.reset(token)
+            elapsed = time.perf_counter() - start
+            latency.observe(elapsed)
+            in_progress.dec()
+
+        count, errors = self.metrics.status(method, endpoint, status)
+        count.inc()
+        if errors is not None:
+            errors.inc()
+        if self.logger:
+            self._log(scope, status, elapsed, body)
+
+    @staticmethod
+    async def _send_timeout(send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(_TIMEOUT_BODY)).encode())],
+        })
+        await send({"type": "http.response.body", "body": _TIMEOUT_BODY})
+
+    def _log(self, scope: Scope, status: int, elapsed: float, body: Optional[bytearray]):
+        query = scope.get("query_string", b"")
+        extra = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": query.decode("latin-1") if query else None,
+            "status_code": status,
+            "duration_ms": round(elapsed * 1000, 2),
+        }
+        if body and len(body) <= MAX_LOGGED_BODY:
+            extra["request_body"] = body.decode("utf-8", errors="replace")
+        trace_id, span_id = _trace_ids()
+        if trace_id:
+            extra["trace_id"] = trace_id
+            extra["trace"] = trace_id
+        if span_id:
+            extra["span_id"] = span_id
+            extra["span"] = span_id
+        self.logger.info("HTTP request completed", extra=extra)
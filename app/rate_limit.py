@@ -0,0 +1,298 @@
+"""
+Per-client, cost-aware token-bucket rate limiting shared by every worker
+process on the host.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+from prometheus_client import Counter
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: buckets are per process
+    fcntl = None
+
+# RATE_LIMIT_RATE > 0 enables the limiter (tokens per second per client)
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "0"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "100"))
+RATE_LIMIT_SLOTS = int(os.getenv("RATE_LIMIT_SLOTS", "4096"))
+_SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+RATE_LIMIT_FILE = os.getenv("RATE_LIMIT_FILE", os.path.join(_SHM_DIR, "products-api-ratelimit"))
+
+API_KEY_HEADER = b"x-api-key"
+# query parameters bounding how many products a request returns
+SIZE_PARAMS = ("page_size", "k", "limit")
+# products returned per token
+ITEMS_PER_TOKEN = 10
+# set by routes whose size is only known once computed (the change feed):
+# the items they returned, charged after the response
+RESULT_COUNT_HEADER = b"x-result-count"
+EXEMPT_PATHS = frozenset(("/health", "/metrics"))
+_LIMITED_BODY = b'{"code":"ERR0008","message":"Rate limit exceeded"}'
+
+RATE_LIMIT_DECISIONS = Counter("rate_limit_decisions_total", "Rate limiter decisions", ["decision"])
+RATE_LIMIT_TOKENS = Counter("rate_limit_tokens_total", "Tokens requested from the rate limiter", ["decision"])
+RATE_LIMIT_EVICTIONS = Counter(
+    "rate_limit_evictions_total",
+    "Client buckets dropped to make room for another client",
+)
+
+_HEADER = struct.Struct("<4sII")  # magic, slot count, slots per group
+_SLOT = struct.Struct("<Qdd")  # client key hash (0: free), tokens, last update (time.monotonic())
+_MAGIC = b"TBK1"
+# slots probed for one client; a group is also the unit of locking
+GROUP_SLOTS = 8
+
+
+def client_hash(key: str) -> int:
+    """Stable non-zero 64-bit hash of a client key (``hash()`` differs per process)."""
+    value = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+    return value or 1
+
+
+class SharedTokenBuckets:
+    """
+    Token buckets in a memory-mapped file, shared by the processes mapping it.
+
+    The file (under ``/dev/shm`` by default, i.e. in shared memory) holds a
+    fixed table of ``(key hash, tokens, updated)`` slots, hashed into groups
+    of ``GROUP_SLOTS``. A client lives in one slot of its group; when the
+    group is full, the slot updated longest ago is reused (its client gets
+    a full bucket on its next request, the lenient side). Each access locks
+    only its group, with an ``fcntl`` byte-range lock on the file, so
+    workers serialize on the same client and not on each other. Time comes
+    from ``time.monotonic()``, which is system-wide on Linux.
+
+    A file with a different layout (slot count changed) is reset.
+    """
+
+    def __init__(self, path: str, rate: float, burst: float, slots: int = RATE_LIMIT_SLOTS):
+        """
+        Args:
+            path: File backing the shared table (created if missing)
+            rate: Tokens added per second to every bucket
+            burst: Bucket capacity
+            slots: Number of client slots (rounded down to whole groups)
+        """
+        self.rate = rate
+        self.burst = burst
+        self.groups = max(1, slots // GROUP_SLOTS)
+        self.slots = self.groups * GROUP_SLOTS
+        size = _HEADER.size + self.slots * _SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()  # fcntl locks do not exclude threads of one process
+        header = _HEADER.pack(_MAGIC, self.slots, GROUP_SLOTS)
+        self._lock_range(0, 0)
+        try:
+            if os.fstat(self._fd).st_size != size or os.pread(self._fd, _HEADER.size, 0) != header:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, header, 0)
+        finally:
+            self._unlock_range(0, 0)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _lock_range(self, offset: int, length: int):
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, offset)
+
+    def _unlock_range(self, offset: int, length: int):
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, length, offset)
+
+    def acquire(self, key: str, cost: float, now: Optional[float] = None) -> Tuple[bool, float]:
+        """
+        Take ``cost`` tokens from the bucket of ``key``.
+
+        Args:
+            key: Client identity (API key or address)
+            cost: Tokens the request costs (capped to the burst)
+            now: Current ``time.monotonic()`` value (for tests)
+
+        Returns:
+            Tuple containing:
+            - bool: Whether the request is allowed
+            - float: Seconds until it would be allowed (0 if allowed)
+        """
+        cost = min(cost, self.burst)
+        allowed, tokens = self._take(key, cost, now, force=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / self.rate
+
+    def debit(self, key: str, cost: float, now: Optional[float] = None):
+        """
+        Take ``cost`` tokens from the bucket of ``key`` even if it does not
+        hold them, for work whose size is only known once it is done.
+
+        The bucket may go negative, down to minus the burst: the client's
+        next requests wait until it has paid the debt back.
+
+        Args:
+            key: Client identity (API key or address)
+            cost: Tokens to take
+            now: Current ``time.monotonic()`` value (for tests)
+        """
+        self._take(key, cost, now, force=True)
+
+    def _take(self, key: str, cost: float, now: Optional[float], force: bool) -> Tuple[bool, float]:
+        # (taken, tokens left or available) after refilling the client's bucket
+        now = time.monotonic() if now is None else now
+        key_hash = client_hash(key)
+        start = _HEADER.size + (key_hash % self.groups) * GROUP_SLOTS * _SLOT.size
+        length = GROUP_SLOTS * _SLOT.size
+        with self._lock:
+            self._lock_range(start, length)
+            try:
+                at, tokens, updated = self._slot(start, key_hash, now)
+                tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+                taken = force or tokens >= cost
+                if taken:
+                    tokens = max(-self.burst, tokens - cost)
+                _SLOT.pack_into(self._map, at, key_hash, tokens, now)
+            finally:
+                self._unlock_range(start, length)
+        return taken, tokens
+
+    def _slot(self, start: int, key_hash: int, now: float) -> Tuple[int, float, float]:
+        # offset and state of the client's slot in its group (locked by the caller)
+        free = None
+        oldest, oldest_updated = start, math.inf
+        for at in range(start, start + GROUP_SLOTS * _SLOT.size, _SLOT.size):
+            slot_hash, tokens, updated = _SLOT.unpack_from(self._map, at)
+            if slot_hash == key_hash:
+                return at, tokens, updated
+            if slot_hash == 0:
+                if free is None:
+                    free = at
+            elif updated < oldest_updated:
+                oldest, oldest_updated = at, updated
+        if free is None:
+            RATE_LIMIT_EVICTIONS.inc()
+            free = oldest
+        return free, self.burst, now
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+def from_env() -> Optional[SharedTokenBuckets]:
+    """The host-wide buckets configured by ``RATE_LIMIT_*``, or None when disabled."""
+    if RATE_LIMIT_RATE <= 0:
+        return None
+    return SharedTokenBuckets(RATE_LIMIT_FILE, RATE_LIMIT_RATE, RATE_LIMIT_BURST, RATE_LIMIT_SLOTS)
+
+
+def client_key(scope: Scope) -> str:
+    """API key when the client sends one, otherwise its address."""
+    for name, value in scope["headers"]:
+        if name == API_KEY_HEADER and value:
+            return "key:" + value.decode("latin-1")
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def request_cost(scope: Scope) -> float:
+    """
+    Tokens a request costs up front: one per ``ITEMS_PER_TOKEN`` products
+    it may return (``page_size``, ``k`` or ``limit``), at least one.
+    Responses with ``RESULT_COUNT_HEADER`` are charged the rest afterwards
+    (see ``result_cost``).
+    """
+    query = scope.get("query_string")
+    if not query:
+        return 1.0
+    params = parse_qs(query.decode("latin-1"))
+    for name in SIZE_PARAMS:
+        if name in params:
+            try:
+                return max(1.0, math.ceil(int(params[name][0]) / ITEMS_PER_TOKEN))
+            except ValueError:
+                break  # the handler rejects it
+    return 1.0
+
+
+def result_cost(headers) -> Optional[float]:
+    """
+    Tokens a response costs by the items it reports in
+    ``RESULT_COUNT_HEADER``, or None when it does not report any.
+    """
+    for name, value in headers:
+        if name.lower() == RESULT_COUNT_HEADER:
+            try:
+                return max(1.0, math.ceil(int(value) / ITEMS_PER_TOKEN))
+            except ValueError:
+                return None
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware charging each request's cost to its client's bucket.
+
+    Over budget, the request gets 429 ``ERR0008`` with ``Retry-After`` set
+    to when the bucket will hold enough tokens. A response reporting its
+    size in ``RESULT_COUNT_HEADER`` is debited the cost of that size beyond
+    what was charged up front, after it is sent. ``/health``, ``/metrics``
+    and ``/admin/*`` are not limited.
+    """
+
+    def __init__(self, app: ASGIApp, buckets: Optional[SharedTokenBuckets] = None):
+        """
+        Args:
+            app: Wrapped ASGI application
+            buckets: Shared buckets; None disables the limiter
+        """
+        self.app = app
+        self.buckets = buckets
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        path = scope.get("path", "")
+        if (
+            self.buckets is None
+            or scope["type"] != "http"
+            or path in EXEMPT_PATHS
+            or path.startswith("/admin/")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope)
+        cost = request_cost(scope)
+        allowed, wait = self.buckets.acquire(key, cost)
+        decision = "allowed" if allowed else "limited"
+        RATE_LIMIT_DECISIONS.labels(decision=decision).inc()
+        RATE_LIMIT_TOKENS.labels(decision=decision).inc(cost)
+        if allowed:
+            actual = None
+
+            async def send_wrapper(message):
+                nonlocal actual
+                if message["type"] == "http.response.start":
+                    actual = result_cost(message.get("headers", ()))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if actual is not None and actual > cost:
+                    self.buckets.debit(key, actual - cost)
+                    RATE_LIMIT_TOKENS.labels(decision="debited").inc(actual - cost)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_LIMITED_BODY)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": _LIMITED_BODY})
@@ -0,0 +1,257 @@
+"""
+Production launcher: loads the application and its catalog once in a master
+process, then forks the HTTP workers.
+
+    python -m app.server --workers 4
+
+The workers inherit the catalog already built, sharing its memory pages
+copy-on-write instead of each parsing and indexing its own copy. The master
+freezes the garbage collector before forking, so collections in the
+workers do not write to the headers of the preloaded objects and un-share
+their pages. uvloop and httptools are used when installed.
+
+The master only supervises: it restarts workers that die and, on SIGTERM
+or SIGINT, stops them gracefully.
+
+It runs a single worker unless ``--workers`` or ``WEB_CONCURRENCY`` asks
+for more, because most of the service's state lives in each worker's
+memory and is not shared with the others:
+
+- fault injection: ``/admin/fault`` and ``/admin/mitigate`` change only the
+  worker that received them, so the predictive monitor's single mitigate
+  call does not reach the rest
+- catalog writes, catalog variants, the ``/changes`` log and the price
+  history: each worker has its own copy, and a write is visible only on the
+  worker that took it
+- admission control and bulkheads (rate limiting is already host-wide)
+
+More than one worker is therefore only for read-only deployments with no
+fault injection. ``CATALOG_DATA_DIR`` (one write-ahead log writer) and
+``CATALOG_SHARDS`` > 1 (every worker would start its own shard processes)
+are refused with more than one worker.
+"""
+import argparse
+import gc
+import importlib.util
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+# WEB_CONCURRENCY is the worker count most ASGI/WSGI servers read; more than
+# one is opt-in, since per-process state is not shared (see above)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# seconds a worker has to finish its requests on shutdown before SIGKILL
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+BACKLOG = 2048
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def event_loop() -> str:
+    """uvicorn loop implementation: uvloop when installed."""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    """uvicorn HTTP implementation: httptools when installed."""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def preload(catalog: Optional[str] = None):
+    """
+    Import the application and build its catalog in this process, then
+    freeze the garbage collector.
+
+    Sharded catalogs (``CATALOG_SHARDS`` > 1) are not built here: their shard
+    processes and pipes cannot be shared across a fork, so the (single)
+    worker starts them on first use.
+
+    Args:
+        catalog: Optional data.json-format file to serve instead of the bundled one
+
+    Returns:
+        The ASGI application
+    """
+    from dependency_injector import providers
+    from app import config, main
+
+    if catalog is not None:
+        from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+
+        repository = InMemoryProductRepository(
+            products=read_products(catalog), variants=config._catalog_variants()
+        )
+        main.container.backend_repository.override(providers.Object(repository))
+    if catalog is not None or config._shard_count() <= 1:
+        main.container.product_repository()
+    gc.collect()
+    # everything allocated so far goes to the permanent generation, never scanned
+    gc.freeze()
+    return main.app
+
+
+def bind(host: str, port: int) -> socket.socket:
+    """Listening socket shared by the workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket):
+    import uvicorn
+
+    config = uvicorn.Config(
+        app,
+        loop=event_loop(),
+        http=http_protocol(),
+        log_config=None,  # keep the JSON handlers set up by app.logger
+        log_level="info",
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    """Forks and supervises the workers serving ``app`` on ``sock``."""
+
+    def __init__(self, app, sock: socket.socket, workers: int):
+        """
+        Args:
+            app: Preloaded ASGI application
+            sock: Bound listening socket
+            workers: Number of worker processes
+        """
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _run_worker(self.app, self.sock)
+            except BaseException:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker", extra={"pid": pid})
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        while not self.stopping:
+            self.reap(respawn=True)
+            time.sleep(0.5)
+        self.shutdown()
+
+    def reap(self, respawn: bool):
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            _mark_process_dead(pid)
+            if respawn and not self.stopping:
+                logger.warning("Worker exited, restarting", extra={"pid": pid, "status": status})
+                if time.monotonic() - started < 1.0:
+                    time.sleep(1.0)  # crashing at startup: do not spin
+                self.spawn()
+
+    def shutdown(self):
+        for pid in self.children:
+            _signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap(respawn=False)
+            time.sleep(0.1)
+        for pid in self.children:
+            _signal(pid, signal.SIGKILL)
+        while self.children:
+            pid, _ = os.waitpid(-1, 0)
+            self.children.pop(pid, None)
+
+
+def _signal(pid: int, signum: int):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def _mark_process_dead(pid: int):
+    # drop the live gauges of a dead worker from the shared metrics directory
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Worker processes (default: WEB_CONCURRENCY or 1)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--catalog", help="data.json-format file to serve instead of the bundled catalog")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and os.getenv("CATALOG_DATA_DIR"):
+        parser.error("CATALOG_DATA_DIR needs --workers 1: the write-ahead log has a single writer")
+    if args.workers > 1 and int(os.getenv("CATALOG_SHARDS", "1")) > 1:
+        parser.error("CATALOG_SHARDS > 1 needs --workers 1: every worker would start its own shards")
+
+    metrics_dir = None
+    if args.workers > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # must be set before prometheus_client is imported; /metrics then aggregates every worker
+        metrics_dir = tempfile.mkdtemp(prefix="products-api-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    try:
+        app = preload(args.catalog)
+        logger.setLevel(logging.INFO)
+        sock = bind(args.host, args.port)
+        logger.info(
+            "Serving",
+            extra={
+                "workers": args.workers,
+                "host": args.host,
+                "port": args.port,
+                "loop": event_loop(),
+                "http": http_protocol(),
+            },
+        )
+        Master(app, sock, args.workers).run()
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark: how load time, memory and query latency scale with catalog size.
+
+For every size a synthetic catalog (see catalog_generator.py) is written to
+a temporary data.json-format file and measured in a fresh child process, so
+RSS numbers are not polluted by earlier sizes:
+
+- load: reading the JSON file and building the InMemoryProductRepository
+- rss: resident memory after loading
+- per query (unfiltered, filtered, expression, sorted, deep page): latency
+  percentiles of the repository call, of encoding the PaginatedResponse and,
+  with --http, of the whole request through the FastAPI app
+
+Uso:
+    PYTHONPATH=. python tests/perf/bench_scaling.py --sizes 1000,10000,100000,1000000 --output scaling.json
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = {
+    "unfiltered": dict(page=1, size=20),
+    "filtered": dict(page=1, size=20, category="Laptops", min_price=1000, max_price=2000, min_rating=4),
+    "expression": dict(page=1, size=20, filter='brand in ("Apple","Samsung") and memory_gb >= 8'),
+    "sorted": dict(page=1, size=20, category="Smartphones", sort="-rating"),
+    "deep_page": dict(page=None, size=50),
+}
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # peak RSS (KiB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+
+    def at(q):
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))], 3)
+    return {"p50_ms": round(statistics.median(samples), 3), "p95_ms": at(0.95), "p99_ms": at(0.99)}
+
+
+def _timed(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return _percentiles(samples)
+
+
+def _query_string(query):
+    params = {"page_size" if key == "size" else key: value for key, value in query.items()}
+    return urlencode(params)
+
+
+def measure(path: str, rows: int, repeat: int, http: bool) -> dict:
+    """Child-process side: load one catalog file and time every query."""
+    from app.adapters.httphandlers.product_dto import PaginatedResponse
+    from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    products = read_products(path)
+    parse_s = time.perf_counter() - start
+    repo = InMemoryProductRepository(products=products)
+    del products
+    load_s = time.perf_counter() - start
+    result = {
+        "rows": rows,
+        "parse_s": round(parse_s, 3),
+        "load_s": round(load_s, 3),
+        "rss_mb": _rss_mb(),
+        "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+        "queries": {},
+    }
+
+    client = None
+    if http:
+        from dependency_injector import providers
+        from fastapi.testclient import TestClient
+        from app import main as app_main
+        from app.core.services.product_service import ProductServiceImpl
+        app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+        client = TestClient(app_main.app)
+
+    for name, query in QUERIES.items():
+        query = dict(query)
+        if query["page"] is None:
+            query["page"] = max(1, rows // query["size"] // 2)
+        repo.find_paginated(**query)  # warm lazily built columns and sort orders
+        items, total = repo.find_paginated(**query)
+        timings = {"total": total, "repository": _timed(lambda: repo.find_paginated(**query), repeat)}
+
+        def encode():
+            page_items, page_total = repo.find_paginated(**query)
+            PaginatedResponse(items=page_items, total=page_total, page=query["page"], page_size=query["size"]) \
+                .model_dump_json()
+        timings["repository_and_encode"] = _timed(encode, repeat)
+        if client is not None:
+            url = "/v1/products?" + _query_string(query)
+            timings["http"] = _timed(lambda: client.get(url), max(1, repeat // 2))
+        result["queries"][name] = timings
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated catalog sizes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--http", action="store_true", help="Also time full requests through the app")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # the app logs to stdout, so the result goes to a file next to the catalog
+        with open(args.child + ".result", "w", encoding="utf-8") as file:
+            json.dump(measure(args.child, args.rows, args.repeat, args.http), file)
+        return
+
+    from catalog_generator import write_catalog
+
+    results = {"seed": args.seed, "repeat": args.repeat, "python": sys.version.split()[0], "runs": []}
+    with tempfile.TemporaryDirectory(prefix="catalog-scaling-") as directory:
+        for rows in (int(size) for size in args.sizes.split(",")):
+            path = os.path.join(directory, f"catalog-{rows}.json")
+            start = time.perf_counter()
+            write_catalog(path, rows, args.seed)
+            generate_s = time.perf_counter() - start
+
+            command = [sys.executable, os.path.abspath(__file__), "--child", path, "--rows", str(rows),
+                       "--repeat", str(args.repeat)] + (["--http"] if args.http else [])
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            with open(path + ".result", encoding="utf-8") as file:
+                run = json.load(file)
+            run["generate_s"] = round(generate_s, 3)
+            run["file_mb"] = round(os.path.getsize(path) / (1024 * 1024), 1)
+            os.remove(path)
+            results["runs"].append(run)
+            print(json.dumps({k: v for k, v in run.items() if k != "queries"}))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
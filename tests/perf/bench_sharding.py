@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scatter/gather latency and throughput from 1 to N shards.
+
+Builds a synthetic catalog by replicating data.json with fresh ids and
+jittered prices, then times the same queries against the single-process
+InMemoryProductRepository and ShardedProductRepository with 1..N shards.
+
+Uso:
+    PYTHONPATH=. python tests/perf/bench_sharding.py --rows 200000 --max-shards 4
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+from app.adapters.repositories.sharded.product_repository import ShardedProductRepository
+
+QUERIES = {
+    "unfiltered": dict(page=1, size=20),
+    "filtered": dict(page=1, size=20, category="Laptops", min_price=1000, max_price=3000),
+    "sorted": dict(page=5, size=20, category="Smartphones", sort="-rating"),
+    "deep_page": dict(page=200, size=50),
+    "expression": dict(page=1, size=20, filter='brand in ("Apple","Dell") and price < 1500'),
+}
+
+
+def replicate(rows: int, seed: int = 42):
+    rnd = random.Random(seed)
+    base = read_products()
+    products = []
+    for i in range(rows):
+        template = base[i % len(base)]
+        products.append(template.model_copy(update={
+            "id": i + 1,
+            "price": round(template.price * rnd.uniform(0.7, 1.3), 2),
+            "rating": round(min(5.0, max(0.0, template.rating + rnd.uniform(-0.5, 0.5))), 1),
+        }))
+    return products
+
+
+def time_query(repo, query, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        repo.find_paginated(**query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(statistics.median(samples), 3), "max_ms": round(max(samples), 3)}
+
+
+def throughput(repo, query, threads, seconds):
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        done = 0
+        while time.perf_counter() < deadline:
+            repo.find_paginated(**query)
+            done += 1
+        return done
+
+    with ThreadPoolExecutor(threads) as pool:
+        total = sum(pool.map(lambda _: worker(), range(threads)))
+    return round(total / seconds, 1)
+
+
+def run(repo, repeat, threads, seconds):
+    result = {name: time_query(repo, query, repeat) for name, query in QUERIES.items()}
+    result["top_k_ms"] = time_query(_TopAdapter(repo), {}, repeat)["p50_ms"]
+    result["filtered_qps"] = throughput(repo, QUERIES["filtered"], threads, seconds)
+    return result
+
+
+class _TopAdapter:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def find_paginated(self, **_):
+        return self.repo.find_top(k=10, weights={"rating": 0.7, "price": -0.3}, category="Laptops")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--max-shards", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    products = replicate(args.rows)
+    results = {"rows": args.rows, "runs": []}
+
+    start = time.perf_counter()
+    single = InMemoryProductRepository(products=products)
+    run_result = {"mode": "inmem", "shards": 1, "load_s": round(time.perf_counter() - start, 2)}
+    run_result.update(run(single, args.repeat, args.threads, args.seconds))
+    results["runs"].append(run_result)
+    print(json.dumps(run_result))
+    del single
+
+    for shards in range(1, args.max_shards + 1):
+        start = time.perf_counter()
+        repo = ShardedProductRepository(shards=shards, products=products)
+        run_result = {"mode": "sharded", "shards": shards, "load_s": round(time.perf_counter() - start, 2)}
+        try:
+            run_result.update(run(repo, args.repeat, args.threads, args.seconds))
+        finally:
+            repo.close()
+        results["runs"].append(run_result)
+        print(json.dumps(run_result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
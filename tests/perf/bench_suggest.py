@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: autocomplete latency per keystroke on a large synthetic catalog.
+
+Builds a SuggestIndex over a generated catalog (see catalog_generator.py)
+and times ``suggest`` for every prefix of a few typed words, i.e. what a
+search box sends while the user types.
+
+Uso:
+    PYTHONPATH=. python tests/perf/bench_suggest.py --rows 1000000 --output suggest.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_generator import generate_products  # noqa: E402
+from app.adapters.repositories.inmem.catalog import Catalog  # noqa: E402
+from app.adapters.repositories.inmem.suggest import SuggestIndex  # noqa: E402
+
+WORDS = ["apple laptop 12", "samsung smartphone", "sony", "xiaomi smartphone 9", "bose headphone", "zzz"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    catalog = Catalog(list(generate_products(args.rows, args.seed)))
+    start = time.perf_counter()
+    index = SuggestIndex(catalog)
+    build_s = time.perf_counter() - start
+
+    samples = []
+    for word in WORDS:
+        for end in range(1, len(word) + 1):
+            prefix = word[:end]
+            index.suggest(prefix, args.limit)  # memoize large ranges like a warm server
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                index.suggest(prefix, args.limit)
+                samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    result = {
+        "rows": args.rows,
+        "keys": len(index.keys),
+        "build_s": round(build_s, 3),
+        "p50_ms": round(statistics.median(samples), 4),
+        "p99_ms": round(samples[int(0.99 * (len(samples) - 1))], 4),
+        "max_ms": round(samples[-1], 4),
+    }
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
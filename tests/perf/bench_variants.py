@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory and build time of catalog variants versus full copies.
+
+Loads a synthetic catalog (see catalog_generator.py) into an
+InMemoryProductRepository, then defines ``--variants`` variants that each
+reprice ``--overrides`` random products. Reports the Python heap each
+variant adds (tracemalloc) and its build time, next to the cost of loading
+one more full copy of the catalog, which is what serving the variants as
+separate catalogs would take per variant.
+
+Uso:
+    PYTHONPATH=. python tests/perf/bench_variants.py --rows 100000 --variants 5 --output variants.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_generator import generate_products  # noqa: E402
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository  # noqa: E402
+
+
+def measure(build):
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    return result, tracemalloc.get_traced_memory()[0] - before, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--variants", type=int, default=5)
+    parser.add_argument("--overrides", type=int, default=500, help="Repriced products per variant")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    products = list(generate_products(args.rows, args.seed))
+    tracemalloc.start()
+    repo, copy_bytes, copy_s = measure(lambda: InMemoryProductRepository(products=list(products)))
+
+    rnd = random.Random(args.seed)
+    ids = [p.id for p in products]
+    variant_bytes, variant_s = [], []
+    for number in range(args.variants):
+        overrides = {
+            product_id: {"price": round(rnd.uniform(10, 3000), 2)}
+            for product_id in rnd.sample(ids, min(args.overrides, len(ids)))
+        }
+        _, size, seconds = measure(lambda: repo.put_variant(f"v{number}", overrides))
+        variant_bytes.append(size)
+        variant_s.append(seconds)
+    tracemalloc.stop()
+
+    result = {
+        "rows": args.rows,
+        "variants": args.variants,
+        "overrides": args.overrides,
+        "full_copy_mb": round(copy_bytes / 2**20, 2),
+        "full_copy_s": round(copy_s, 3),
+        "variant_mb": round(max(variant_bytes) / 2**20, 2),
+        "variant_s": round(max(variant_s), 3),
+    }
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: durable catalog writes (write-ahead log) and recovery time.
+
+Applies a stream of patch/create/delete mutations to an
+InMemoryProductRepository backed by a WriteAheadLog from several writer
+threads, then measures how long a fresh repository takes to recover from the
+snapshot plus log. Group commit shows up as records per fsync > 1.
+
+Uso:
+    PYTHONPATH=. python tests/perf/bench_wal.py --mutations 1000000 --threads 8 --output wal.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from app.adapters.repositories.inmem import wal as wal_module
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+from app.adapters.repositories.inmem.wal import WriteAheadLog
+
+
+def mutate(repo, count, seed, ids, id_lock):
+    rnd = random.Random(seed)
+    template = read_products()[0].model_dump(exclude={"numeric_specifications"})
+    for _ in range(count):
+        action = rnd.random()
+        with id_lock:
+            product_id = rnd.choice(ids)
+        if action < 0.8:
+            repo.patch(product_id, {"price": round(rnd.uniform(10, 5000), 2), "rating": round(rnd.uniform(1, 5), 1)})
+        elif action < 0.9:
+            created = repo.create(dict(template, id=None, name=f"generated {rnd.random():.6f}"))
+            with id_lock:
+                ids.append(created.id)
+        elif repo.delete(product_id):
+            repo.create(dict(template, id=product_id))
+
+
+def run(directory, mutations, threads, compact_after, fsync):
+    fsyncs_before = wal_module.WAL_FSYNCS._value.get()
+    repo = InMemoryProductRepository(storage=WriteAheadLog(directory, compact_after=compact_after, fsync=fsync))
+    ids = [p.id for p in repo._products]
+    id_lock = threading.Lock()
+
+    start = time.perf_counter()
+    workers = [
+        threading.Thread(target=mutate, args=(repo, mutations // threads, seed, ids, id_lock))
+        for seed in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    generation = repo._catalog.version
+    while repo._wal._compacting:
+        time.sleep(0.05)
+    repo._wal.close()
+    fsyncs = wal_module.WAL_FSYNCS._value.get() - fsyncs_before
+
+    log_bytes = sum(
+        os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory) if name.startswith("wal-")
+    )
+    start = time.perf_counter()
+    recovered = InMemoryProductRepository(storage=WriteAheadLog(directory, compact_after=compact_after, fsync=fsync))
+    recovery_s = time.perf_counter() - start
+    assert recovered._catalog.version == generation
+    recovered._wal.close()
+
+    return {
+        "mutations": generation,
+        "threads": threads,
+        "fsync": fsync,
+        "writes_per_s": round(generation / elapsed, 1),
+        "records_per_fsync": round(generation / fsyncs, 2) if fsyncs else None,
+        "log_bytes_at_recovery": log_bytes,
+        "recovery_s": round(recovery_s, 3),
+        "products": len(recovered._products),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mutations", type=int, default=1_000_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--compact-after", type=int, default=100_000)
+    parser.add_argument("--no-fsync", action="store_true", help="Skip fsync (upper bound without durability)")
+    parser.add_argument("--directory", help="Data directory (default: a temporary directory)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    directory = args.directory or tempfile.mkdtemp(prefix="catalog-wal-")
+    try:
+        result = run(directory, args.mutations, args.threads, args.compact_after, not args.no_fsync)
+    finally:
+        if not args.directory:
+            shutil.rmtree(directory, ignore_errors=True)
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput and memory of the production launcher (app.server)
+as the number of workers grows.
+
+For every worker count the launcher is started in a child process on a free
+port, serving a synthetic catalog (see catalog_generator.py), and loaded by
+client processes sending keep-alive GET requests for a fixed time:
+
+- throughput: requests per second completed by all clients
+- latency: p50/p95/p99 of the requests
+- rss_mb: resident memory of the master plus all workers (shared pages are
+  counted once per process, so this overstates the real footprint)
+- pss_mb: proportional set size of the same processes (shared pages split
+  between the processes sharing them): the memory the server really uses
+
+The clients run on the same machine and take CPU from the workers; for
+absolute numbers run them from another host.
+
+Uso:
+    PYTHONPATH=. python tests/perf/bench_workers.py --rows 100000 --workers 1,2,4,8 --output workers.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_generator import write_catalog  # noqa: E402
+
+PATHS = (
+    "/v1/products?page=1&page_size=20",
+    "/v1/products?page=1&page_size=20&category=Laptops&min_rating=4",
+    "/v1/products/1",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _default_workers():
+    cores = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def _memory_kb(pid: int):
+    # (rss, pss) in KiB; pss falls back to rss without smaps_rollup
+    rss = pss = None
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as smaps:
+            for line in smaps:
+                if line.startswith("Rss:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    if rss is None:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+    return rss or 0, pss if pss is not None else rss or 0
+
+
+def _children(pid: int):
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status", encoding="ascii") as status:
+                for line in status:
+                    if line.startswith("PPid:"):
+                        if int(line.split()[1]) == pid:
+                            found.append(int(entry))
+                        break
+        except OSError:
+            continue
+    return found
+
+
+def server_memory(pid: int):
+    """Total RSS and PSS (MiB) of the launcher and its workers."""
+    rss = pss = 0
+    for process in [pid] + _children(pid):
+        try:
+            process_rss, process_pss = _memory_kb(process)
+        except OSError:
+            continue
+        rss += process_rss
+        pss += process_pss
+    return round(rss / 1024, 1), round(pss / 1024, 1)
+
+
+def _wait_ready(port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} not ready after {timeout}s")
+
+
+def _client(port: int, seconds: float, connections: int, queue):
+    # one process, `connections` sequential keep-alive connections used round-robin
+    pool = [http.client.HTTPConnection("127.0.0.1", port, timeout=10) for _ in range(connections)]
+    latencies, errors, n = [], 0, 0
+    stop = time.monotonic() + seconds
+    while time.monotonic() < stop:
+        connection = pool[n % connections]
+        path = PATHS[n % len(PATHS)]
+        n += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    queue.put((latencies, errors))
+
+
+def load(port: int, seconds: float, clients: int, connections: int):
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    processes = [
+        context.Process(target=_client, args=(port, seconds, connections, queue)) for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    latencies, errors = [], 0
+    for _ in processes:
+        samples, failed = queue.get()
+        latencies.extend(samples)
+        errors += failed
+    for process in processes:
+        process.join()
+    latencies.sort()
+
+    def at(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3) if latencies else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(statistics.median(latencies), 3) if latencies else None,
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+    }
+
+
+def run(workers: int, catalog: str, seconds: float, clients: int, connections: int, startup_timeout: float):
+    port = _free_port()
+    env = dict(os.environ, OTEL_DISABLED="1", RATE_LIMIT_RATE="0", WEB_CONCURRENCY=str(workers))
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    command = [sys.executable, "-m", "app.server", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)]
+    if catalog:
+        command += ["--catalog", catalog]
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        started = time.monotonic()
+        _wait_ready(port, startup_timeout)
+        ready_s = round(time.monotonic() - started, 2)
+        time.sleep(0.5)  # let every worker finish starting
+        idle_rss, idle_pss = server_memory(server.pid)
+        load(port, min(2.0, seconds), clients, connections)  # warm-up
+        result = load(port, seconds, clients, connections)
+        rss, pss = server_memory(server.pid)
+        return {
+            "workers": workers,
+            "ready_s": ready_s,
+            "idle_rss_mb": idle_rss,
+            "idle_pss_mb": idle_pss,
+            "rss_mb": rss,
+            "pss_mb": pss,
+            **result,
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", help="Comma-separated worker counts (default: 1, 2, 4... up to the core count)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic catalog size (0: bundled data.json)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Measured load duration per worker count")
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 1, help="Load generator processes")
+    parser.add_argument("--connections", type=int, default=4, help="Keep-alive connections per client process")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else _default_workers()
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = None
+        if args.rows:
+            catalog = os.path.join(directory, "catalog.json")
+            write_catalog(catalog, args.rows, args.seed)
+        results = []
+        for workers in counts:
+            result = run(workers, catalog, args.seconds, args.clients, args.connections, args.startup_timeout)
+            print(json.dumps(result))
+            results.append(result)
+
+    report = {"rows": args.rows, "cores": os.cpu_count(), "seconds": args.seconds, "clients": args.clients, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic catalog generator.
+
+Produces catalogs shaped like data.json at any size (1k to 10M rows): the
+four categories in a realistic mix, per-category brands and price ranges,
+ratings skewed towards 4-5 stars, a small share of out-of-stock products and
+specification fields that are filled with category-specific probabilities,
+so text columns are sparse the way real supplier feeds are. The same
+``--rows``/``--seed`` always yield the same catalog.
+
+Rows are produced lazily and written as a stream, so 10M-row files do not
+have to fit in memory.
+
+Uso:
+    PYTHONPATH=. python tests/perf/catalog_generator.py --rows 1000000 --output catalog-1m.json
+"""
+import argparse
+import json
+import math
+import random
+from typing import Dict, Iterator, List
+
+from app.core.domain.product import Product, ProductSpecification
+
+# category -> share of the catalog
+CATEGORY_MIX = {"Smartphones": 0.45, "Laptops": 0.25, "Headphones": 0.18, "TVs": 0.12}
+
+BRANDS = {
+    "Smartphones": ["Apple", "Samsung", "Google", "Xiaomi", "OnePlus", "Nothing", "Motorola", "Sony"],
+    "Laptops": ["Apple", "Dell", "Lenovo", "HP", "Asus", "Acer", "MSI", "Razer"],
+    "Headphones": ["Sony", "Bose", "Apple", "Sennheiser", "JBL", "Beats", "Jabra"],
+    "TVs": ["Samsung", "LG", "Sony", "TCL", "Hisense", "Philips"],
+}
+
+# median price and log-normal spread per category
+PRICES = {"Smartphones": (700.0, 0.45), "Laptops": (1300.0, 0.4), "Headphones": (220.0, 0.6), "TVs": (1100.0, 0.5)}
+
+# field -> probability that a product of the category has it
+SPEC_FILL = {
+    "Smartphones": {"processor": 0.97, "memory": 0.95, "storage": 0.98, "display": 0.96, "camera": 0.9,
+                    "battery_life": 0.85, "weight": 0.8, "connectivity": 0.75, "charging": 0.3},
+    "Laptops": {"processor": 0.98, "memory": 0.97, "storage": 0.97, "display": 0.95, "graphics": 0.85,
+                "battery_life": 0.8, "weight": 0.85, "ports": 0.7, "connectivity": 0.3},
+    "Headphones": {"driver_size": 0.7, "frequency_response": 0.6, "battery_life": 0.85, "charging": 0.6,
+                   "connectivity": 0.9, "noise_cancellation": 0.55, "weight": 0.75, "special_features": 0.5},
+    "TVs": {"screen_size": 0.99, "resolution": 0.97, "display_type": 0.95, "processor": 0.6, "hdr_support": 0.8,
+            "smart_platform": 0.85, "gaming_features": 0.5, "audio": 0.7},
+}
+
+PROCESSORS = {
+    "Smartphones": ["A17 Pro chip", "Snapdragon 8 Gen 3", "Google Tensor G3", "Dimensity 9300", "Exynos 2400"],
+    "Laptops": ["Apple M3 8-core CPU", "Intel Core i7-13700H", "AMD Ryzen 7 7840U", "Intel Core Ultra 7 155H",
+                "AMD Ryzen 9 7945HX"],
+    "TVs": ["α9 Gen7 AI Processor 4K", "Neural Quantum Processor 4K", "Cognitive Processor XR", "AiPQ Pro"],
+}
+
+
+def _spec_value(rnd: random.Random, category: str, field: str) -> str:
+    if field == "processor":
+        return rnd.choice(PROCESSORS[category])
+    if field == "memory":
+        size = rnd.choice([4, 6, 8, 12, 16] if category == "Smartphones" else [8, 16, 16, 32, 64])
+        return f"{size}GB " + ("RAM" if category == "Smartphones" else rnd.choice(["DDR5", "LPDDR5X", "Unified Memory"]))
+    if field == "storage":
+        size = rnd.choice([128, 256, 256, 512, 1024] if category == "Smartphones" else [256, 512, 512, 1024, 2048])
+        return (f"{size // 1024}TB" if size >= 1024 else f"{size}GB") + ("" if category == "Smartphones" else " SSD")
+    if field == "display":
+        if category == "Smartphones":
+            return f"{rnd.choice([6.1, 6.2, 6.4, 6.7, 6.8])}-inch {rnd.choice(['OLED', 'AMOLED', 'LTPO OLED'])} " \
+                   f"{rnd.choice([60, 90, 120, 120, 144])}Hz"
+        return f"{rnd.choice([13.3, 14, 14.2, 15.6, 16, 17.3])}-inch {rnd.choice(['IPS', 'OLED', 'Mini-LED'])}"
+    if field == "graphics":
+        return rnd.choice(["Integrated", "10-core GPU", "NVIDIA GeForce RTX 4060", "NVIDIA GeForce RTX 4080"])
+    if field == "battery_life":
+        return f"Up to {rnd.randint(8, 40)} hours"
+    if field == "weight":
+        if category == "Laptops":
+            return f"{rnd.uniform(1.0, 3.2):.2f} kg"
+        return f"{rnd.randint(150, 350)}g"
+    if field == "ports":
+        return rnd.choice(["2x USB-C, HDMI", "3x Thunderbolt 4, HDMI, SD card slot", "USB-A, USB-C, HDMI, RJ45"])
+    if field == "connectivity":
+        return rnd.choice(["5G, Wi-Fi 6E, Bluetooth 5.3", "Wi-Fi 7, Bluetooth 5.4", "Bluetooth 5.2, NFC, wired 3.5mm"])
+    if field == "camera":
+        return f"{rnd.choice([12, 48, 50, 108, 200])}MP Main + {rnd.choice([8, 12, 50])}MP Ultra Wide"
+    if field == "driver_size":
+        return f"{rnd.choice([11, 30, 40, 42, 50])}mm"
+    if field == "frequency_response":
+        return f"{rnd.choice([4, 10, 20])}Hz-{rnd.choice([20, 40])}kHz"
+    if field == "charging":
+        return rnd.choice(["USB-C fast charging", "Wireless charging", "Quick charge: 3min = 3 hours"])
+    if field == "noise_cancellation":
+        return rnd.choice(["Active Noise Cancellation", "Adaptive ANC", "Hybrid ANC"])
+    if field == "special_features":
+        return rnd.choice(["Spatial Audio", "Multipoint", "Speak-to-Chat, Wearing Detection"])
+    if field == "screen_size":
+        return f"{rnd.choice([43, 50, 55, 55, 65, 65, 75, 85])} inches"
+    if field == "resolution":
+        return rnd.choice(["4K Ultra HD (3840x2160)", "4K Ultra HD (3840x2160)", "8K (7680x4320)", "Full HD"])
+    if field == "display_type":
+        return rnd.choice(["OLED", "QLED", "Mini-LED", "LED", "OLED evo"])
+    if field == "hdr_support":
+        return rnd.choice(["Dolby Vision, HDR10", "HDR10+, HLG", "Dolby Vision IQ, HDR10, HLG"])
+    if field == "smart_platform":
+        return rnd.choice(["webOS 24", "Tizen", "Google TV", "Roku TV"])
+    if field == "gaming_features":
+        return rnd.choice(["VRR, ALLM, 4x HDMI 2.1", "120Hz, HDMI 2.1", "144Hz, FreeSync Premium"])
+    if field == "audio":
+        return f"{rnd.choice([20, 40, 60])}W, {rnd.choice(['Dolby Atmos', 'DTS:X', 'Object Tracking Sound'])}"
+    raise KeyError(field)
+
+
+def generate(rows: int, seed: int = 42) -> Iterator[Dict]:
+    """
+    Yield ``rows`` product dicts in the data.json format.
+
+    Args:
+        rows: Number of products
+        seed: Random seed; the same seed always yields the same catalog
+
+    Yields:
+        Dict: One product, ids ``1..rows``
+    """
+    rnd = random.Random(seed)
+    categories: List[str] = list(CATEGORY_MIX)
+    weights = [CATEGORY_MIX[c] for c in categories]
+    for product_id in range(1, rows + 1):
+        category = rnd.choices(categories, weights)[0]
+        brand = rnd.choice(BRANDS[category])
+        median, sigma = PRICES[category]
+        price = round(min(20000.0, median * math.exp(rnd.gauss(0.0, sigma))), 2)
+        rating = round(min(5.0, max(1.0, 5.0 - rnd.expovariate(1.8))), 1)
+        specifications = {
+            field: _spec_value(rnd, category, field)
+            for field, probability in SPEC_FILL[category].items()
+            if rnd.random() < probability
+        }
+        yield {
+            "id": product_id,
+            "name": f"{brand} {category[:-1] if category.endswith('s') else category} {product_id}",
+            "category": category,
+            "image_url": None if rnd.random() < 0.1 else f"https://images.example.com/products/{product_id}.jpg",
+            "description": f"{brand} {category.lower()} model {product_id}",
+            "price": price,
+            "rating": rating,
+            "specifications": specifications,
+            "availability": "Out of Stock" if rnd.random() < 0.08 else "In Stock",
+            "brand": brand,
+        }
+
+
+def generate_products(rows: int, seed: int = 42) -> Iterator[Product]:
+    """Like ``generate`` but yields ``Product`` domain objects."""
+    for data in generate(rows, seed):
+        specifications = ProductSpecification(**data.pop("specifications"))
+        yield Product(specifications=specifications, **data)
+
+
+def write_catalog(path: str, rows: int, seed: int = 42):
+    """Stream a catalog to ``path`` in the data.json format."""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{"products": [\n')
+        for index, product in enumerate(generate(rows, seed)):
+            if index:
+                file.write(",\n")
+            file.write(json.dumps(product, ensure_ascii=False))
+        file.write("\n]}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", required=True, help="JSON file to write (data.json format)")
+    args = parser.parse_args()
+    write_catalog(args.output, args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
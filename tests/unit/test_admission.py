@@ -0,0 +1,166 @@
+import asyncio
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.admission import AdaptiveLimiter, AdmissionMiddleware, priority_of, suspended
+
+
+def scope(method="GET", headers=()):
+    return {"type": "http", "method": method, "path": "/x", "headers": list(headers)}
+
+
+def test_priorities():
+    assert priority_of(scope()) == "normal"
+    assert priority_of(scope(headers=[(b"x-priority", b"Low")])) == "low"
+    assert priority_of(scope(headers=[(b"x-priority", b"high")])) == "normal"  # clients can only lower it
+    assert priority_of(scope("POST")) == "high"
+
+
+def test_low_priority_is_shed_first():
+    limiter = AdaptiveLimiter(initial=10, min_limit=1)
+    admitted = [limiter.try_acquire("normal") for _ in range(5)]
+    assert all(admitted)
+    assert not limiter.try_acquire("low")  # low may only fill half the limit
+    assert all(limiter.try_acquire("normal") for _ in range(4))
+    assert not limiter.try_acquire("normal")  # 90%
+    assert limiter.try_acquire("high")
+    assert not limiter.try_acquire("high")
+
+
+def test_aimd_adjusts_to_latency():
+    limiter = AdaptiveLimiter(initial=20, min_limit=2, max_limit=40, target_latency=0.1)
+    # slow completions: one multiplicative decrease per observed latency
+    for _ in range(5):
+        assert limiter.try_acquire("high")
+    for _ in range(5):
+        limiter.release(0.5, now=100.0)
+    assert limiter.limit == 18.0
+    limiter.try_acquire("high")
+    limiter.release(0.5, now=100.6)
+    assert limiter.limit == 18.0 * 0.9
+    # fast completions under load grow the limit additively
+    limit = limiter.limit
+    for _ in range(12):
+        assert limiter.try_acquire("high")
+    for _ in range(12):
+        limiter.release(0.01, now=200.0)
+    assert limit < limiter.limit < limit + 1
+    # timeouts always count as congestion; the limit stays within bounds
+    for step in range(100):
+        limiter.try_acquire("high")
+        limiter.release(0.01, dropped=True, now=300.0 + step)
+    assert limiter.limit == 2.0
+
+
+def test_idle_server_does_not_grow_its_limit():
+    limiter = AdaptiveLimiter(initial=20, target_latency=0.1)
+    for step in range(50):
+        limiter.try_acquire("normal")
+        limiter.release(0.01, now=float(step))
+    assert limiter.limit == 20.0
+
+
+def make_app(limiter):
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, limiter=limiter)
+    release = asyncio.Event()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app, release
+
+
+def test_saturated_server_sheds_with_retry_after():
+    limiter = AdaptiveLimiter(initial=3, min_limit=1)
+    app, release = make_app(limiter)
+    shed_before = REGISTRY.get_sample_value("admission_shed_total", {"priority": "low"}) or 0.0
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            pending = [asyncio.create_task(client.get("/slow")) for _ in range(3)]
+            while limiter.in_flight < 3:
+                await asyncio.sleep(0.01)
+            low = await client.get("/slow", headers={"X-Priority": "low"})
+            normal = await client.get("/slow")
+            health = await client.get("/health")
+            release.set()
+            return low, normal, health, await asyncio.gather(*pending)
+
+    low, normal, health, admitted = asyncio.run(scenario())
+    assert low.status_code == 503 and normal.status_code == 503
+    assert low.json()["code"] == "ERR0007"
+    assert int(low.headers["retry-after"]) >= 1
+    assert health.status_code == 200
+    assert [r.status_code for r in admitted] == [200, 200, 200]
+    assert limiter.in_flight == 0
+    assert REGISTRY.get_sample_value("admission_shed_total", {"priority": "low"}) == shed_before + 1
+
+
+def test_suspended_wait_frees_the_slot_and_is_not_sampled():
+    limiter = AdaptiveLimiter(initial=1, min_limit=1)
+    latencies = []
+    release = limiter.release
+    limiter.release = lambda latency, dropped=False, now=None: latencies.append(latency) or release(latency, dropped, now)
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, limiter=limiter)
+    waiting, resume = asyncio.Event(), asyncio.Event()
+
+    @app.get("/delayed")
+    async def delayed():
+        async with suspended():
+            waiting.set()
+            await resume.wait()
+        return {"ok": True}
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            pending = asyncio.create_task(client.get("/delayed"))
+            await waiting.wait()
+            in_flight = limiter.in_flight
+            quick = await client.get("/fast")  # the only slot is free while /delayed waits
+            await asyncio.sleep(0.2)
+            resume.set()
+            return in_flight, quick, await pending
+
+    in_flight, quick, slow = asyncio.run(scenario())
+    assert in_flight == 0
+    assert quick.status_code == 200 and slow.status_code == 200
+    assert limiter.in_flight == 0
+    assert len(latencies) == 2 and max(latencies) < 0.1
+
+
+async def _outside_a_request():
+    async with suspended():
+        return "ran"
+
+
+def test_suspended_outside_a_request_does_nothing():
+    assert asyncio.run(_outside_a_request()) == "ran"
+
+
+def test_main_app_always_admits_health_and_metrics(monkeypatch):
+    from app import admission
+    from app.main import app
+
+    closed = AdaptiveLimiter(initial=1, min_limit=1)
+    closed.in_flight = 1  # saturated
+    monkeypatch.setattr(admission, "limiter", closed)
+    client = TestClient(app)
+    assert client.get("/v1/products").status_code == 503
+    assert client.get("/health").status_code == 200
+    assert client.get("/metrics").status_code == 200
+    assert client.post("/admin/mitigate", headers={"x-admin-token": "secret"}).status_code == 200
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import httpx
+from dependency_injector import providers
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.adapters.httphandlers.bulkhead import BULKHEADS, Bulkhead, isolated
+from app.errors import error_handler
+
+
+def gauge(name, label):
+    return REGISTRY.get_sample_value(name, {"bulkhead": label})
+
+
+def test_slow_routes_cannot_starve_other_bulkheads(monkeypatch):
+    monkeypatch.setitem(BULKHEADS, "test-slow", Bulkhead("test-slow", workers=2, queue=1))
+    monkeypatch.setitem(BULKHEADS, "test-fast", Bulkhead("test-fast", workers=1, queue=0))
+    app = FastAPI()
+    error_handler(app)
+    release = threading.Event()
+
+    @app.get("/slow")
+    @isolated("test-slow")
+    def slow(n: int = 0):
+        release.wait(5)
+        return {"n": n}
+
+    @app.get("/fast")
+    @isolated("test-fast")
+    def fast():
+        return {"ok": True}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            pending = [asyncio.create_task(client.get("/slow", params={"n": n})) for n in range(3)]
+            while gauge("bulkhead_queued_tasks", "test-slow") < 1:
+                await asyncio.sleep(0.01)
+            saturation = (gauge("bulkhead_busy_workers", "test-slow"), gauge("bulkhead_queued_tasks", "test-slow"))
+            rejected = await client.get("/slow")
+            other = await client.get("/fast")
+            release.set()
+            return saturation, rejected, other, await asyncio.gather(*pending)
+
+    rejected_before = REGISTRY.get_sample_value("bulkhead_rejected_total", {"bulkhead": "test-slow"}) or 0.0
+    saturation, rejected, other, admitted = asyncio.run(scenario())
+    assert saturation == (2.0, 1.0)
+    assert rejected.status_code == 503
+    assert rejected.json()["code"] == "ERR0007" and rejected.headers["retry-after"] == "1"
+    assert REGISTRY.get_sample_value("bulkhead_rejected_total", {"bulkhead": "test-slow"}) == rejected_before + 1
+    assert other.status_code == 200
+    assert sorted(r.json()["n"] for r in admitted) == [0, 1, 2]
+    assert gauge("bulkhead_busy_workers", "test-slow") == 0 and gauge("bulkhead_queued_tasks", "test-slow") == 0
+
+
+def test_isolated_route_keeps_its_signature_and_context():
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.get("/v1/products/1").status_code == 200
+    assert client.get("/v1/products", params={"page_size": "x"}).status_code == 422  # validation still applies
+    assert client.get("/health").json()["status"] == "healthy"
+    text = client.get("/metrics").text
+    assert 'bulkhead_capacity{bulkhead="ops"}' in text
+    assert 'bulkhead_capacity{bulkhead="writes"}' in text
+    assert 'bulkhead_busy_workers{bulkhead="catalog"}' in text
+
+
+class _BlockingWrites:
+    # product service whose deletes wait, like writes behind a slow fsync
+    def __init__(self):
+        self.release = threading.Event()
+
+    def delete(self, product_id):
+        self.release.wait(5)
+        return True
+
+
+def test_write_bursts_cannot_fail_probes_or_scrapes(monkeypatch):
+    from app import main as app_main
+
+    writes = BULKHEADS["writes"]
+    monkeypatch.setattr(writes, "workers", 1)
+    monkeypatch.setattr(writes, "queue", 1)
+    service = _BlockingWrites()
+    app_main.container.product_service.override(providers.Object(service))
+    admin = {"X-Admin-Token": "secret"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            pending = [asyncio.create_task(client.delete(f"/v1/products/{n}", headers=admin)) for n in (1, 2)]
+            while gauge("bulkhead_queued_tasks", "writes") < 1:
+                await asyncio.sleep(0.01)
+            rejected = await client.delete("/v1/products/3", headers=admin)
+            health = await client.get("/health")
+            scrape = await client.get("/metrics")
+            service.release.set()
+            return rejected, health, scrape, await asyncio.gather(*pending)
+
+    try:
+        rejected, health, scrape, admitted = asyncio.run(scenario())
+    finally:
+        service.release.set()
+        app_main.container.product_service.reset_override()
+    assert rejected.status_code == 503
+    assert health.status_code == 200 and scrape.status_code == 200
+    assert [r.status_code for r in admitted] == [204, 204]
@@ -0,0 +1,131 @@
+import threading
+import pytest
+from app import deadline
+from app.adapters.repositories.cached.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.adapters.repositories.cached.product_repository import CachingProductRepository
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+from app.errors import CustomError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingRepository(InMemoryProductRepository):
+    """Backend that counts reads and can be switched to failing."""
+
+    def __init__(self):
+        super().__init__(products=read_products()[:10])
+        self.calls = 0
+        self.failing = False
+        self.refreshed = threading.Event()
+
+    def find_paginated(self, page, size, **kwargs):
+        self.calls += 1
+        self.refreshed.set()
+        if self.failing:
+            raise RuntimeError("backend down")
+        return super().find_paginated(page, size, **kwargs)
+
+
+def make(clock, **kwargs):
+    backend = CountingRepository()
+    breaker = CircuitBreaker("test", min_calls=2, failure_rate=0.5, open_seconds=10, clock=clock)
+    return backend, CachingProductRepository(backend, ttl=5, stale_ttl=10, beta=0, breaker=breaker, clock=clock, **kwargs)
+
+
+def test_hits_are_served_from_cache():
+    clock = FakeClock()
+    backend, cache = make(clock)
+    first = cache.find_paginated(1, 5, category="Laptops")
+    assert cache.find_paginated(1, 5, category="Laptops") == first
+    assert backend.calls == 1
+    cache.find_paginated(2, 5, category="Laptops")
+    assert backend.calls == 2
+
+
+def test_stale_result_is_served_while_refreshing():
+    clock = FakeClock()
+    backend, cache = make(clock)
+    cache.find_paginated(1, 5)
+    backend.refreshed.clear()
+    clock.now = 7  # past ttl, inside the stale window
+    assert cache.find_paginated(1, 5)[1] == 10
+    assert backend.refreshed.wait(1)
+    cache._refresher.shutdown(wait=True)
+    assert backend.calls == 2
+
+
+def test_writes_invalidate():
+    clock = FakeClock()
+    backend, cache = make(clock)
+    assert cache.find_by_id(1).price != 1.0
+    cache.patch(1, {"price": 1.0})
+    assert cache.find_by_id(1).price == 1.0
+
+
+def test_open_circuit_serves_stale_or_fails_fast():
+    clock = FakeClock()
+    backend, cache = make(clock)
+    cache.find_paginated(1, 5)
+    backend.failing = True
+    clock.now = 20  # past the stale window: reads go to the backend
+    for _ in range(2):
+        assert cache.find_paginated(1, 5)[1] == 10  # backend errors, old result served
+    assert cache._breaker.state == OPEN
+    calls = backend.calls
+    with pytest.raises(CustomError) as err:
+        cache.find_paginated(1, 3)
+    assert err.value.code == "ERR0005" and err.value.status_code == 503
+    assert backend.calls == calls
+
+    backend.failing = False
+    clock.now = 31
+    cache.find_paginated(1, 3)  # half-open trial succeeds
+    assert cache._breaker.state == CLOSED
+
+
+def test_request_errors_do_not_trip_the_breaker():
+    clock = FakeClock()
+    backend, cache = make(clock)
+    for _ in range(3):
+        with pytest.raises(CustomError):
+            cache.find_top(3, {"nope": 1.0})
+    assert cache._breaker.state == CLOSED
+
+
+def test_breaker_opens_on_slow_calls_and_reopens_on_failed_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker("slow", min_calls=3, slow_call_seconds=1, slow_call_rate=0.6, open_seconds=5, clock=clock)
+    for seconds in (2, 0.1, 2):
+        assert breaker.allow()
+        breaker.record(seconds, failed=False)
+    assert breaker.state == OPEN and not breaker.allow()
+    clock.now = 5
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # one trial at a time
+    breaker.record(0.1, failed=True)
+    assert breaker.state == OPEN
+
+
+def test_expired_caller_deadlines_do_not_trip_the_breaker():
+    clock = FakeClock()
+    backend, cache = make(clock)
+    for page in range(1, 13):
+        with deadline.scope(0), pytest.raises(deadline.DeadlineExceeded):
+            cache.find_paginated(page, 5)
+    assert cache._breaker.state == CLOSED
+    assert cache.find_paginated(1, 5)[1] == 10
+
+    # a half-open trial cut by its caller's deadline hands the trial to the next call
+    cache._breaker._open()
+    clock.now = 10
+    with deadline.scope(0), pytest.raises(deadline.DeadlineExceeded):
+        cache.find_paginated(1, 3)
+    assert cache._breaker.state == HALF_OPEN
+    assert cache.find_paginated(1, 3)[1] == 10
+    assert cache._breaker.state == CLOSED
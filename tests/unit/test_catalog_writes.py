@@ -0,0 +1,234 @@
+import random
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from dependency_injector import providers
+from app import main as app_main
+from app.main import app
+from app.adapters.repositories.inmem import bitmap
+from app.adapters.repositories.inmem.catalog import Catalog, RangeIndex
+from app.adapters.repositories.inmem.planner import QueryPlanner, predicates_from_filters
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+from app.adapters.repositories.inmem.spec_normalizer import normalize_product
+from app.core.domain.product import Product, ProductSpecification
+from app.core.services.product_service import ProductServiceImpl
+from app.errors import CustomError
+
+
+def make_product(id, category="Laptops", brand="Dell", price=100.0, rating=4.0, memory=None):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category=category,
+        description="desc",
+        price=price,
+        rating=rating,
+        specifications=ProductSpecification(memory=memory),
+        availability="In Stock",
+        brand=brand,
+    )
+
+
+def random_product(rnd, id):
+    return make_product(
+        id,
+        category=rnd.choice(["Laptops", "TVs", "Smartphones"]),
+        brand=rnd.choice(["Apple", "Dell", "LG", "Samsung"]),
+        price=float(rnd.randint(1, 50) * 50),
+        rating=round(rnd.uniform(1, 5), 1),
+        memory=rnd.choice([None, "8GB", "16GB", "32GB"]),
+    )
+
+
+QUERIES = [
+    {},
+    {"category": "laptops"},
+    {"brand": ["Apple", "LG"], "min_price": 500},
+    {"min_price": 700, "max_price": 1200, "min_rating": 3},
+    {"filter": 'memory_gb >= 16 or brand == "Samsung"'},
+]
+
+
+def query_ids(catalog, kwargs, sort=None):
+    selection = QueryPlanner().execute(catalog, predicates_from_filters(**kwargs))
+    if sort:
+        return [p.id for p in catalog.sorted_page(selection, sort, 0, catalog.size)]
+    return [p.id for p in catalog.page(selection, 0, catalog.size)]
+
+
+def test_range_index_changes_match_rebuild():
+    rnd = random.Random(3)
+    values = [float(rnd.randint(0, 40)) for _ in range(500)]
+    index = RangeIndex(values)
+    current = dict(enumerate(values))
+    for _ in range(300):
+        position = rnd.randrange(600)
+        old = current.get(position)
+        new = None if rnd.random() < 0.2 else float(rnd.randint(-5, 45))
+        if old is None and new is None:
+            continue
+        index = index.with_change(position, old, new)
+        if new is None:
+            del current[position]
+        else:
+            current[position] = new
+    for low, high in [(None, 10), (5, 20), (39, None), (None, None), (50, 60)]:
+        expected = sorted(p for p, v in current.items() if (low is None or v >= low) and (high is None or v <= high))
+        assert index.count(low, high) == len(expected)
+        assert list(bitmap.iter_positions(index.between(low, high))) == expected
+
+
+def test_incremental_versions_match_full_rebuild():
+    rnd = random.Random(11)
+    products = {i: random_product(rnd, i) for i in range(1, 201)}
+    catalog = Catalog(list(products.values()))
+    # materialize columns and sort orders so they are patched, not rebuilt
+    for kwargs in QUERIES:
+        query_ids(catalog, kwargs)
+    query_ids(catalog, {}, sort="-price")
+    query_ids(catalog, {}, sort="memory_gb")
+
+    first = catalog
+    next_id = 201
+    for _ in range(400):
+        action = rnd.random()
+        if action < 0.3:
+            product = random_product(rnd, next_id)
+            next_id += 1
+        elif action < 0.5 and products:
+            product = random_product(rnd, rnd.choice(list(products)))
+        elif action < 0.55:
+            # re-create an id that may have been deleted
+            product = random_product(rnd, rnd.randint(1, next_id - 1))
+        else:
+            product_id = rnd.choice(list(products))
+            catalog = catalog.delete(product_id)
+            del products[product_id]
+            continue
+        product = normalize_product(product)
+        catalog = catalog.upsert(product)
+        products[product.id] = product
+
+    rebuilt = Catalog([catalog.products[p] for p in bitmap.iter_positions(catalog.live)])
+    assert catalog.count == len(products) == rebuilt.count
+    assert {p.id for p in catalog.live_products()} == set(products)
+    for kwargs in QUERIES:
+        assert query_ids(catalog, kwargs) == query_ids(rebuilt, kwargs)
+    for sort in ("-price", "memory_gb", "rating"):
+        assert query_ids(catalog, {}, sort=sort) == query_ids(rebuilt, {}, sort=sort)
+
+    # the first version is untouched by every later write
+    assert first.count == 200
+    assert query_ids(first, {"category": "laptops"}) == \
+        [p.id for p in first.products if p.category == "Laptops"]
+
+
+def test_sorted_pages_follow_incremental_updates():
+    catalog = Catalog([make_product(i, price=100.0 * i) for i in range(1, 6)])
+    catalog.sort_order("price")
+    catalog = catalog.upsert(make_product(2, price=1000.0))
+    catalog = catalog.upsert(make_product(6, price=50.0))
+    catalog = catalog.delete(4)
+    assert [p.id for p in catalog.sorted_page(catalog.live, "price", 0, 10)] == [6, 1, 3, 5, 2]
+    assert [p.id for p in catalog.sorted_page(catalog.live, "-price", 0, 10)] == [2, 5, 3, 1, 6]
+
+
+def test_repository_crud():
+    repo = InMemoryProductRepository(products=[make_product(i) for i in range(1, 4)])
+
+    created = repo.create(make_product(10, memory="16GB").model_dump(exclude={"numeric_specifications"}))
+    assert created.numeric_specifications.memory_gb == 16
+    assert repo.create(dict(created.model_dump(), id=None)).id == 11
+    with pytest.raises(CustomError) as err:
+        repo.create(created.model_dump())
+    assert err.value.status_code == 409
+
+    updated = repo.update(10, dict(created.model_dump(), price=5.0, id=99))
+    assert updated.id == 10 and updated.price == 5.0
+    assert repo.update(404, created.model_dump()) is None
+
+    patched = repo.patch(10, {"brand": "Apple", "specifications": {"storage": "1TB SSD"}})
+    assert patched.brand == "Apple"
+    assert patched.specifications.memory == "16GB"
+    assert patched.numeric_specifications.storage_gb == 1000
+
+    items, total = repo.find_paginated(page=1, size=10, brand="apple")
+    assert total == 1 and items[0].id == 10
+
+    assert repo.delete(10) is True
+    assert repo.delete(10) is False
+    assert repo.find_by_id(10) is None
+    assert repo.find_paginated(page=1, size=10)[1] == 4
+    assert repo.find_similar(10, 3) is None
+
+
+def test_readers_never_see_torn_versions():
+    products = read_products()
+    repo = InMemoryProductRepository(products=products)
+    laptops = [p for p in products if p.category == "Laptops"]
+    stop = threading.Event()
+    failures = []
+
+    def writer():
+        rnd = random.Random(5)
+        while not stop.is_set():
+            product = rnd.choice(laptops)
+            repo.patch(product.id, {"category": "TVs"})
+            repo.patch(product.id, {"category": "Laptops"})
+
+    def reader():
+        for _ in range(300):
+            catalog = repo._catalog
+            items, total = repo.find_paginated(page=1, size=100, category="Laptops")
+            tvs = repo.find_paginated(page=1, size=100, category="TVs")[1]
+            if len(items) != total or any(p.category != "Laptops" for p in items):
+                failures.append((total, [p.category for p in items]))
+            # within one snapshot, index counts agree with the products
+            count = catalog.values_count("category", ["laptops"])
+            if count != sum(p.category == "Laptops" for p in catalog.live_products()):
+                failures.append(count)
+            if not len(laptops) - 1 <= total <= len(laptops) or tvs < 1:
+                failures.append(("range", total, tvs))
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for r in readers:
+        r.start()
+    for r in readers:
+        r.join()
+    stop.set()
+    thread.join()
+    assert failures == []
+
+
+def test_write_routes():
+    repo = InMemoryProductRepository(products=[make_product(i) for i in range(1, 4)])
+    app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+    try:
+        client = TestClient(app)
+        headers = {"X-Admin-Token": "secret"}
+        body = {"name": "New", "category": "TVs", "description": "d", "price": 10, "rating": 4,
+                "availability": "In Stock", "brand": "LG", "specifications": {"display": "55-inch 120Hz"}}
+
+        assert client.post("/v1/products", json=body).status_code == 401
+        resp = client.post("/v1/products", json=body, headers=headers)
+        assert resp.status_code == 201
+        created = resp.json()
+        assert created["id"] == 4
+        assert created["numeric_specifications"]["refresh_hz"] == 120
+        assert client.post("/v1/products", json=dict(body, id=4), headers=headers).status_code == 409
+
+        assert client.get("/v1/products/4").json()["name"] == "New"
+        assert client.put("/v1/products/4", json=dict(body, price=20), headers=headers).json()["price"] == 20
+        assert client.patch("/v1/products/4", json={"rating": 5}, headers=headers).json()["rating"] == 5
+        assert client.patch("/v1/products/4", json={"name": None}, headers=headers).status_code == 422
+        assert client.get("/v1/products?category=TVs").json()["total"] == 1
+
+        assert client.delete("/v1/products/4", headers=headers).status_code == 204
+        assert client.delete("/v1/products/4", headers=headers).status_code == 404
+        assert client.get("/v1/products/4").status_code == 404
+        assert client.patch("/v1/products/4", json={"rating": 1}, headers=headers).status_code == 404
+        assert client.get("/v1/products/top").status_code == 200
+    finally:
+        app_main.container.product_service.reset_override()
@@ -0,0 +1,85 @@
+from fastapi.testclient import TestClient
+from dependency_injector import providers
+from app import main as app_main
+from app.main import app
+from app.adapters.repositories.inmem.change_log import CREATED, DELETED, UPDATED, ChangeLog
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.core.domain.product import Product, ProductSpecification
+from app.core.services.product_service import ProductServiceImpl
+
+
+def make_product(id, price=10.0):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category="Laptops",
+        description="desc",
+        price=price,
+        rating=4.0,
+        specifications=ProductSpecification(),
+        availability="In Stock",
+        brand="Dell",
+    )
+
+
+def test_changes_are_collapsed_per_product():
+    log = ChangeLog(capacity=10)
+    for generation, (product_id, op) in enumerate([
+        (1, UPDATED), (2, CREATED), (1, UPDATED), (3, CREATED), (3, DELETED), (4, DELETED), (4, CREATED),
+    ], start=1):
+        log.append(generation, product_id, op)
+    assert log.changes(0, 7) == {1: UPDATED, 2: CREATED, 4: UPDATED}
+    assert log.changes(4, 7) == {3: DELETED, 4: UPDATED}
+    assert log.changes(7, 7) == {}
+    # bounded by the generation the reader's snapshot is at
+    assert log.changes(0, 2) == {1: UPDATED, 2: CREATED}
+
+
+def test_clients_too_far_behind_must_resync():
+    log = ChangeLog(capacity=3, start=5)
+    assert log.changes(4, 5) is None
+    for generation in range(6, 11):
+        log.append(generation, generation, UPDATED)
+    assert log.oldest == 7
+    assert log.changes(6, 10) is None
+    assert log.changes(7, 10) == {8: UPDATED, 9: UPDATED, 10: UPDATED}
+    assert log.changes(11, 10) is None
+
+
+def test_repository_changes_since_generation():
+    repo = InMemoryProductRepository(products=[make_product(i) for i in range(1, 4)])
+    start, changes = repo.find_changes(since=0)
+    assert changes is None  # generation 0 belongs to the pre-load catalog
+    assert repo.find_changes(since=start) == (start, [])
+
+    repo.create(make_product(4).model_dump())
+    repo.patch(1, {"price": 99.0})
+    repo.delete(2)
+    generation, changes = repo.find_changes(since=start)
+    assert generation == start + 3
+    assert [(c.id, c.op) for c in changes] == [(4, CREATED), (1, UPDATED), (2, DELETED)]
+    assert changes[1].product.price == 99.0 and changes[2].product is None
+
+    # a reload invalidates every earlier generation
+    repo._products = [make_product(1)]
+    assert repo.find_changes(since=generation)[1] is None
+
+
+def test_changes_route():
+    repo = InMemoryProductRepository(products=[make_product(i) for i in range(1, 4)])
+    app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+    try:
+        client = TestClient(app)
+        first = client.get("/v1/products/changes?since=0").json()
+        assert first["resync_required"] is True and first["changes"] == []
+
+        client.patch("/v1/products/2", json={"rating": 5}, headers={"X-Admin-Token": "secret"})
+        response = client.get(f"/v1/products/changes?since={first['generation']}")
+        assert response.headers["x-result-count"] == "1"
+        data = response.json()
+        assert data["resync_required"] is False
+        assert data["generation"] == first["generation"] + 1
+        assert [(c["id"], c["op"], c["product"]["rating"]) for c in data["changes"]] == [(2, "updated", 5)]
+        assert client.get("/v1/products/changes").status_code == 422
+    finally:
+        app_main.container.product_service.reset_override()
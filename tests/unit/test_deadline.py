@@ -0,0 +1,157 @@
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app import deadline
+from app.adapters.httphandlers.single_flight import SingleFlight
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+from app.errors import error_handler
+from app.middlewares import ObservabilityMiddleware
+
+
+def avoided(stage):
+    return REGISTRY.get_sample_value("request_deadline_avoided_total", {"stage": stage}) or 0.0
+
+
+def test_parse_budget():
+    assert deadline.parse_budget([]) is None
+    assert deadline.parse_budget([(b"grpc-timeout", b"250m")]) == pytest.approx(0.25)
+    assert deadline.parse_budget([(b"grpc-timeout", b"2S")]) == 2.0
+    assert deadline.parse_budget([(b"grpc-timeout", b"1H")]) == 3600.0
+    assert deadline.parse_budget([(b"x-request-deadline", b"1000.5")], now=1000.0) == 0.5
+    # the earlier of both wins; malformed values are ignored
+    headers = [(b"x-request-deadline", b"1003"), (b"grpc-timeout", b"1S")]
+    assert deadline.parse_budget(headers, now=1000.0) == 1.0
+    assert deadline.parse_budget([(b"grpc-timeout", b"5x"), (b"x-request-deadline", b"soon")]) is None
+    assert deadline.parse_budget([(b"x-request-deadline", b"999")], now=1000.0) == -1.0
+
+
+def test_check_outside_and_inside_a_deadline():
+    deadline.check("test")  # no deadline: never expires
+    assert deadline.remaining() is None
+    with deadline.scope(10):
+        assert 9 < deadline.remaining() <= 10
+        deadline.check("test")
+    before = avoided("test")
+    with deadline.scope(0):
+        with pytest.raises(deadline.DeadlineExceeded) as err:
+            deadline.check("test")
+    assert err.value.status_code == 504 and err.value.code == "ERR0001"
+    assert avoided("test") == before + 1
+    assert deadline.remaining() is None
+
+
+def test_repository_stops_once_the_deadline_passed():
+    repo = InMemoryProductRepository(products=read_products())
+    with deadline.scope(5):
+        assert repo.find_paginated(page=1, size=5, category="Laptops", min_price=100)[1] > 0
+    before = avoided("planner") + avoided("repository") + avoided("search")
+    with deadline.scope(0), pytest.raises(deadline.DeadlineExceeded):
+        repo.find_paginated(page=1, size=5, category="Laptops", min_price=100, q="apple")
+    assert avoided("planner") + avoided("repository") + avoided("search") == before + 1
+
+
+def make_app(timeout=5.0):
+    app = FastAPI()
+    error_handler(app)
+    app.add_middleware(ObservabilityMiddleware, timeout=timeout)
+    state = {"steps": 0, "calls": 0, "done": threading.Event()}
+
+    @app.get("/work")
+    def work():
+        state["calls"] += 1
+        try:
+            for _ in range(200):
+                deadline.check("test-work")
+                state["steps"] += 1
+                time.sleep(0.01)
+        finally:
+            state["done"].set()
+        return {"ok": True}
+
+    return app, state
+
+
+def test_expired_requests_are_rejected_before_the_handler():
+    app, state = make_app()
+    before = avoided("admission")
+    resp = TestClient(app).get("/work", headers={"X-Request-Deadline": str(time.time() - 1)})
+    assert resp.status_code == 504 and resp.json()["code"] == "ERR0001"
+    assert state["calls"] == 0
+    assert avoided("admission") == before + 1
+
+
+def test_timed_out_sync_handler_stops_at_its_next_check():
+    app, state = make_app()
+    abandoned = REGISTRY.get_sample_value("request_deadline_abandoned_total")
+    resp = TestClient(app).get("/work", headers={"grpc-timeout": "100m"})
+    assert resp.status_code == 504
+    assert REGISTRY.get_sample_value("request_deadline_abandoned_total") == abandoned + 1
+    # the handler thread gives up shortly after the 504 instead of running 2 seconds
+    assert state["done"].wait(1)
+    assert state["steps"] < 50
+
+
+def test_server_timeout_caps_the_caller_budget():
+    app, state = make_app(timeout=0.1)
+    assert TestClient(app).get("/work", headers={"grpc-timeout": "10S"}).status_code == 504
+    assert state["done"].wait(1) and state["steps"] < 50
+
+
+def test_single_flight_followers_keep_their_own_budget():
+    flight = SingleFlight("test-deadline")
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            release.wait(1)
+            deadline.check("test-leader")
+        return "value"
+
+    def leader():
+        with deadline.scope(0.05):
+            with pytest.raises(deadline.DeadlineExceeded):
+                flight.do("key", compute)
+
+    def follower(result):
+        with deadline.scope(5):
+            result.append(flight.do("key", compute))
+
+    result = []
+    threads = [threading.Thread(target=leader)]
+    threads[0].start()
+    started.wait(1)
+    threads.append(threading.Thread(target=follower, args=(result,)))
+    threads[1].start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert result == ["value"] and len(calls) == 2
+
+
+def test_single_flight_follower_stops_waiting_at_its_deadline():
+    flight = SingleFlight("test-deadline-wait")
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(2)
+        return "late"
+
+    leader = threading.Thread(target=flight.do, args=("key", slow))
+    leader.start()
+    started.wait(1)
+    start = time.perf_counter()
+    with deadline.scope(0.05), pytest.raises(deadline.DeadlineExceeded):
+        flight.do("key", slow)
+    assert time.perf_counter() - start < 1
+    release.set()
+    leader.join(2)
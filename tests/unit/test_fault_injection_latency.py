@@ -75,13 +75,43 @@ def test_mitigate_resets_latency():
     _inject_latency(300)  # 0.3s
 
     # Request com latência
-    t1 = time.time(); client.get("/v1/products"); d1 = time.time() - t1
+    t1 = time.time()
+    client.get("/v1/products")
+    d1 = time.time() - t1
     assert d1 >= 0.25  # tolerância ~50ms
 
     # Mitiga
     _mitigate()
 
-    t2 = time.time(); client.get("/v1/products"); d2 = time.time() - t2
+    t2 = time.time()
+    client.get("/v1/products")
+    d2 = time.time() - t2
 
     # Após mitigação deve reduzir substancialmente (>120ms de diferença)
     assert (d1 - d2) >= 0.12
+
+
+def test_delayed_requests_do_not_slow_down_other_routes():
+    import asyncio
+    import httpx
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # more delayed requests than Starlette's threadpool has workers (40)
+            delayed = [
+                asyncio.create_task(client.get("/v1/products", params={"page": i % 5 + 1}, headers={"X-Delay": "1"}))
+                for i in range(100)
+            ]
+            await asyncio.sleep(0.1)
+            start = time.perf_counter()
+            healthy = await client.get("/v1/products/1")
+            healthy_seconds = time.perf_counter() - start
+            responses = await asyncio.gather(*delayed)
+            return healthy, healthy_seconds, responses
+
+    _mitigate()
+    healthy, healthy_seconds, responses = asyncio.run(scenario())
+    assert healthy.status_code == 200
+    assert healthy_seconds < 0.3
+    assert all(r.status_code == 200 for r in responses)
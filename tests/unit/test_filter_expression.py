@@ -0,0 +1,112 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.adapters.repositories.inmem.catalog import Catalog
+from app.adapters.repositories.inmem.filter_expression import FilterExpressionError, compile_filter
+from app.core.domain.product import NumericSpecification, Product, ProductSpecification
+from app.main import app
+
+
+def make_product(id, brand, price, display_type=None):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category="TVs",
+        description="desc",
+        price=price,
+        rating=4.0,
+        specifications=ProductSpecification(display_type=display_type),
+        availability="In Stock",
+        brand=brand,
+    )
+
+
+@pytest.fixture
+def catalog():
+    return Catalog([
+        make_product(1, "Apple", 1000.0, "OLED"),
+        make_product(2, "Dell", 1400.0, "LED"),
+        make_product(3, "Apple", 2000.0, "OLED"),
+        make_product(4, "LG", 900.0, "OLED"),
+        make_product(5, "Dell", 1200.0),
+    ])
+
+
+def ids(catalog, expression):
+    mask = compile_filter(expression)(catalog)
+    return [p.id for p, keep in zip(catalog.products, mask) if keep]
+
+
+def test_compound_expression(catalog):
+    expression = 'price < 1500 and brand in ("Apple","Dell") and specifications.display_type == "OLED"'
+    assert ids(catalog, expression) == [1]
+
+
+def test_or_not_and_parentheses(catalog):
+    assert ids(catalog, "brand == 'lg' or (price >= 2000)") == [3, 4]
+    assert ids(catalog, 'not brand == "Apple"') == [2, 4, 5]
+    assert ids(catalog, 'brand not in ("Apple", "LG")') == [2, 5]
+
+
+def test_missing_values_never_match(catalog):
+    assert ids(catalog, 'specifications.display_type != "OLED"') == [2]
+
+
+def test_negation_does_not_bring_missing_values_back(catalog):
+    assert ids(catalog, 'not specifications.display_type == "OLED"') == [2]
+    assert ids(catalog, 'not specifications.display_type in ("LED")') == [1, 3, 4]
+    assert ids(catalog, 'not not specifications.display_type == "OLED"') == [1, 3, 4]
+
+    sized = Catalog([
+        make_product(1, "A", 500.0).model_copy(update={"numeric_specifications": NumericSpecification(screen_inches=6.0)}),
+        make_product(2, "B", 500.0).model_copy(update={"numeric_specifications": NumericSpecification(screen_inches=7.0)}),
+        make_product(3, "C", 500.0),
+        make_product(4, "D", 1500.0),
+    ])
+    assert ids(sized, "not screen_inches == 6") == ids(sized, "screen_inches != 6") == [2]
+    assert ids(sized, "not (screen_inches < 6.5)") == [2]
+    # three-valued: a known false side decides, an unknown one does not
+    assert ids(sized, "not (screen_inches > 6.5 and price > 1000)") == [1, 2, 3]
+    assert ids(sized, "not (screen_inches > 6.5 or price > 1000)") == [1]
+
+
+def test_compiled_form_is_cached():
+    assert compile_filter("price > 1") is compile_filter("price > 1")
+
+
+@pytest.mark.parametrize("expression", [
+    "",
+    "price <",
+    "unknown == 1",
+    'price == "cheap"',
+    'brand < "Apple"',
+    "brand in ()",
+    "price > 1 and",
+    "price > 1 )",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(FilterExpressionError):
+        compile_filter(expression)
+
+
+def test_filter_query_parameter():
+    client = TestClient(app)
+    resp = client.get("/v1/products", params={"filter": 'brand == "Apple" and price < 1000', "page_size": 100})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] == len(data["items"]) > 0
+    assert all(p["brand"] == "Apple" and p["price"] < 1000 for p in data["items"])
+
+    resp = client.get("/v1/products", params={"filter": "price <"})
+    assert resp.status_code == 400
+    assert resp.json()["code"] == "ERR0002"
+
+
+def test_deep_nesting_is_rejected():
+    assert compile_filter("(" * 32 + "price > 1" + ")" * 32) is not None
+    with pytest.raises(FilterExpressionError):
+        compile_filter("not " * 500 + "price > 1")
+
+    client = TestClient(app)
+    resp = client.get("/v1/products", params={"filter": "(" * 400 + "price > 1" + ")" * 400})
+    assert resp.status_code == 400
+    assert resp.json()["code"] == "ERR0002"
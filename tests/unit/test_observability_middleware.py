@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.middlewares import ObservabilityMiddleware
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_app(timeout=5.0):
+    app = FastAPI()
+    log = logging.getLogger("observability-test")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    handler = ListHandler()
+    log.handlers = [handler]
+    app.add_middleware(ObservabilityMiddleware, logger=log, timeout=timeout)
+
+    @app.get("/obs/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.post("/obs/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.get("/obs/slow")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    @app.get("/obs/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app, handler.records
+
+
+def count(path, status):
+    labels = {"method": "GET", "endpoint": path, "http_status": str(status)}
+    return REGISTRY.get_sample_value("http_requests_total", labels) or 0.0
+
+
+def test_records_metrics_and_access_log():
+    app, records = make_app()
+    client = TestClient(app)
+    before = count("/obs/ok", 200)
+    assert client.get("/obs/ok", params={"a": "1"}).status_code == 200
+    assert count("/obs/ok", 200) == before + 1
+    assert REGISTRY.get_sample_value("http_requests_inprogress", {"method": "GET", "endpoint": "/obs/ok"}) == 0
+    record = records[-1]
+    assert record.getMessage() == "HTTP request completed"
+    assert (record.method, record.path, record.query, record.status_code) == ("GET", "/obs/ok", "a=1", 200)
+    assert record.duration_ms >= 0
+
+
+def test_logs_small_request_bodies_only():
+    app, records = make_app()
+    client = TestClient(app)
+    assert client.post("/obs/echo", content=b'{"x": 1}').json() == {"size": 8}
+    assert records[-1].request_body == '{"x": 1}'
+    assert client.post("/obs/echo", content=b"x" * 2048).json() == {"size": 2048}
+    assert not hasattr(records[-1], "request_body")
+
+
+def test_health_bypasses_metrics_and_log():
+    app, records = make_app()
+    client = TestClient(app)
+    assert client.get("/health").status_code == 200
+    assert count("/health", 200) == 0
+    assert records == []
+
+
+def test_timeout_returns_504():
+    app, records = make_app(timeout=0.01)
+    client = TestClient(app)
+    before = REGISTRY.get_sample_value("http_request_errors_total", {"method": "GET", "endpoint": "/obs/slow", "http_status": "504"}) or 0.0
+    resp = client.get("/obs/slow")
+    assert resp.status_code == 504
+    assert resp.json()["code"] == "ERR0001"
+    assert REGISTRY.get_sample_value("http_request_errors_total", {"method": "GET", "endpoint": "/obs/slow", "http_status": "504"}) == before + 1
+    assert [r.getMessage() for r in records] == ["Request timed out", "HTTP request completed"]
+
+
+def test_unhandled_exception_counts_as_500():
+    app, _ = make_app()
+    client = TestClient(app, raise_server_exceptions=False)
+    labels = {"method": "GET", "endpoint": "/obs/boom", "http_status": "500"}
+    before = REGISTRY.get_sample_value("http_request_errors_total", labels) or 0.0
+    assert client.get("/obs/boom").status_code == 500
+    assert REGISTRY.get_sample_value("http_request_errors_total", labels) == before + 1
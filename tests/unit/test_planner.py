@@ -0,0 +1,57 @@
+import random
+from app.adapters.repositories.inmem import bitmap
+from app.adapters.repositories.inmem.catalog import Catalog, RangeIndex
+from app.adapters.repositories.inmem.planner import QueryPlanner, RangePredicate, ValuePredicate, predicates_from_filters
+from app.core.domain.product import Product, ProductSpecification
+
+
+def make_product(id, category, brand, price, rating=4.0):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category=category,
+        description="desc",
+        price=price,
+        rating=rating,
+        specifications=ProductSpecification(),
+        availability="In Stock",
+        brand=brand,
+    )
+
+
+def test_bitmap_select_and_popcount():
+    bm = bitmap.from_positions([1, 3, 64, 130, 131])
+    assert bitmap.popcount(bm) == 5
+    assert bitmap.select(bm, 0, 2) == [1, 3]
+    assert bitmap.select(bm, 2, 10) == [64, 130, 131]
+    assert bitmap.select(bm, 5, 10) == []
+    assert list(bitmap.iter_positions(bm)) == [1, 3, 64, 130, 131]
+
+
+def test_range_index_matches_linear_scan():
+    rnd = random.Random(7)
+    values = [round(rnd.uniform(0, 100), 1) for _ in range(1000)]
+    index = RangeIndex(values)
+    for low, high in [(None, 10), (25.5, 75), (90, None), (50, 40), (None, None)]:
+        expected = [i for i, v in enumerate(values) if (low is None or v >= low) and (high is None or v <= high)]
+        assert index.count(low, high) == len(expected)
+        assert list(bitmap.iter_positions(index.between(low, high))) == expected
+
+
+def test_planner_intersects_predicates():
+    products = [
+        make_product(i, "Laptops" if i % 2 else "TVs", "Apple" if i % 3 == 0 else "Dell", price=100.0 * i)
+        for i in range(1, 31)
+    ]
+    catalog = Catalog(products)
+    predicates = predicates_from_filters(category=["laptops"], brand="APPLE", min_price=500, max_price=2500)
+    assert {type(p) for p in predicates} == {ValuePredicate, RangePredicate}
+
+    selection = QueryPlanner().execute(catalog, predicates)
+    expected = [p.id for p in products if p.category == "Laptops" and p.brand == "Apple" and 500 <= p.price <= 2500]
+    assert [catalog.products[p].id for p in bitmap.iter_positions(selection)] == expected
+
+
+def test_planner_without_predicates_returns_everything():
+    catalog = Catalog([make_product(i, "TVs", "LG", 10.0) for i in range(5)])
+    assert bitmap.popcount(QueryPlanner().execute(catalog, [])) == 5
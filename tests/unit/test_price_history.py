@@ -0,0 +1,108 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from dependency_injector import providers
+from app import main as app_main
+from app.adapters.repositories.inmem.price_history import TIERS, PriceHistoryStore, PriceRing
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.core.domain.product import Product, ProductSpecification
+from app.core.services.product_service import ProductServiceImpl
+
+HOUR = 3600
+DAY = 86400
+
+
+def make_product(id, price):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category="Laptops",
+        description="desc",
+        price=price,
+        rating=4.0,
+        specifications=ProductSpecification(),
+        availability="In Stock",
+        brand="Dell",
+    )
+
+
+def test_ring_range_queries_across_the_wrap():
+    ring = PriceRing(capacity=10)
+    for t in range(25):
+        ring.append(float(t), float(t * 2))
+    assert len(ring) == 10 and ring.wrapped
+    kept = [(float(t), float(t * 2)) for t in range(15, 25)]
+    assert ring.between(None, None) == kept
+    for since in range(10, 27):
+        for until in range(since, 27):
+            assert ring.between(since, until) == [p for p in kept if since <= p[0] <= until]
+
+
+def test_memory_stays_bounded():
+    store = PriceHistoryStore()
+    for i in range(5000):
+        store.record(1, float(i), timestamp=i * 900.0)  # every 15 minutes for ~52 days
+    rings = store._series[1].rings
+    assert len(rings["raw"]) == TIERS["raw"][1]
+    assert len(rings["hour"]) == TIERS["hour"][1]
+    assert len(rings["day"]) == 53
+
+
+def test_downsampled_tiers_keep_the_closing_price():
+    store = PriceHistoryStore()
+    store.record(1, 100.0, timestamp=DAY + 10)
+    store.record(1, 90.0, timestamp=DAY + 20)
+    store.record(1, 95.0, timestamp=DAY + HOUR + 5)
+    assert store.between(1, resolution="raw")[1] == [(DAY + 10.0, 100.0), (DAY + 20.0, 90.0), (DAY + HOUR + 5.0, 95.0)]
+    assert store.between(1, resolution="hour")[1] == [(float(DAY), 90.0), (float(DAY + HOUR), 95.0)]
+    assert store.between(1, resolution="day")[1] == [(float(DAY), 95.0)]
+
+
+def test_default_resolution_is_the_finest_covering_since():
+    store = PriceHistoryStore()
+    for i in range(1000):
+        store.record(1, float(i), timestamp=i * 60.0)
+    oldest_raw = store._series[1].rings["raw"].oldest()
+    assert store.between(1, since=oldest_raw)[0] == "raw"
+    assert store.between(1, since=oldest_raw - 60)[0] == "hour"
+    assert store.between(1)[0] == "hour"  # the hourly tier still holds everything
+
+
+def test_clock_stepping_back_keeps_points_ordered():
+    times = iter([1000.0, 900.0, 1100.0])
+    store = PriceHistoryStore(clock=lambda: next(times))
+    for price in (1.0, 2.0, 3.0):
+        store.record(1, price)
+    assert [t for t, _ in store.between(1, resolution="raw")[1]] == [1000.0, 1000.0, 1100.0]
+
+
+def test_repository_records_price_changes():
+    repo = InMemoryProductRepository(products=[make_product(1, 100.0)])
+    assert repo.find_price_history(1).points == []
+    repo.patch(1, {"price": 90.0})
+    repo.patch(1, {"rating": 4.5})  # price unchanged: no point
+    repo.update(1, make_product(1, 80.0).model_dump())
+    history = repo.find_price_history(1)
+    assert history.current_price == 80.0 and history.resolution == "raw"
+    assert [p.price for p in history.points] == [90.0, 80.0]
+    future = datetime(2100, 1, 1, tzinfo=timezone.utc)
+    assert repo.find_price_history(1, since=future).points == []
+    repo.delete(1)
+    assert repo.find_price_history(1) is None
+    repo.create(make_product(1, 70.0).model_dump())
+    assert [p.price for p in repo.find_price_history(1).points] == [70.0]
+
+
+def test_price_history_route():
+    repo = InMemoryProductRepository(products=[make_product(1, 100.0)])
+    repo.patch(1, {"price": 120.0})
+    app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+    try:
+        client = TestClient(app_main.app)
+        body = client.get("/v1/products/1/price-history", params={"resolution": "day"}).json()
+        assert body["resolution"] == "day" and body["current_price"] == 120.0
+        assert [p["price"] for p in body["points"]] == [120.0]
+        assert client.get("/v1/products/1/price-history", params={"since": "2100-01-01T00:00:00Z"}).json()["points"] == []
+        assert client.get("/v1/products/1/price-history", params={"resolution": "minute"}).status_code == 422
+        assert client.get("/v1/products/999/price-history").status_code == 404
+    finally:
+        app_main.container.product_service.reset_override()
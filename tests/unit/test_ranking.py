@@ -0,0 +1,68 @@
+import heapq
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.adapters.repositories.inmem.catalog import Catalog
+from app.adapters.repositories.inmem.ranking import Normalizer, top_k
+from app.core.domain.product import Product, ProductSpecification
+from app.errors import CustomError
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.main import app
+
+
+def make_product(id, price, rating, category="Laptops"):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category=category,
+        description="desc",
+        price=price,
+        rating=rating,
+        specifications=ProductSpecification(),
+        availability="In Stock",
+        brand="Brand",
+    )
+
+
+def test_top_k_matches_full_sort():
+    rnd = np.random.default_rng(11)
+    products = [make_product(i, float(p), float(r)) for i, (p, r) in
+                enumerate(zip(rnd.uniform(100, 5000, 500), rnd.uniform(1, 5, 500)))]
+    catalog = Catalog(products)
+    weights = {"rating": 0.7, "price": -0.3}
+    mask = np.ones(catalog.size, dtype=bool)
+
+    normalizer = Normalizer(catalog)
+    scores = 0.7 * normalizer.column("rating") - 0.3 * normalizer.column("price")
+    expected = heapq.nlargest(10, range(catalog.size), key=lambda p: scores[p])
+    assert top_k(catalog, mask, weights, 10) == expected
+
+
+def test_repository_top_respects_filters_and_validates_fields():
+    repo = InMemoryProductRepository.__new__(InMemoryProductRepository)
+    repo._products = [
+        make_product(1, 1000.0, 4.0),
+        make_product(2, 900.0, 4.9),
+        make_product(3, 500.0, 5.0, category="TVs"),
+        make_product(4, 3000.0, 4.9),
+    ]
+    top = repo.find_top(k=2, weights={"rating": 0.7, "price": -0.3}, category="Laptops")
+    assert [p.id for p in top] == [2, 4]
+
+    with pytest.raises(CustomError):
+        repo.find_top(k=2, weights={"name": 1.0})
+
+
+def test_top_route():
+    client = TestClient(app)
+    resp = client.get("/v1/products/top", params={"k": 3, "category": "Laptops", "weights": "rating:0.7,price:-0.3"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(data["items"]) == 3
+    assert all(p["category"] == "Laptops" for p in data["items"])
+    assert data["weights"] == {"rating": 0.7, "price": -0.3}
+
+    assert client.get("/v1/products/top", params={"weights": "rating"}).status_code == 400
+    assert client.get("/v1/products/top", params={"weights": "name:1"}).status_code == 400
+    for weight in ("nan", "inf", "-inf"):
+        assert client.get("/v1/products/top", params={"weights": f"price:{weight}"}).status_code == 400
@@ -0,0 +1,153 @@
+import multiprocessing
+import pytest
+import httpx
+import asyncio
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from fastapi import Response
+from app.rate_limit import RateLimitMiddleware, SharedTokenBuckets, client_key, request_cost, result_cost
+
+
+def test_bucket_allows_the_burst_then_refills(tmp_path):
+    buckets = SharedTokenBuckets(str(tmp_path / "rl"), rate=10, burst=30, slots=64)
+    assert buckets.acquire("a", 20, now=100.0) == (True, 0.0)
+    allowed, wait = buckets.acquire("a", 20, now=100.0)
+    assert not allowed and wait == 1.0  # 10 tokens left, 10 more at 10/s
+    assert buckets.acquire("b", 20, now=100.0)[0]  # separate client
+    assert buckets.acquire("a", 20, now=101.0)[0]
+    # refills never exceed the burst and costs are capped to it
+    assert buckets.acquire("a", 100, now=1000.0)[0]
+    assert not buckets.acquire("a", 1, now=1000.0)[0]
+    buckets.close()
+
+
+def test_full_groups_reuse_the_oldest_slot(tmp_path):
+    buckets = SharedTokenBuckets(str(tmp_path / "rl"), rate=1, burst=5, slots=8)  # a single group
+    before = REGISTRY.get_sample_value("rate_limit_evictions_total")
+    for client in range(9):
+        assert buckets.acquire(f"c{client}", 5, now=float(client))[0]
+    assert REGISTRY.get_sample_value("rate_limit_evictions_total") == before + 1
+    assert buckets.acquire("c0", 5, now=9.0)[0]  # evicted: starts again with a full bucket
+    assert not buckets.acquire("c8", 5, now=9.0)[0]
+    buckets.close()
+
+
+def _drain(path, count):
+    buckets = SharedTokenBuckets(path, rate=0.001, burst=100, slots=64)
+    for _ in range(count):
+        buckets.acquire("partner", 1)
+    buckets.close()
+
+
+def test_workers_share_one_budget(tmp_path):
+    path = str(tmp_path / "rl")
+    buckets = SharedTokenBuckets(path, rate=0.001, burst=100, slots=64)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_drain, args=(path, 30)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    assert buckets.acquire("partner", 10)[0]
+    assert not buckets.acquire("partner", 1)[0]
+    buckets.close()
+
+
+def test_debits_can_overdraw_down_to_minus_the_burst(tmp_path):
+    buckets = SharedTokenBuckets(str(tmp_path / "rl"), rate=10, burst=30, slots=64)
+    buckets.debit("a", 80, now=100.0)
+    allowed, wait = buckets.acquire("a", 1, now=100.0)
+    assert not allowed and wait == pytest.approx(3.1)  # 30 - 80 stops at -30: 31 tokens at 10/s
+    assert buckets.acquire("a", 1, now=103.2)[0]
+    buckets.close()
+
+
+def test_layout_change_resets_the_file(tmp_path):
+    path = str(tmp_path / "rl")
+    old = SharedTokenBuckets(path, rate=1, burst=5, slots=64)
+    old.acquire("a", 5, now=0.0)
+    old.close()
+    new = SharedTokenBuckets(path, rate=1, burst=5, slots=128)
+    assert new.acquire("a", 5, now=0.0)[0]
+    new.close()
+
+
+def scope(query=b"", headers=(), client=("10.0.0.1", 5000)):
+    return {"type": "http", "path": "/v1/products", "query_string": query, "headers": list(headers), "client": client}
+
+
+def test_cost_and_client_identity():
+    assert request_cost(scope()) == 1
+    assert request_cost(scope(b"page=2&page_size=100")) == 10
+    assert request_cost(scope(b"page_size=15")) == 2
+    assert request_cost(scope(b"k=5")) == 1
+    assert request_cost(scope(b"page_size=abc")) == 1
+    assert result_cost([(b"content-type", b"application/json")]) is None
+    assert result_cost([(b"x-result-count", b"0")]) == 1
+    assert result_cost([(b"x-result-count", b"250")]) == 25
+    assert client_key(scope()) == "ip:10.0.0.1"
+    assert client_key(scope(headers=[(b"x-api-key", b"partner-1")])) == "key:partner-1"
+
+
+def test_middleware_limits_per_client(tmp_path):
+    app = FastAPI()
+    buckets = SharedTokenBuckets(str(tmp_path / "rl"), rate=1, burst=20, slots=64)
+    app.add_middleware(RateLimitMiddleware, buckets=buckets)
+
+    @app.get("/v1/products")
+    async def products():
+        return {"items": []}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    limited_before = REGISTRY.get_sample_value("rate_limit_decisions_total", {"decision": "limited"}) or 0.0
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            partner = {"X-API-Key": "partner"}
+            first = await client.get("/v1/products", params={"page_size": 100}, headers=partner)
+            second = await client.get("/v1/products", params={"page_size": 100}, headers=partner)
+            third = await client.get("/v1/products", params={"page_size": 100}, headers=partner)
+            other = await client.get("/v1/products", params={"page_size": 100}, headers={"X-API-Key": "other"})
+            probes = [await client.get("/health", headers=partner) for _ in range(5)]
+            return first, second, third, other, probes
+
+    first, second, third, other, probes = asyncio.run(scenario())
+    assert first.status_code == 200 and second.status_code == 200
+    assert third.status_code == 429
+    assert third.json()["code"] == "ERR0008"
+    assert int(third.headers["retry-after"]) >= 9
+    assert other.status_code == 200
+    assert all(r.status_code == 200 for r in probes)
+    assert REGISTRY.get_sample_value("rate_limit_decisions_total", {"decision": "limited"}) == limited_before + 1
+    buckets.close()
+
+
+def test_exports_are_charged_by_the_size_of_the_response(tmp_path):
+    app = FastAPI()
+    buckets = SharedTokenBuckets(str(tmp_path / "rl"), rate=0.001, burst=100, slots=64)
+    app.add_middleware(RateLimitMiddleware, buckets=buckets)
+
+    @app.get("/v1/products/changes")
+    async def changes(response: Response):
+        response.headers["X-Result-Count"] = "1500"
+        return {"changes": []}
+
+    debited_before = REGISTRY.get_sample_value("rate_limit_tokens_total", {"decision": "debited"}) or 0.0
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            partner = {"X-API-Key": "partner"}
+            first = await client.get("/v1/products/changes", params={"since": 0}, headers=partner)
+            second = await client.get("/v1/products/changes", params={"since": 0}, headers=partner)
+            return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.status_code == 200  # admitted for 1 token, then charged 150
+    assert second.status_code == 429
+    assert REGISTRY.get_sample_value("rate_limit_tokens_total", {"decision": "debited"}) == debited_before + 149
+    buckets.close()
@@ -1,6 +1,8 @@
+import asyncio
 import time
 import types
 from unittest.mock import patch, mock_open
+from app import faults as faults_module
 from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
 from app.core.domain.product import Product, ProductSpecification
 
@@ -60,21 +62,29 @@ def test_category_filter_single_and_multiple(monkeypatch):
 
 
 def test_delay_respected(monkeypatch):
+    # X-Delay and injected latency are awaited by the inject_delay dependency;
+    # the repository itself never blocks its worker thread
     repo = InMemoryProductRepository.__new__(InMemoryProductRepository)
     repo._products = [make_product(1, "p1", "Laptops")]
 
-    slept = {"t": 0}
-
-    def fake_sleep(sec):
-        slept["t"] = sec
-
-    monkeypatch.setattr(time, "sleep", fake_sleep)
+    def fail_sleep(sec):
+        raise AssertionError("repository must not sleep")
 
+    monkeypatch.setattr(time, "sleep", fail_sleep)
     items, total = repo.find_paginated(page=1, size=10, delay=2)
-    assert slept["t"] == 2
     assert total == 1
     assert items[0].id == 1
 
+    awaited = []
+
+    async def fake_sleep(sec):
+        awaited.append(sec)
+
+    monkeypatch.setattr(faults_module.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(faults_module.faults, "latency_ms", 250)
+    asyncio.run(faults_module.inject_delay(x_delay=2))
+    assert awaited == [2.25]
+
 
 def test_repository_file_not_found():
     """Testa comportamento quando arquivo JSON não existe"""
@@ -111,3 +121,20 @@ def test_repository_general_exception():
             # Verifica que o repositório ainda funciona
             _, total = repo.find_paginated(page=1, size=5)
             assert total == 0
+
+
+def test_brand_and_price_filters_combined():
+    repo = InMemoryProductRepository.__new__(InMemoryProductRepository)
+    products = [make_product(i, f"p{i}", "Laptops") for i in range(1, 7)]
+    for i, p in enumerate(products, start=1):
+        p.price = 100.0 * i
+        p.brand = "Apple" if i % 2 else "Dell"
+    repo._products = products
+
+    items, total = repo.find_paginated(page=1, size=10, brand=["apple"], min_price=200, max_price=500)
+    assert total == 2
+    assert [p.id for p in items] == [3, 5]
+
+    items, total = repo.find_paginated(page=2, size=1, category="Laptops", brand="Dell")
+    assert total == 3
+    assert [p.id for p in items] == [4]
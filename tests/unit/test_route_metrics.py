@@ -0,0 +1,118 @@
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.middlewares import (
+    FRONTEND_ENDPOINT,
+    OVERFLOW_ENDPOINT,
+    UNMATCHED_ENDPOINT,
+    ObservabilityMiddleware,
+    RequestMetrics,
+    RouteLabeler,
+)
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(ObservabilityMiddleware)
+
+    @app.get("/routes/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/routes/items")
+    async def items():
+        return []
+
+    return app
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template():
+    client = TestClient(make_app())
+    before = sample("http_requests_total", method="GET", endpoint="/routes/items/{item_id}", http_status="200")
+
+    for item_id in range(5):
+        assert client.get(f"/routes/items/{item_id}").status_code == 200
+
+    assert sample(
+        "http_requests_total", method="GET", endpoint="/routes/items/{item_id}", http_status="200"
+    ) == before + 5
+    assert sample("http_requests_total", method="GET", endpoint="/routes/items/3", http_status="200") == 0
+
+
+def test_unknown_paths_collapse_into_one_label():
+    client = TestClient(make_app())
+    before = sample("http_requests_total", method="GET", endpoint=UNMATCHED_ENDPOINT, http_status="404")
+
+    for n in range(10):
+        assert client.get(f"/scan/{n}.php").status_code == 404
+
+    assert sample(
+        "http_requests_total", method="GET", endpoint=UNMATCHED_ENDPOINT, http_status="404"
+    ) == before + 10
+    assert sample("http_requests_total", method="GET", endpoint="/scan/1.php", http_status="404") == 0
+
+
+def test_frontend_mount_only_labels_its_files(tmp_path):
+    (tmp_path / "index.html").write_text("<html></html>")
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "app.js").write_text("")
+    app = make_app()
+    app.mount("/", StaticFiles(directory=str(tmp_path), html=True), name="frontend")
+    client = TestClient(app)
+    before = sample("http_requests_total", method="GET", endpoint=UNMATCHED_ENDPOINT, http_status="404")
+    frontend_before = sample("http_requests_total", method="GET", endpoint=FRONTEND_ENDPOINT, http_status="200")
+
+    assert client.get("/").status_code == 200
+    assert client.get("/assets/app.js").status_code == 200
+    assert client.get("/routes/items/1").status_code == 200
+    assert client.get("/v1/nope").status_code == 404
+    assert client.get("/wp-login.php").status_code == 404
+
+    assert sample(
+        "http_requests_total", method="GET", endpoint=FRONTEND_ENDPOINT, http_status="200"
+    ) == frontend_before + 2
+    assert sample(
+        "http_requests_total", method="GET", endpoint=UNMATCHED_ENDPOINT, http_status="404"
+    ) == before + 2
+    assert sample("http_requests_total", method="GET", endpoint="/{path}", http_status="404") == 0
+
+
+def test_labeler_caches_only_parameterless_paths():
+    app = make_app()
+    labeler = RouteLabeler(app.router.routes)
+
+    assert labeler("/routes/items") == "/routes/items"
+    assert labeler("/routes/items/7") == "/routes/items/{item_id}"
+    assert labeler("/nope") == UNMATCHED_ENDPOINT
+    assert set(labeler._exact) == {"/routes/items"}
+
+
+def test_children_are_cached_and_capped():
+    metrics = RequestMetrics(max_series=3)
+    overflow_before = sample("http_metrics_series_overflow_total")
+
+    first = metrics.route("GET", "/capped/a")
+    assert metrics.route("GET", "/capped/a") is first
+    metrics.status("GET", "/capped/a", 200)
+    metrics.route("BREW", "/capped/b")  # unknown method -> OTHER
+    assert ("OTHER", "/capped/b") in metrics._routes
+
+    # cap reached: new label sets share the overflow children
+    spilled = metrics.route("GET", "/capped/c")
+    assert spilled is metrics.route("POST", "/capped/d")
+    assert ("OTHER", OVERFLOW_ENDPOINT) in metrics._routes
+    count, errors = metrics.status("GET", "/capped/c", 500)
+    count.inc()
+    errors.inc()
+
+    assert sample("http_metrics_series_overflow_total") == overflow_before + 3
+    assert sample(
+        "http_requests_total", method="OTHER", endpoint=OVERFLOW_ENDPOINT, http_status="500"
+    ) >= 1
+    # known series keep their own children past the cap
+    assert metrics.route("GET", "/capped/a") is first
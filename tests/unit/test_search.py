@@ -0,0 +1,81 @@
+from fastapi.testclient import TestClient
+from dependency_injector import providers
+from prometheus_client import REGISTRY
+from app import main as app_main
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.adapters.repositories.inmem.search import edit_distance
+from app.core.services.product_service import ProductServiceImpl
+
+
+def names(items):
+    return sorted(p.name for p in items)
+
+
+def search(repo, q, **kwargs):
+    items, total = repo.find_paginated(page=1, size=100, q=q, **kwargs)
+    assert total == len(items)
+    return items
+
+
+def test_edit_distance_is_bounded():
+    assert edit_distance("samsnug", "samsung", 2) == 1
+    assert edit_distance("pixle", "pixel", 1) == 1
+    assert edit_distance("macbok", "macbook", 1) == 1
+    assert edit_distance("kitten", "sitting", 2) is None
+    assert edit_distance("a", "abcd", 2) is None
+
+
+def test_exact_and_fuzzy_terms():
+    repo = InMemoryProductRepository()
+    exact = search(repo, "Samsung")
+    assert exact and all("samsung" in f"{p.name} {p.brand}".lower() for p in exact)
+    assert names(search(repo, "samsnug")) == names(exact)
+    assert names(search(repo, "macbok")) == ['MacBook Pro 14" M3']
+    # every term must match
+    assert names(search(repo, "iphone pro")) == ["iPhone 15 Pro", "iPhone 15 Pro Max", "iPhone 15 Pro Max"]
+    assert search(repo, "iphone qwertyuiop") == []
+    # short terms are not expanded
+    assert search(repo, "zz") == []
+
+
+def test_search_combines_with_filters_and_sort():
+    repo = InMemoryProductRepository()
+    items = search(repo, "galaxy", max_price=1000, sort="-price")
+    assert items and all(p.price <= 1000 and "Galaxy" in p.name for p in items)
+    assert [p.price for p in items] == sorted((p.price for p in items), reverse=True)
+    assert [p.name for p in repo.find_top(k=1, weights={"rating": 1}, q="pixle")] == ["Google Pixel 8 Pro"]
+
+
+def test_writes_are_searchable():
+    repo = InMemoryProductRepository()
+    product = repo.find_by_id(1)
+    assert search(repo, "zenbook") == []
+    repo.patch(1, {"name": "Zenbook 14"})
+    assert [p.id for p in search(repo, "zenbok")] == [1]
+    repo.delete(1)
+    assert search(repo, "zenbook") == []
+    assert product.name == 'MacBook Pro 14" M3'
+
+
+def test_fuzzy_latency_is_observed_separately():
+    repo = InMemoryProductRepository()
+
+    def count(mode):
+        return REGISTRY.get_sample_value("catalog_search_seconds_count", {"mode": mode}) or 0
+
+    before = count("fuzzy"), count("exact")
+    search(repo, "sony")
+    search(repo, "sonny")
+    assert (count("fuzzy"), count("exact")) == (before[0] + 1, before[1] + 1)
+
+
+def test_q_parameter():
+    repo = InMemoryProductRepository()
+    app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+    try:
+        client = TestClient(app_main.app)
+        body = client.get("/v1/products", params={"q": "airpods mxa"}).json()
+        assert [p["name"] for p in body["items"]] == ["Apple AirPods Max"] and body["total"] == 1
+        assert client.get("/v1/products/top", params={"q": "sony"}).status_code == 200
+    finally:
+        app_main.container.product_service.reset_override()
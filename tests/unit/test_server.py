@@ -0,0 +1,73 @@
+import gc
+import importlib
+import importlib.util
+import time
+import pytest
+from prometheus_client import REGISTRY
+from app import main as app_main
+from app import server
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+
+
+def test_fast_loop_and_parser_are_used_when_installed(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: object())
+    assert (server.event_loop(), server.http_protocol()) == ("uvloop", "httptools")
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    assert (server.event_loop(), server.http_protocol()) == ("asyncio", "h11")
+
+
+def test_preload_builds_the_catalog_and_freezes_the_gc(tmp_path):
+    catalog = tmp_path / "catalog.json"
+    catalog.write_text(
+        '{"products": [{"id": 1, "name": "Only", "category": "Laptops", "description": "d",'
+        ' "price": 10.0, "rating": 4.0, "specifications": {}, "availability": "In Stock", "brand": "B"}]}'
+    )
+    try:
+        assert server.preload(str(catalog)) is app_main.app
+        assert gc.get_freeze_count() > 0
+        repository = app_main.container.product_repository()
+        assert isinstance(repository, InMemoryProductRepository)
+        assert [p.name for p in repository._products] == ["Only"]
+    finally:
+        gc.unfreeze()
+        app_main.container.backend_repository.reset_override()
+
+
+@pytest.mark.parametrize("name, value", [("CATALOG_DATA_DIR", "/tmp/catalog"), ("CATALOG_SHARDS", "4")])
+def test_per_process_state_requires_a_single_worker(monkeypatch, name, value):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(SystemExit) as exit_info:
+        server.main(["--workers", "2"])
+    assert exit_info.value.code == 2
+
+
+def test_a_single_worker_is_the_default(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    try:
+        assert importlib.reload(server).WORKERS == 1
+        monkeypatch.setenv("WEB_CONCURRENCY", "4")
+        assert importlib.reload(server).WORKERS == 4
+    finally:
+        monkeypatch.undo()
+        importlib.reload(server)
+
+
+def test_metrics_aggregate_workers_in_multiprocess_mode(monkeypatch, tmp_path):
+    assert app_main._metrics_registry() is REGISTRY
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert app_main._metrics_registry() is not REGISTRY
+
+
+def test_master_stops_its_workers(monkeypatch):
+    monkeypatch.setattr(server, "_run_worker", lambda app, sock: time.sleep(30))
+    master = server.Master(app=None, sock=None, workers=2)
+    master.spawn()
+    master.spawn()
+    assert len(master.children) == 2
+
+    started = time.monotonic()
+    master.shutdown()
+
+    assert master.children == {}
+    assert time.monotonic() - started < 5
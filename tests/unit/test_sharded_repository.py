@@ -0,0 +1,165 @@
+import pytest
+from app import config, deadline
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+from app.adapters.repositories.sharded.product_repository import ShardedProductRepository, shard_of
+from app.adapters.repositories.sharded.shard import ShardServer
+from app.errors import CustomError
+
+
+@pytest.fixture(scope="module")
+def repos():
+    products = read_products()
+    sharded = ShardedProductRepository(shards=3, products=products)
+    yield InMemoryProductRepository(products=products), sharded
+    sharded.close()
+
+
+def ids(items):
+    return [p.id for p in items]
+
+
+def test_products_are_partitioned_by_id():
+    assert {shard_of(i, 3) for i in range(100)} == {0, 1, 2}
+    assert shard_of(42, 3) == shard_of(42, 3)
+
+
+@pytest.mark.parametrize("page, size, kwargs", [
+    (1, 10, {}),
+    (3, 10, {}),
+    (2, 4, {"category": "Smartphones"}),
+    (1, 5, {"sort": "-price"}),
+    (2, 5, {"sort": "memory_gb", "min_rating": 4.5}),
+    (1, 10, {"filter": 'brand in ("Apple", "Samsung") and price < 1200'}),
+])
+def test_scatter_gather_matches_single_catalog(repos, page, size, kwargs):
+    single, sharded = repos
+    expected_items, expected_total = single.find_paginated(page=page, size=size, **kwargs)
+    items, total = sharded.find_paginated(page=page, size=size, **kwargs)
+    assert total == expected_total
+    assert ids(items) == ids(expected_items)
+
+
+def test_top_k_matches_single_catalog(repos):
+    single, sharded = repos
+    weights = {"rating": 0.7, "price": -0.3}
+    assert ids(sharded.find_top(k=5, weights=weights)) == ids(single.find_top(k=5, weights=weights))
+    assert ids(sharded.find_top(k=3, weights=weights, category="Laptops")) == \
+        ids(single.find_top(k=3, weights=weights, category="Laptops"))
+
+
+def test_shard_errors_are_propagated(repos):
+    _, sharded = repos
+    with pytest.raises(CustomError) as err:
+        sharded.find_paginated(page=1, size=5, filter="price <")
+    assert err.value.status_code == 400
+
+
+def test_suggestions_match_single_catalog(repos):
+    single, sharded = repos
+    for prefix in ("s", "Sam", "iphone 15", "zzz"):
+        assert [(s.text, s.kind) for s in sharded.find_suggestions(prefix, 5)] == \
+            [(s.text, s.kind) for s in single.find_suggestions(prefix, 5)]
+
+
+def test_stats_match_single_catalog(repos):
+    single, sharded = repos
+    expected = single.get_stats().model_dump(exclude={"generation"})
+    assert sharded.get_stats().model_dump(exclude={"generation"}) == expected
+
+
+def test_variants_match_single_catalog(repos):
+    single, sharded = repos
+    overrides = {1: {"price": 5.0}, 2: None, 7: {"rating": 1.0, "brand": "Acme"}, 999: {"price": 1.0}}
+    assert sharded.put_variant("promo", overrides) == single.put_variant("promo", overrides)
+    try:
+        for kwargs in ({}, {"sort": "price"}, {"brand": "Acme"}):
+            items, total = sharded.find_paginated(page=1, size=30, variant="promo", **kwargs)
+            expected_items, expected_total = single.find_paginated(page=1, size=30, variant="promo", **kwargs)
+            assert (ids(items), total) == (ids(expected_items), expected_total)
+        assert [p.price for p in items] == [p.price for p in expected_items]
+        weights = {"rating": 0.5, "price": -0.5}
+        assert ids(sharded.find_top(k=5, weights=weights, variant="promo")) == \
+            ids(single.find_top(k=5, weights=weights, variant="promo"))
+        assert sharded.find_by_id(1, variant="promo").price == 5.0
+        assert sharded.find_by_id(2, variant="promo") is None
+        assert sharded.get_stats(variant="promo").brands == single.get_stats(variant="promo").brands
+        assert sharded.list_variants() == {"promo": 4}
+        with pytest.raises(CustomError):
+            sharded.find_by_id(1, variant="missing")
+    finally:
+        assert sharded.delete_variant("promo") and single.delete_variant("promo")
+
+
+def test_writes_route_to_owning_shard(repos):
+    # runs last: applies the same writes to both repositories
+    single, sharded = repos
+    base = single.find_by_id(1).model_dump(exclude={"numeric_specifications"})
+    starts = [repo.find_changes(since=0)[0] for repo in repos]
+    for repo in repos:
+        assert repo.create(dict(base, id=None, name="Clone", price=10.0)).id == 28
+        repo.patch(2, {"price": 1.0, "specifications": {"memory": "64GB"}})
+        repo.delete(3)
+
+    assert sharded.find_by_id(28).name == "Clone"
+    assert sharded.find_by_id(3) is None
+    for kwargs in ({}, {"sort": "price"}, {"sort": "-memory_gb"}):
+        assert ids(sharded.find_paginated(page=1, size=30, **kwargs)[0]) == \
+            ids(single.find_paginated(page=1, size=30, **kwargs)[0])
+    weights = {"rating": 0.5, "price": -0.5}
+    assert ids(sharded.find_top(k=5, weights=weights)) == ids(single.find_top(k=5, weights=weights))
+    assert sharded.get_stats().categories == single.get_stats().categories
+    history = sharded.find_price_history(2, resolution="raw")
+    assert history.current_price == 1.0 and [p.price for p in history.points] == [1.0]
+
+    (single_generation, single_changes), (generation, changes) = (
+        repo.find_changes(since=start) for repo, start in zip(repos, starts)
+    )
+    assert generation == starts[1] + 3
+    assert [(c.id, c.op, c.product) for c in changes] == [(c.id, c.op, c.product) for c in single_changes]
+    assert sharded.find_changes(since=generation) == (generation, [])
+    assert sharded.find_changes(since=generation + 1)[1] is None
+
+
+def test_deleted_products_leave_the_shard():
+    products = read_products()[:6]
+    shard = ShardServer(list(enumerate(products)))
+    victim = products[2]
+    assert shard.delete(victim.id)
+    assert victim.id not in shard.sequence and 2 not in shard.by_sequence
+    assert shard.fetch([1, 2, 3]) == [products[1], None, products[3]]  # fetched after a concurrent delete
+    assert not shard.delete(victim.id)
+
+    # the catalog puts a re-created id back in its old position; its merge key follows
+    data = victim.model_dump(exclude={"numeric_specifications"})
+    assert shard.create(99, data).id == victim.id
+    assert shard.sequence[victim.id] == 2 and shard.retired == {}
+    _, keys = shard.find(6, {})
+    assert keys == sorted(keys)
+
+
+def test_shards_skip_reads_past_the_deadline(repos):
+    _, sharded = repos
+    with deadline.scope(0), pytest.raises(CustomError) as err:
+        sharded.find_paginated(page=1, size=5)
+    assert err.value.status_code == 504
+    with deadline.scope(5):
+        assert len(sharded.find_paginated(page=1, size=5)[0]) == 5
+
+
+def test_similar_matches_single_catalog(repos):
+    single, sharded = repos
+    for product_id in (1, 5, 12):
+        expected = single.find_similar(product_id, k=4)
+        found = sharded.find_similar(product_id, k=4)
+        assert ids(found) == ids(expected)
+        assert all(p.category == found[0].category for p in found)
+    assert sharded.find_similar(10**9, k=4) is None
+
+
+def test_sharded_catalog_rejects_the_write_ahead_log(monkeypatch):
+    monkeypatch.setenv("CATALOG_SHARDS", "2")
+    monkeypatch.delenv("CATALOG_DATA_DIR", raising=False)
+    config.check_settings()
+    monkeypatch.setenv("CATALOG_DATA_DIR", "/tmp/catalog")
+    with pytest.raises(ValueError):
+        config.check_settings()
@@ -0,0 +1,63 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from app.adapters.repositories.inmem.catalog import Catalog
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.adapters.repositories.inmem.similarity import SimilarityIndex
+from app.core.domain.product import Product, ProductSpecification
+from app.main import app
+
+
+def make_product(id, category, price, brand="Brand"):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category=category,
+        description="desc",
+        price=price,
+        rating=4.0,
+        specifications=ProductSpecification(),
+        availability="In Stock",
+        brand=brand,
+    )
+
+
+def test_nearest_stays_in_category_and_orders_by_distance():
+    repo = InMemoryProductRepository.__new__(InMemoryProductRepository)
+    repo._products = [
+        make_product(1, "TVs", 1000.0),
+        make_product(2, "TVs", 1100.0),
+        make_product(3, "TVs", 3000.0),
+        make_product(4, "TVs", 1050.0),
+        make_product(5, "Laptops", 1000.0),
+    ]
+    similar = repo.find_similar(product_id=1, k=2)
+    assert [p.id for p in similar] == [4, 2]
+
+    similar = repo.find_similar(product_id=1, k=10)
+    assert [p.id for p in similar] == [4, 2, 3]
+
+    assert repo.find_similar(product_id=5, k=3) == []
+    assert repo.find_similar(product_id=99, k=3) is None
+
+
+def test_index_matches_brute_force():
+    rnd = np.random.default_rng(3)
+    products = [make_product(i, "Laptops", float(p), brand="AB"[i % 2]) for i, p in enumerate(rnd.uniform(100, 5000, 200))]
+    catalog = Catalog(products)
+    index = SimilarityIndex(catalog)
+    positions, matrix = index.blocks[catalog.column("category").code("laptops")]
+    distances = np.square(matrix - matrix[0]).sum(axis=1)
+    expected = [int(positions[i]) for i in np.argsort(distances, kind="stable")[1:6]]
+    assert index.nearest(0, 5) == expected
+
+
+def test_similar_route():
+    client = TestClient(app)
+    resp = client.get("/v1/products/1/similar?k=3")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["product_id"] == 1
+    assert len(data["items"]) == 3
+    assert all(p["category"] == "Laptops" and p["id"] != 1 for p in data["items"])
+
+    assert client.get("/v1/products/9999/similar").status_code == 404
@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from dependency_injector import providers
+from fastapi.testclient import TestClient
+from app import main as app_main
+from app.adapters.httphandlers.single_flight import COALESCED_REQUESTS, SingleFlight
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.core.services.product_service import ProductServiceImpl
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, "key", compute) for _ in range(8)]
+        while COALESCED_REQUESTS.labels(route="test")._value.get() < 7:
+            threading.Event().wait(0.001)
+        release.set()
+        results = {id(f.result()) for f in futures}
+    assert len(calls) == 1 and len(results) == 1
+    # nothing is kept after the flight lands
+    assert flight.do("key", lambda: 42) == 42
+
+
+def test_errors_are_shared_and_not_kept():
+    flight = SingleFlight("test-errors")
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: 1) == 1
+
+
+class SlowRepository(InMemoryProductRepository):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def find_paginated(self, page, size, **kwargs):
+        with self.lock:
+            self.calls += 1
+        threading.Event().wait(0.2)
+        return super().find_paginated(page, size, **kwargs)
+
+
+def test_identical_requests_are_coalesced():
+    repo = SlowRepository()
+    app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+    try:
+        client = TestClient(app_main.app)
+        urls = ["/v1/products?category=Laptops&category=TVs"] * 6 + ["/v1/products?category=TVs&category=Laptops"] * 2
+        with ThreadPoolExecutor(len(urls)) as pool:
+            responses = list(pool.map(client.get, urls))
+        assert {r.status_code for r in responses} == {200}
+        assert len({r.content for r in responses}) == 1
+        assert repo.calls < len(urls)
+    finally:
+        app_main.container.product_service.reset_override()
@@ -0,0 +1,52 @@
+import pytest
+from prometheus_client import REGISTRY
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.adapters.repositories.inmem.spec_normalizer import normalize_specifications
+from app.core.domain.product import ProductSpecification
+
+
+def failures(field):
+    return REGISTRY.get_sample_value("spec_normalization_failures_total", {"field": field}) or 0
+
+
+@pytest.mark.parametrize("specs, expected", [
+    (dict(memory="8GB Unified Memory", storage="1TB PCIe NVMe SSD", weight="1.55 kg",
+          battery_life="Up to 22 hours", display="14.2-inch Liquid Retina XDR"),
+     dict(memory_gb=8, storage_gb=1000, weight_kg=1.55, battery_hours=22, screen_inches=14.2, refresh_hz=None)),
+    (dict(weight="221g", display="15.6-inch QHD 240Hz"),
+     dict(weight_kg=0.221, screen_inches=15.6, refresh_hz=240)),
+    (dict(screen_size="65 inches", display_type="OLED"),
+     dict(screen_inches=65, memory_gb=None)),
+])
+def test_normalize_specifications(specs, expected):
+    numeric = normalize_specifications(ProductSpecification(**specs))
+    for field, value in expected.items():
+        if value is None:
+            assert getattr(numeric, field) is None
+        else:
+            assert getattr(numeric, field) == pytest.approx(value)
+
+
+def test_parse_failures_are_counted():
+    before = failures("battery_hours")
+    numeric = normalize_specifications(ProductSpecification(battery_life="5000mAh with 45W fast charging"))
+    assert numeric.battery_hours is None
+    assert failures("battery_hours") == before + 1
+
+    # absent source text is not a failure
+    before = failures("memory_gb")
+    normalize_specifications(ProductSpecification())
+    assert failures("memory_gb") == before
+
+
+def test_repository_filters_and_sorts_on_numeric_columns():
+    repo = InMemoryProductRepository()
+    items, total = repo.find_paginated(page=1, size=100, category="Laptops", filter="memory_gb >= 32", sort="-memory_gb")
+    assert total == len(items) > 0
+    memories = [p.numeric_specifications.memory_gb for p in items]
+    assert min(memories) >= 32
+    assert memories == sorted(memories, reverse=True)
+
+    items, _ = repo.find_paginated(page=1, size=3, sort="weight_kg")
+    weights = [p.numeric_specifications.weight_kg for p in items]
+    assert weights == sorted(weights)
@@ -0,0 +1,88 @@
+import random
+import numpy as np
+from fastapi.testclient import TestClient
+from dependency_injector import providers
+from app import main as app_main
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.adapters.repositories.inmem.stats import CatalogAggregates
+from app.core.domain.product import Product, ProductSpecification
+from app.core.services.product_service import ProductServiceImpl
+
+
+def make_product(id, category, brand, price, rating, availability="In Stock"):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category=category,
+        description="desc",
+        price=price,
+        rating=rating,
+        specifications=ProductSpecification(),
+        availability=availability,
+        brand=brand,
+    )
+
+
+def random_product(rnd, id):
+    return make_product(
+        id,
+        rnd.choice(["Laptops", "TVs", "Smartphones"]),
+        rnd.choice(["Apple", "Dell", "LG"]),
+        float(rnd.randint(1, 400) * 5),
+        round(rnd.uniform(1, 5), 1),
+        rnd.choice(["In Stock", "In Stock", "Out of Stock"]),
+    )
+
+
+def test_summary_numbers():
+    products = [make_product(i, "Laptops", "Dell", float(i * 10), 4.0 + i / 10) for i in range(1, 11)]
+    products.append(make_product(11, "TVs", "LG", 500.0, 3.0, availability="Out of Stock"))
+    summary = CatalogAggregates.of(products).summary(generation=7)
+    laptops = summary.categories["Laptops"]
+    assert summary.generation == 7 and summary.total.count == 11
+    assert (laptops.count, laptops.price.min, laptops.price.max, laptops.price.mean) == (10, 10.0, 100.0, 55.0)
+    assert (laptops.price.p50, laptops.price.p90, laptops.price.p99) == (50.0, 90.0, 100.0)
+    assert summary.total.availability == {"In Stock": round(10 / 11, 4), "Out of Stock": round(1 / 11, 4)}
+    assert set(summary.brands) == {"Dell", "LG"}
+
+
+def test_incremental_aggregates_match_a_rebuild():
+    rnd = random.Random(7)
+    repo = InMemoryProductRepository(products=[random_product(rnd, i) for i in range(1, 200)])
+    for step in range(300):
+        action = rnd.random()
+        product_id = rnd.randint(1, 260)
+        if action < 0.5:
+            repo.patch(product_id, {"price": float(rnd.randint(1, 400) * 5), "brand": rnd.choice(["Apple", "Sony"])})
+        elif action < 0.8:
+            repo.delete(product_id)
+        elif repo.find_by_id(product_id) is None:
+            repo.create(random_product(rnd, product_id).model_dump())
+    incremental = repo.get_stats()
+    rebuilt = CatalogAggregates.of(repo._products).summary(repo._catalog.version)
+    assert incremental.model_dump(exclude={"total"}) == rebuilt.model_dump(exclude={"total"})
+    # running sums may differ from a fresh sum in the last float bits
+    assert np.isclose(incremental.total.price.mean, rebuilt.total.price.mean)
+    assert incremental.total.model_dump(exclude={"price"}) == rebuilt.total.model_dump(exclude={"price"})
+
+
+def test_groups_appear_and_disappear():
+    repo = InMemoryProductRepository(products=[make_product(1, "Laptops", "Dell", 100.0, 4.0)])
+    repo.create(make_product(2, "Drones", "DJI", 900.0, 4.5).model_dump())
+    assert repo.get_stats().categories["Drones"].count == 1
+    repo.delete(2)
+    assert "Drones" not in repo.get_stats().categories and "DJI" not in repo.get_stats().brands
+    repo.delete(1)
+    assert repo.get_stats().total is None
+
+
+def test_stats_route():
+    repo = InMemoryProductRepository()
+    app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+    try:
+        body = TestClient(app_main.app).get("/v1/products/stats").json()
+        assert body["total"]["count"] == len(repo._products)
+        assert sum(group["count"] for group in body["categories"].values()) == body["total"]["count"]
+        assert body["categories"]["Laptops"]["price"]["min"] <= body["categories"]["Laptops"]["price"]["p50"]
+    finally:
+        app_main.container.product_service.reset_override()
@@ -0,0 +1,98 @@
+import threading
+from fastapi.testclient import TestClient
+from dependency_injector import providers
+from app import main as app_main
+from app.adapters.repositories.inmem.catalog import Catalog
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.adapters.repositories.inmem.suggest import SCAN_LIMIT, SuggestIndex
+from app.core.domain.product import Product, ProductSpecification
+from app.core.services.product_service import ProductServiceImpl
+
+
+def make_product(id, name, brand="Dell", rating=4.0):
+    return Product(
+        id=id,
+        name=name,
+        category="Laptops",
+        description="desc",
+        price=100.0,
+        rating=rating,
+        specifications=ProductSpecification(),
+        availability="In Stock",
+        brand=brand,
+    )
+
+
+def brute_force(products, prefix, limit):
+    entries = {}
+    for p in products:
+        for kind, text in (("name", p.name), ("brand", p.brand)):
+            if text.lower().startswith(prefix.lower()):
+                rating, count = entries.get((text.lower(), kind), (0.0, 0))
+                entries[(text.lower(), kind)] = (max(rating, p.rating), count + 1)
+    ranked = sorted(entries.items(), key=lambda e: (-e[1][0], -e[1][1], e[0]))
+    return [key for key, _ in ranked[:limit]]
+
+
+def keys(suggestions):
+    return [(s.text.lower(), s.kind) for s in suggestions]
+
+
+def test_names_and_brands_ranked_by_rating():
+    repo = InMemoryProductRepository()
+    items = repo.find_suggestions("MAC", 5)
+    assert items[0].text == 'MacBook Pro 14" M3' and items[0].product_id == 1
+    samsung = repo.find_suggestions("sam", 10)
+    assert ("samsung", "brand") in keys(samsung)
+    brand = next(s for s in samsung if s.kind == "brand")
+    assert brand.count == sum(p.brand == "Samsung" for p in repo._products) and brand.product_id is None
+    assert [s.rating for s in samsung] == sorted((s.rating for s in samsung), reverse=True)
+    assert repo.find_suggestions("  ", 5) == [] and repo.find_suggestions("qqq", 5) == []
+
+
+def test_large_ranges_match_brute_force():
+    brands = ["Acer", "Apple", "Asus"]
+    products = [
+        make_product(i, f"{brands[i % 3]} Model {i}", brand=brands[i % 3], rating=round(1 + (i * 7919 % 40) / 10, 1))
+        for i in range(1, 4 * SCAN_LIMIT)
+    ]
+    index = SuggestIndex(Catalog(products))
+    # "a" and "ap" are precomputed, "apple model" is memoized, "apple model 1" is ranked on the fly
+    for prefix in ("a", "ap", "apple model", "apple model 1", "acer model 12"):
+        for limit in (1, 8, 20):
+            assert keys(index.suggest(prefix, limit)) == brute_force(products, prefix, limit)
+    assert "apple model" in index._top
+
+
+def test_writes_are_visible():
+    repo = InMemoryProductRepository(products=[make_product(1, "Zephyrus G14", brand="Asus"), make_product(2, "XPS 13")])
+    assert keys(repo.find_suggestions("zep", 5)) == [("zephyrus g14", "name")]
+    repo.patch(1, {"name": "ROG Zephyrus"})
+    assert repo.find_suggestions("zep", 5) == []
+    assert keys(repo.find_suggestions("rog", 5)) == [("rog zephyrus", "name")]
+
+    # large catalogs keep serving the previous index while it is rebuilt
+    repo._suggestions.sync_limit = 0
+    repo.delete(1)
+    assert keys(repo.find_suggestions("rog", 5)) == [("rog zephyrus", "name")]
+    for _ in range(100):
+        if repo._suggestions.current.version == repo._catalog.version:
+            break
+        threading.Event().wait(0.01)
+    assert repo.find_suggestions("rog", 5) == []
+
+
+def test_suggest_route():
+    repo = InMemoryProductRepository()
+    app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+    try:
+        client = TestClient(app_main.app)
+        response = client.get("/v1/products/suggest", params={"prefix": "iphone", "limit": 2})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["prefix"] == "iphone" and len(body["items"]) == 2
+        assert body["items"][0]["text"].startswith("iPhone")
+        assert client.get("/v1/products/suggest", params={"prefix": ""}).status_code == 422
+        assert client.get("/v1/products/suggest", params={"prefix": "a", "limit": 50}).status_code == 422
+    finally:
+        app_main.container.product_service.reset_override()
@@ -0,0 +1,98 @@
+import pytest
+from fastapi.testclient import TestClient
+from dependency_injector import providers
+from app import main as app_main
+from app.adapters.repositories.inmem import variants
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository, read_products
+from app.core.services.product_service import ProductServiceImpl
+from app.errors import CustomError
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def ids(items):
+    return [p.id for p in items]
+
+
+@pytest.fixture
+def repo():
+    return InMemoryProductRepository(products=read_products())
+
+
+def test_variant_overrides_and_hides_products(repo):
+    base_price = repo.find_by_id(1).price
+    assert repo.put_variant("eu", {1: {"price": 1.0}, 2: None}) == len(repo._products) - 1
+    assert repo.find_by_id(1, variant="eu").price == 1.0
+    assert repo.find_by_id(2, variant="eu") is None
+    assert repo.find_by_id(1).price == base_price and repo.find_by_id(2) is not None
+    items, total = repo.find_paginated(page=1, size=1, sort="price", variant="eu")
+    assert ids(items) == [1] and total == len(repo._products) - 1
+    assert repo.get_stats(variant="eu").total.price.min == 1.0
+    assert repo.get_stats().total.price.min != 1.0
+    assert repo.list_variants() == {"eu": 2}
+
+
+def test_variant_shares_structure_with_the_base(repo):
+    repo.put_variant("eu", {1: {"price": 1.0}})
+    base, variant = repo._catalog, repo._variants["eu"].catalog
+    # only the price changed: the other indexes are the base's objects
+    assert variant.value_index["category"] is base.value_index["category"]
+    assert variant.range_index["rating"] is base.range_index["rating"]
+    assert variant.products[5] is base.products[5]
+
+
+def test_base_writes_reach_every_variant(repo):
+    repo.put_variant("eu", {1: {"price": 1.0}, 3: None})
+    repo.patch(1, {"name": "Renamed", "price": 2000.0})
+    product = repo.find_by_id(1, variant="eu")
+    assert (product.name, product.price) == ("Renamed", 1.0)
+    repo.update(3, repo.find_by_id(3).model_dump())
+    assert repo.find_by_id(3, variant="eu") is None
+    created = repo.create(dict(repo.find_by_id(4).model_dump(exclude={"numeric_specifications"}), id=None))
+    assert repo.find_by_id(created.id, variant="eu") == created
+    repo.delete(4)
+    assert repo.find_by_id(4, variant="eu") is None
+    assert repo.get_stats(variant="eu").total.count == repo.get_stats().total.count - 1
+    assert ids(repo.find_paginated(page=1, size=5, q="renamed", variant="eu")[0]) == [1]
+
+
+def test_large_override_sets_are_built_from_scratch(repo, monkeypatch):
+    overrides = {p.id: {"price": p.price / 2} for p in repo._products[::2]}
+    overrides[5] = None
+    repo.put_variant("patched", overrides)
+    monkeypatch.setattr(variants, "INCREMENTAL_LIMIT", 1)
+    repo.put_variant("rebuilt", overrides)
+    for kwargs in ({}, {"sort": "-price"}, {"max_price": 500}):
+        assert ids(repo.find_paginated(page=1, size=40, variant="patched", **kwargs)[0]) == \
+            ids(repo.find_paginated(page=1, size=40, variant="rebuilt", **kwargs)[0])
+    assert repo.get_stats(variant="patched").model_dump(exclude={"generation"}) == \
+        repo.get_stats(variant="rebuilt").model_dump(exclude={"generation"})
+
+
+def test_unknown_variant(repo):
+    with pytest.raises(CustomError) as err:
+        repo.find_paginated(page=1, size=5, variant="nope")
+    assert err.value.status_code == 404
+    assert repo.delete_variant("nope") is False
+
+
+def test_variant_routes(repo):
+    app_main.container.product_service.override(providers.Object(ProductServiceImpl(repo)))
+    try:
+        client = TestClient(app_main.app)
+        body = {"overrides": {"1": {"price": 9.5}, "2": None}}
+        assert client.put("/v1/products/variants/br", json=body).status_code == 401
+        response = client.put("/v1/products/variants/br", json=body, headers=ADMIN)
+        assert response.json() == {"name": "br", "overrides": 2, "products": len(repo._products) - 1}
+        assert client.get("/v1/products/variants").json() == {"variants": {"br": 2}}
+        variant = {"X-Catalog-Variant": "br"}
+        assert client.get("/v1/products/1", headers=variant).json()["price"] == 9.5
+        assert client.get("/v1/products/2", headers=variant).status_code == 404
+        listed = client.get("/v1/products", params={"sort": "price", "page_size": 1}, headers=variant).json()
+        assert listed["items"][0]["id"] == 1
+        assert client.get("/v1/products/1").json()["price"] != 9.5
+        assert client.get("/v1/products/stats", headers={"X-Catalog-Variant": "other"}).status_code == 404
+        assert client.delete("/v1/products/variants/br", headers=ADMIN).status_code == 204
+        assert client.delete("/v1/products/variants/br", headers=ADMIN).status_code == 404
+    finally:
+        app_main.container.product_service.reset_override()
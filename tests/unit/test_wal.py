@@ -0,0 +1,157 @@
+import glob
+import os
+import threading
+import time
+import pytest
+from app.adapters.repositories.inmem import wal as wal_module
+from app.adapters.repositories.inmem.product_repository import InMemoryProductRepository
+from app.adapters.repositories.inmem.wal import WriteAheadLog
+from app.core.domain.product import Product, ProductSpecification
+
+
+def make_product(id, price=10.0):
+    return Product(
+        id=id,
+        name=f"p{id}",
+        category="Laptops",
+        description="desc",
+        price=price,
+        rating=4.0,
+        specifications=ProductSpecification(memory="8GB"),
+        availability="In Stock",
+        brand="Dell",
+    )
+
+
+def open_repo(directory, **kwargs):
+    return InMemoryProductRepository(
+        products=[make_product(i) for i in range(1, 4)], storage=WriteAheadLog(str(directory), **kwargs)
+    )
+
+
+def snapshot(repo):
+    return [(p.id, p.price) for p in repo._products], repo._catalog.version
+
+
+def test_writes_survive_restart(tmp_path):
+    repo = open_repo(tmp_path)
+    repo.create(make_product(10).model_dump())
+    repo.patch(1, {"price": 99.0})
+    repo.delete(2)
+    repo.delete(10)
+    repo.create(make_product(10, price=5.0).model_dump())
+    before = snapshot(repo)
+    repo._wal.close()
+
+    recovered = open_repo(tmp_path)
+    assert snapshot(recovered) == before == ([(1, 99.0), (3, 10.0), (10, 5.0)], 5)
+    assert recovered.find_by_id(10).numeric_specifications.memory_gb == 8
+    # generations continue after recovery
+    recovered.patch(3, {"price": 1.0})
+    assert recovered.find_changes(since=5)[1][0].id == 3
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    repo = open_repo(tmp_path)
+    repo.patch(1, {"price": 50.0})
+    repo._wal.close()
+    segment = glob.glob(os.path.join(tmp_path, "wal-*.log"))[0]
+    with open(segment, "ab") as file:
+        file.write(b'{"g":2,"op":"updated","id":1,"prod')
+
+    assert snapshot(open_repo(tmp_path)) == ([(1, 50.0), (2, 10.0), (3, 10.0)], 1)
+
+
+def test_compaction_bounds_the_log(tmp_path):
+    repo = open_repo(tmp_path, compact_after=10)
+    for i in range(25):
+        repo.patch(1 + i % 3, {"price": float(i)})
+    while repo._wal._compacting:
+        time.sleep(0.01)
+    repo.compact()
+    before = snapshot(repo)
+    repo._wal.close()
+
+    assert os.path.exists(os.path.join(tmp_path, "snapshot.json"))
+    assert len(glob.glob(os.path.join(tmp_path, "wal-*.log"))) == 1
+    assert snapshot(open_repo(tmp_path)) == before
+
+
+def test_concurrent_writers_share_fsyncs(tmp_path, monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        calls.append(fd)
+        threading.Event().wait(0.005)
+        real_fsync(fd)
+
+    monkeypatch.setattr(wal_module.os, "fsync", slow_fsync)
+    repo = open_repo(tmp_path)
+    calls.clear()
+
+    def writer(offset):
+        for i in range(20):
+            repo.patch(1 + offset % 3, {"price": float(i)})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert repo._catalog.version == 160
+    assert len(calls) < 160
+    repo._wal.close()
+    assert snapshot(open_repo(tmp_path))[1] == 160
+
+
+def test_writes_are_visible_only_once_durable(tmp_path, monkeypatch):
+    repo = open_repo(tmp_path)
+    real_fsync = os.fsync
+    entered, release = threading.Event(), threading.Event()
+
+    def blocked_fsync(fd):
+        entered.set()
+        release.wait(5)
+        real_fsync(fd)
+
+    monkeypatch.setattr(wal_module.os, "fsync", blocked_fsync)
+    writer = threading.Thread(target=repo.patch, args=(1, {"price": 77.0}))
+    writer.start()
+    assert entered.wait(5)
+    assert repo.find_by_id(1).price == 10.0
+    assert repo.find_price_history(1).current_price == 10.0
+    release.set()
+    writer.join()
+    assert repo.find_by_id(1).price == 77.0
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(wal_module.os, "fsync", failing_fsync)
+    with pytest.raises(OSError):
+        repo.patch(1, {"price": 1.0})
+    assert repo.find_by_id(1).price == 77.0
+
+
+def test_failed_fsync_rolls_the_write_back(tmp_path, monkeypatch):
+    repo = open_repo(tmp_path)
+    repo.patch(1, {"price": 77.0})
+    generation = repo._catalog.version
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(wal_module.os, "fsync", failing_fsync)
+    with pytest.raises(OSError):
+        repo.patch(2, {"price": 1.0})
+    assert repo._head is repo._catalog and repo._catalog.version == generation
+    assert repo.find_changes(since=generation) == (generation, [])
+    # the failed write is neither built on nor snapshotted
+    with pytest.raises(OSError):
+        repo.patch(3, {"price": 2.0})
+    assert [p.price for p in repo._head.live_products()] == [77.0, 10.0, 10.0]
+    with pytest.raises(OSError):
+        repo.compact()
+    assert not os.path.exists(os.path.join(str(tmp_path), wal_module.SNAPSHOT_FILE))